@@ -0,0 +1,200 @@
+import asyncio
+import heapq
+import itertools
+import time
+from collections import OrderedDict, deque
+from typing import Deque, List, Sequence, Tuple
+
+from streaming import percentile
+
+# Seconds a request shed from a full or slow queue is told to wait
+QUEUE_RETRY_AFTER = 1.0
+
+
+class Overloaded(Exception):
+    """A request turned away because the service is at capacity"""
+
+    def __init__(self, reason: str, retry_after: float):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class TokenBucket:
+    __slots__ = ("rate", "burst", "tokens", "updated")
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+
+    def take(self) -> float:
+        """Take a token: 0 if one was free, else seconds until one will be"""
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+
+class RateLimiter:
+    """Token bucket per client: ``rate`` requests a second, bursts of ``burst``
+
+    The least recently seen clients are forgotten beyond ``max_clients``. A
+    ``rate`` of 0 disables the limit.
+    """
+
+    def __init__(self, rate: float, burst: float, max_clients: int = 10000):
+        self.rate = rate
+        self.burst = max(burst, 1)
+        self.max_clients = max_clients
+        self.limited = 0
+        self._buckets: "OrderedDict[str, TokenBucket]" = OrderedDict()
+
+    def check(self, client: str):
+        """Take one of ``client``'s tokens, raising Overloaded if it has none"""
+        if self.rate <= 0:
+            return
+        bucket = self._buckets.get(client)
+        if bucket is None:
+            bucket = self._buckets[client] = TokenBucket(self.rate, self.burst)
+            if len(self._buckets) > self.max_clients:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(client)
+        wait = bucket.take()
+        if wait:
+            self.limited += 1
+            raise Overloaded("rate_limited", wait)
+
+    def stats(self) -> dict:
+        return {
+            "rate": self.rate,
+            "burst": self.burst,
+            "clients": len(self._buckets),
+            "rate_limited": self.limited,
+        }
+
+
+class Slot:
+    """A place among the running requests, held until released"""
+
+    def __init__(self, admission: "Admission"):
+        self._admission = admission
+        self._released = False
+
+    def release(self):
+        if not self._released:
+            self._released = True
+            self._admission._release()
+
+    def __enter__(self) -> "Slot":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.release()
+
+
+class _ClassStats:
+    def __init__(self, samples: int):
+        self.admitted = 0
+        self.shed_full = 0
+        self.shed_timeout = 0
+        self.waits: Deque[float] = deque(maxlen=samples)
+
+    def as_dict(self) -> dict:
+        waits = list(self.waits)
+        return {
+            "admitted": self.admitted,
+            "shed_queue_full": self.shed_full,
+            "shed_timeout": self.shed_timeout,
+            "p50_wait_ms": round(percentile(waits, 0.50) * 1000, 1),
+            "p99_wait_ms": round(percentile(waits, 0.99) * 1000, 1),
+            "max_wait_ms": round(max(waits, default=0.0) * 1000, 1),
+        }
+
+
+class Admission:
+    """At most ``max_running`` requests at once, the rest queued by priority
+
+    ``classes`` names the request classes, most urgent first; a waiting
+    request of an earlier class is always let in before a later one, and
+    requests of a class in arrival order. Beyond ``max_queued`` waiting, or
+    after ``max_wait`` seconds in the queue, a request is shed with
+    Overloaded.
+    """
+
+    def __init__(
+        self,
+        max_running: int,
+        max_queued: int,
+        max_wait: float,
+        classes: Sequence[str],
+        samples: int = 1024,
+    ):
+        self.max_running = max_running
+        self.max_queued = max_queued
+        self.max_wait = max_wait
+        self.running = 0
+        self._priorities = {name: index for index, name in enumerate(classes)}
+        self._stats = {name: _ClassStats(samples) for name in classes}
+        self._waiters: List[Tuple[int, int, asyncio.Future]] = []
+        self._sequence = itertools.count()
+
+    @property
+    def queued(self) -> int:
+        return sum(not future.done() for _, _, future in self._waiters)
+
+    async def acquire(self, request_class: str) -> Slot:
+        """Wait for a slot for a request of ``request_class``"""
+        stats = self._stats[request_class]
+        if self.running < self.max_running and not self.queued:
+            self.running += 1
+            stats.admitted += 1
+            stats.waits.append(0.0)
+            return Slot(self)
+        if self.queued >= self.max_queued:
+            stats.shed_full += 1
+            raise Overloaded("queue_full", QUEUE_RETRY_AFTER)
+
+        started = time.perf_counter()
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(
+            self._waiters,
+            (self._priorities[request_class], next(self._sequence), future),
+        )
+        try:
+            await asyncio.wait_for(future, self.max_wait)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if future.done() and not future.cancelled():
+                # Let in just as it gave up; hand the slot on
+                self._release()
+            if isinstance(e, asyncio.CancelledError):
+                raise
+            stats.shed_timeout += 1
+            raise Overloaded("queue_timeout", QUEUE_RETRY_AFTER) from None
+        stats.admitted += 1
+        stats.waits.append(time.perf_counter() - started)
+        return Slot(self)
+
+    def stats(self) -> dict:
+        return {
+            "max_running": self.max_running,
+            "max_queued": self.max_queued,
+            "running": self.running,
+            "queued": self.queued,
+            "classes": {name: stats.as_dict() for name, stats in self._stats.items()},
+        }
+
+    def _release(self):
+        """Pass a finished request's slot to the most urgent waiter"""
+        self.running -= 1
+        while self._waiters:
+            _, _, future = heapq.heappop(self._waiters)
+            if not future.done():
+                self.running += 1
+                future.set_result(None)
+                return
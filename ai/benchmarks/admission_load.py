@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+"""
+Load test of admission control against a stub Gemini API.
+
+Starts StubGemini (benchmarks/stub_gemini.py) with --first-token latency
+and runs the app with --max-runs slots and --max-queued queue places, in
+three phases:
+
+    priority  --chats /chat requests, then --streams /stream requests just
+              after: the streams are let in ahead of the queued chats
+    shed      --burst /chat requests at once: those beyond the slots and
+              the queue are turned away with 429 and Retry-After
+    rate      one client sends --client-burst + --over requests: the extra
+              ones are rate limited with 429, another client is not
+
+The test fails if the model ever serves more than --max-runs calls at once,
+streams wait longer than chats, or shedding and rate limiting turn away a
+different number of requests than expected.
+
+    python -m benchmarks.admission_load --max-runs 2 --max-queued 16
+    python -m benchmarks.admission_load --first-token 0.5 --burst 64 --json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from typing import Dict
+
+import httpx
+
+from benchmarks.stub_gemini import Latencies, StubGemini
+
+
+async def send(
+    client: httpx.AsyncClient, endpoint: str, prompt: str, client_id: str
+) -> Dict[str, object]:
+    started = time.perf_counter()
+    response = await client.post(
+        endpoint, json={"prompt": prompt}, headers={"X-Client-ID": client_id}
+    )
+    failed = response.status_code != 429 and (
+        response.status_code >= 400 or '"error"' in response.text[:200]
+    )
+    return {
+        "endpoint": endpoint,
+        "status": response.status_code,
+        "failed": failed,
+        "retry_after": response.headers.get("retry-after"),
+        "seconds": time.perf_counter() - started,
+    }
+
+
+async def priority_phase(client: httpx.AsyncClient, args) -> Dict[str, object]:
+    async def stream_later(index: int):
+        # Arrive once the chats hold every slot and queue place they can
+        await asyncio.sleep(0.02)
+        return await send(client, "/stream", f"priority stream {index}", f"s{index}")
+
+    args.stub.reset()
+    results = await asyncio.gather(
+        *(
+            send(client, "/chat", f"priority chat {index}", f"c{index}")
+            for index in range(args.chats)
+        ),
+        *(stream_later(index) for index in range(args.streams)),
+    )
+    classes = (await client.get("/admission")).json()["classes"]
+    streams = [r["seconds"] for r in results if r["endpoint"] == "/stream"]
+    chats = [r["seconds"] for r in results if r["endpoint"] == "/chat"]
+    return {
+        "requests": len(results),
+        "failed": sum(r["failed"] or r["status"] != 200 for r in results),
+        "stream_p50_wait_ms": classes["stream"]["p50_wait_ms"],
+        "chat_p50_wait_ms": classes["chat"]["p50_wait_ms"],
+        "stream_max_s": round(max(streams, default=0.0), 3),
+        "chat_max_s": round(max(chats, default=0.0), 3),
+        "upstream_peak": args.stub.max_in_flight,
+    }
+
+
+async def shed_phase(client: httpx.AsyncClient, args) -> Dict[str, object]:
+    args.stub.reset()
+    results = await asyncio.gather(
+        *(
+            send(client, "/chat", f"shed chat {index}", f"b{index}")
+            for index in range(args.burst)
+        )
+    )
+    shed = [r for r in results if r["status"] == 429]
+    return {
+        "requests": len(results),
+        "failed": sum(r["failed"] for r in results),
+        "served": sum(r["status"] == 200 for r in results),
+        "shed": len(shed),
+        "expected_shed": max(0, args.burst - args.max_runs - args.max_queued),
+        "retry_after": sorted({r["retry_after"] for r in shed}),
+        "upstream_peak": args.stub.max_in_flight,
+    }
+
+
+async def rate_phase(client: httpx.AsyncClient, args) -> Dict[str, object]:
+    results = []
+    for _ in range(args.client_burst + args.over):
+        results.append(await send(client, "/chat", "rate chat", "greedy"))
+    other = await send(client, "/chat", "rate chat", "polite")
+    return {
+        "requests": len(results),
+        "failed": sum(r["failed"] for r in results) + other["failed"],
+        "limited": sum(r["status"] == 429 for r in results),
+        "expected_limited": args.over,
+        "other_client_status": other["status"],
+    }
+
+
+async def run(args) -> Dict[str, object]:
+    import main
+
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://test", timeout=300
+    ) as client:
+        results = {
+            "priority": await priority_phase(client, args),
+            "shed": await shed_phase(client, args),
+            "rate": await rate_phase(client, args),
+        }
+        results["server"] = (await client.get("/admission")).json()
+    return results
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--max-runs", type=int, default=2)
+    parser.add_argument("--max-queued", type=int, default=16)
+    parser.add_argument("--chats", type=int, default=8)
+    parser.add_argument("--streams", type=int, default=4)
+    parser.add_argument("--burst", type=int, default=40)
+    parser.add_argument("--client-burst", type=int, default=5)
+    parser.add_argument("--over", type=int, default=5)
+    parser.add_argument("--first-token", type=float, default=0.2)
+    parser.add_argument("--token-latency", type=float, default=0.002)
+    parser.add_argument("--tokens", type=int, default=20)
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+
+    args.stub = StubGemini(Latencies(args.first_token, args.token_latency, args.tokens))
+    args.stub.start()
+    # main reads its configuration on import
+    os.environ.update(
+        GEMINI_BASE_URL=args.stub.base_url,
+        GOOGLE_API_KEY="stub",
+        MAX_CONCURRENT_RUNS=str(args.max_runs),
+        MAX_QUEUED_RUNS=str(args.max_queued),
+        MAX_QUEUE_WAIT="60",
+        # Slow enough that no token comes back during the rate phase
+        CLIENT_RATE_LIMIT="0.01",
+        CLIENT_BURST=str(args.client_burst),
+        # Each request names its client, as a gateway would
+        TRUST_CLIENT_ID_HEADER="true",
+        TOOL_CACHE_PATH="",
+        AGNO_TELEMETRY="false",
+    )
+    try:
+        results = asyncio.run(run(args))
+    finally:
+        args.stub.stop()
+
+    priority, shed, rate = results["priority"], results["shed"], results["rate"]
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print(
+            f"priority: {priority['requests']} requests, {priority['failed']} failed, "
+            f"queue wait p50 stream {priority['stream_p50_wait_ms']} ms "
+            f"chat {priority['chat_p50_wait_ms']} ms, slowest stream "
+            f"{priority['stream_max_s']}s chat {priority['chat_max_s']}s, "
+            f"upstream peak {priority['upstream_peak']}"
+        )
+        print(
+            f"shed: {shed['requests']} requests, {shed['served']} served, "
+            f"{shed['shed']} shed (expected {shed['expected_shed']}, Retry-After "
+            f"{', '.join(shed['retry_after']) or '-'}), {shed['failed']} failed, "
+            f"upstream peak {shed['upstream_peak']}"
+        )
+        print(
+            f"rate: {rate['requests']} requests from one client, {rate['limited']} "
+            f"limited (expected {rate['expected_limited']}), another client got "
+            f"{rate['other_client_status']}"
+        )
+        print(f"server: {json.dumps(results['server'])}")
+
+    failed = False
+    for name in ("priority", "shed", "rate"):
+        if results[name]["failed"]:
+            print(f"FAIL: {results[name]['failed']} {name} requests failed")
+            failed = True
+    for name in ("priority", "shed"):
+        if results[name]["upstream_peak"] > args.max_runs:
+            print(
+                f"FAIL: {name} ran {results[name]['upstream_peak']} model calls "
+                f"at once, over the cap of {args.max_runs}"
+            )
+            failed = True
+    if priority["stream_p50_wait_ms"] > priority["chat_p50_wait_ms"]:
+        print("FAIL: streams waited longer than chats")
+        failed = True
+    if shed["shed"] != shed["expected_shed"] or None in shed["retry_after"]:
+        print(f"FAIL: shed {shed['shed']} requests, expected {shed['expected_shed']}")
+        failed = True
+    if (
+        rate["limited"] != rate["expected_limited"]
+        or rate["other_client_status"] != 200
+    ):
+        print(
+            f"FAIL: limited {rate['limited']} requests, expected "
+            f"{rate['expected_limited']}, and none from another client"
+        )
+        failed = True
+    print("FAIL" if failed else "PASS")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main_cli()
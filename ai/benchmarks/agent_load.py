@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""
+Load test of /chat and /stream against a stub Gemini API.
+
+Starts StubGemini (benchmarks/stub_gemini.py), points the app at it and
+sends --prompts distinct prompts at each concurrency level, so the real
+agent, google-genai client and executor are exercised with a fixed model
+latency. Each level reports throughput, p50/p99 latency, the speedup over
+one prompt at a time and the most runs the stub served at once.
+
+Runs never block the event loop, so throughput should grow with
+concurrency up to MAX_CONCURRENT_RUNS and stay flat beyond it; the test
+fails if any level reaches less than --efficiency of that ideal.
+
+    python -m benchmarks.agent_load --prompts 32 --concurrency 1,4,16
+    python -m benchmarks.agent_load --max-runs 4 --first-token 0.2 --json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from typing import Dict, List
+
+import httpx
+
+from benchmarks.stub_gemini import Latencies, StubGemini
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+async def run_level(
+    client: httpx.AsyncClient,
+    stub: StubGemini,
+    endpoint: str,
+    prompts: int,
+    concurrency: int,
+) -> Dict[str, float]:
+    """Send ``prompts`` requests, ``concurrency`` at a time"""
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+    failures: List[str] = []
+
+    async def send(index: int):
+        async with semaphore:
+            started = time.perf_counter()
+            response = await client.post(
+                endpoint, json={"prompt": f"{endpoint} {concurrency} {index}"}
+            )
+            latencies.append(time.perf_counter() - started)
+            failed = response.status_code >= 400 or ('"error"' in response.text[:200])
+            if failed:
+                failures.append(f"{response.status_code} {response.text[:200]}")
+
+    stub.reset()
+    started = time.perf_counter()
+    await asyncio.gather(*(send(index) for index in range(prompts)))
+    elapsed = time.perf_counter() - started
+    for failure in failures[:5]:
+        print(f"  {endpoint} failed: {failure}", file=sys.stderr)
+    return {
+        "concurrency": concurrency,
+        "requests": prompts,
+        "failed": len(failures),
+        "seconds": round(elapsed, 3),
+        "req_per_s": round(prompts / elapsed, 2),
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 1),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 1),
+        "upstream_peak": stub.max_in_flight,
+    }
+
+
+async def run(args) -> Dict[str, List[Dict[str, float]]]:
+    import main
+
+    results: Dict[str, List[Dict[str, float]]] = {}
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://test", timeout=300
+    ) as client:
+        for endpoint in args.endpoints:
+            levels = []
+            for concurrency in args.concurrency:
+                level = await run_level(
+                    client, args.stub, endpoint, args.prompts, concurrency
+                )
+                level["speedup"] = (
+                    round(level["req_per_s"] / levels[0]["req_per_s"], 2)
+                    if levels
+                    else 1.0
+                )
+                levels.append(level)
+            results[endpoint] = levels
+    return results
+
+
+def print_table(results: Dict[str, List[Dict[str, float]]]):
+    print(
+        f"{'endpoint':<9} {'conc':>5} {'requests':>8} {'failed':>6} {'seconds':>8} "
+        f"{'req/s':>8} {'p50 ms':>8} {'p99 ms':>8} {'speedup':>8} {'peak':>5}"
+    )
+    for endpoint, levels in results.items():
+        for level in levels:
+            print(
+                f"{endpoint:<9} {level['concurrency']:>5} {level['requests']:>8} "
+                f"{level['failed']:>6} {level['seconds']:>8.3f} "
+                f"{level['req_per_s']:>8.2f} {level['p50_ms']:>8.1f} "
+                f"{level['p99_ms']:>8.1f} {level['speedup']:>8.2f} "
+                f"{level['upstream_peak']:>5}"
+            )
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--prompts", type=int, default=32)
+    parser.add_argument(
+        "--concurrency",
+        type=lambda value: [int(level) for level in value.split(",")],
+        default=[1, 2, 4, 8, 16],
+    )
+    parser.add_argument(
+        "--endpoints",
+        type=lambda value: value.split(","),
+        default=["/chat", "/stream"],
+    )
+    parser.add_argument("--max-runs", type=int, default=8)
+    parser.add_argument("--first-token", type=float, default=0.3)
+    parser.add_argument("--token-latency", type=float, default=0.005)
+    parser.add_argument("--tokens", type=int, default=20)
+    parser.add_argument(
+        "--efficiency",
+        type=float,
+        default=0.6,
+        help="fraction of the ideal speedup each level must reach",
+    )
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+
+    args.stub = StubGemini(Latencies(args.first_token, args.token_latency, args.tokens))
+    args.stub.start()
+    # main reads its configuration on import
+    os.environ.update(
+        GEMINI_BASE_URL=args.stub.base_url,
+        GOOGLE_API_KEY="stub",
+        MAX_CONCURRENT_RUNS=str(args.max_runs),
+        # Measure agent runs, not cache hits
+        RESPONSE_CACHE_TTL="0",
+        # One client sends every prompt
+        CLIENT_RATE_LIMIT="0",
+        MAX_QUEUED_RUNS=str(args.prompts),
+        TOOL_CACHE_PATH="",
+        AGNO_TELEMETRY="false",
+    )
+    try:
+        results = asyncio.run(run(args))
+    finally:
+        args.stub.stop()
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print_table(results)
+
+    failed = False
+    for endpoint, levels in results.items():
+        for level in levels:
+            ideal = min(level["concurrency"], args.max_runs) / min(
+                args.concurrency[0], args.max_runs
+            )
+            if level["failed"]:
+                print(f"FAIL: {endpoint} had {level['failed']} failed requests")
+                failed = True
+            elif level["speedup"] < ideal * args.efficiency:
+                print(
+                    f"FAIL: {endpoint} at concurrency {level['concurrency']} "
+                    f"sped up {level['speedup']}x, expected about {ideal:g}x"
+                )
+                failed = True
+            if level["upstream_peak"] > args.max_runs:
+                print(
+                    f"FAIL: {endpoint} ran {level['upstream_peak']} model calls "
+                    f"at once, over the cap of {args.max_runs}"
+                )
+                failed = True
+    print("FAIL" if failed else "PASS")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,278 @@
+#!/usr/bin/env python3
+"""
+Load test of /stream framing and disconnects against stub Gemini and
+Wikipedia APIs.
+
+Serves the app with uvicorn on a local port, so responses are read as they
+are written, with StubGemini calling WikipediaTools once per prompt and
+then streaming --tokens chunks. After a round of warm-up requests, two
+phases:
+
+    stream      --prompts prompts read to the end: frames, heartbeats and
+                tool events per response, and time to first frame
+    disconnect  --disconnects prompts dropped after their first content:
+                how soon the model stream stops and how many chunks it sent
+
+The test fails if responses take more than one frame per --min-tokens-per-frame
+tokens, no heartbeat arrives during a tool call longer than the heartbeat
+interval, or a dropped run keeps streaming longer than --stop-within.
+
+    python -m benchmarks.stream_load --prompts 16 --tokens 400
+    python -m benchmarks.stream_load --flush-interval 0.1 --heartbeat 0.5 --json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import socket
+import sys
+import threading
+import time
+from typing import Dict, List
+
+import httpx
+
+from benchmarks.agent_load import percentile
+from benchmarks.stub_gemini import Latencies, StubGemini
+from benchmarks.stub_wikipedia import StubWikipedia
+
+
+async def read_stream(client: httpx.AsyncClient, prompt: str) -> Dict[str, float]:
+    """Read one /stream response to its end"""
+    counts = {"frames": 0, "content": 0, "heartbeats": 0, "tool_events": 0}
+    started = time.perf_counter()
+    first_frame = None
+    ended = False
+    async with client.stream("POST", "/stream", json={"prompt": prompt}) as response:
+        async for line in response.aiter_lines():
+            if line.startswith(":"):
+                counts["heartbeats"] += 1
+            elif line.startswith("data: "):
+                if first_frame is None:
+                    first_frame = time.perf_counter() - started
+                event = json.loads(line[len("data: ") :])
+                counts["frames"] += 1
+                if event["type"] == "content":
+                    counts["content"] += 1
+                elif event["type"] == "tool_call":
+                    counts["tool_events"] += 1
+                elif event["type"] == "end":
+                    ended = True
+                elif event["type"] == "error":
+                    raise RuntimeError(event["error"])
+    if not ended:
+        raise RuntimeError("stream closed before its end frame")
+    return {**counts, "ttfb": first_frame or 0.0}
+
+
+async def drop_stream(client: httpx.AsyncClient, prompt: str):
+    """Read one /stream response until its first content, then hang up"""
+    async with client.stream("POST", "/stream", json={"prompt": prompt}) as response:
+        async for line in response.aiter_lines():
+            if line.startswith("data: ") and '"content"' in line:
+                return
+
+
+async def stream_phase(client: httpx.AsyncClient, args) -> Dict[str, float]:
+    semaphore = asyncio.Semaphore(args.concurrency)
+    results: List[Dict[str, float]] = []
+    failures: List[str] = []
+
+    async def send(index: int):
+        async with semaphore:
+            try:
+                results.append(await read_stream(client, f"topic{index} stream"))
+            except Exception as e:
+                failures.append(str(e))
+
+    args.gemini.reset()
+    started = time.perf_counter()
+    await asyncio.gather(*(send(index) for index in range(args.prompts)))
+    elapsed = time.perf_counter() - started
+    for failure in failures[:5]:
+        print(f"  stream failed: {failure}", file=sys.stderr)
+    count = max(len(results), 1)
+    return {
+        "requests": args.prompts,
+        "failed": len(failures),
+        "seconds": round(elapsed, 3),
+        "tokens_per_response": args.tokens,
+        "frames_per_response": round(sum(r["frames"] for r in results) / count, 2),
+        "content_frames_per_response": round(
+            sum(r["content"] for r in results) / count, 2
+        ),
+        "heartbeats_per_response": round(
+            sum(r["heartbeats"] for r in results) / count, 2
+        ),
+        "tool_events_per_response": round(
+            sum(r["tool_events"] for r in results) / count, 2
+        ),
+        "p50_ttfb_ms": round(percentile([r["ttfb"] for r in results], 0.5) * 1000, 1),
+        "p99_ttfb_ms": round(percentile([r["ttfb"] for r in results], 0.99) * 1000, 1),
+    }
+
+
+async def disconnect_phase(client: httpx.AsyncClient, args) -> Dict[str, float]:
+    args.gemini.reset()
+    await asyncio.gather(
+        *(
+            drop_stream(client, f"topic{index} disconnect")
+            for index in range(args.disconnects)
+        )
+    )
+    dropped = time.perf_counter()
+    while args.gemini.in_flight and time.perf_counter() - dropped < 30:
+        await asyncio.sleep(0.005)
+    stopped = time.perf_counter() - dropped
+    return {
+        "requests": args.disconnects,
+        "stop_ms": round(stopped * 1000, 1),
+        "chunks_sent": args.gemini.chunks,
+        "chunks_requested": args.disconnects * args.tokens,
+    }
+
+
+def serve(app) -> tuple:
+    """Run ``app`` with uvicorn on a free local port, in a thread"""
+    import uvicorn
+
+    sock = socket.socket()
+    sock.bind(("127.0.0.1", 0))
+    server = uvicorn.Server(uvicorn.Config(app, log_level="warning"))
+    thread = threading.Thread(
+        target=server.run, kwargs={"sockets": [sock]}, daemon=True
+    )
+    thread.start()
+    while not server.started:
+        time.sleep(0.01)
+    host, port = sock.getsockname()
+    return server, thread, f"http://{host}:{port}"
+
+
+async def run(base_url: str, args) -> Dict[str, object]:
+    async with httpx.AsyncClient(base_url=base_url, timeout=300) as client:
+        # Start the worker threads and model connections first
+        await asyncio.gather(
+            *(
+                read_stream(client, f"topic{index} warmup")
+                for index in range(args.concurrency)
+            )
+        )
+        stream = await stream_phase(client, args)
+        disconnect = await disconnect_phase(client, args)
+        server = (await client.get("/streams")).json()
+    return {"stream": stream, "disconnect": disconnect, "server": server}
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--prompts", type=int, default=16)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--disconnects", type=int, default=4)
+    parser.add_argument("--first-token", type=float, default=0.1)
+    parser.add_argument("--token-latency", type=float, default=0.004)
+    parser.add_argument("--tokens", type=int, default=400)
+    parser.add_argument(
+        "--wikipedia-latency",
+        type=float,
+        default=0.3,
+        help="seconds per Wikipedia API request; a lookup makes three",
+    )
+    parser.add_argument("--flush-interval", type=float, default=0.05)
+    parser.add_argument("--flush-bytes", type=int, default=1024)
+    parser.add_argument("--heartbeat", type=float, default=0.5)
+    parser.add_argument("--min-tokens-per-frame", type=float, default=4)
+    parser.add_argument(
+        "--stop-within",
+        type=float,
+        default=0.5,
+        help="seconds a dropped run may keep streaming from the model",
+    )
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+
+    args.gemini = StubGemini(
+        Latencies(args.first_token, args.token_latency, args.tokens), tool_calls=True
+    )
+    args.wikipedia = StubWikipedia(args.wikipedia_latency)
+    args.gemini.start()
+    args.wikipedia.start()
+    # main reads its configuration on import
+    os.environ.update(
+        GEMINI_BASE_URL=args.gemini.base_url,
+        WIKIPEDIA_API_URL=args.wikipedia.api_url,
+        GOOGLE_API_KEY="stub",
+        MAX_CONCURRENT_RUNS=str(args.concurrency),
+        # Every prompt must reach the model and its tool
+        RESPONSE_CACHE_TTL="0",
+        # One client sends every prompt
+        CLIENT_RATE_LIMIT="0",
+        TOOL_CACHE_TTL="0",
+        TOOL_CACHE_PATH="",
+        STREAM_FLUSH_INTERVAL=str(args.flush_interval),
+        STREAM_FLUSH_BYTES=str(args.flush_bytes),
+        STREAM_HEARTBEAT_INTERVAL=str(args.heartbeat),
+        AGNO_TELEMETRY="false",
+    )
+    import main
+
+    server, thread, base_url = serve(main.app)
+    try:
+        results = asyncio.run(run(base_url, args))
+    finally:
+        server.should_exit = True
+        thread.join(timeout=10)
+        args.gemini.stop()
+        args.wikipedia.stop()
+
+    stream, disconnect = results["stream"], results["disconnect"]
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print(
+            f"stream: {stream['requests']} responses, {stream['failed']} failed, "
+            f"{stream['tokens_per_response']} tokens in "
+            f"{stream['frames_per_response']} frames "
+            f"({stream['content_frames_per_response']} content, "
+            f"{stream['tool_events_per_response']} tool events) "
+            f"and {stream['heartbeats_per_response']} heartbeats per response, "
+            f"time to first frame p50 {stream['p50_ttfb_ms']} ms "
+            f"p99 {stream['p99_ttfb_ms']} ms"
+        )
+        print(
+            f"disconnect: {disconnect['requests']} dropped, model streams stopped "
+            f"after {disconnect['stop_ms']} ms, {disconnect['chunks_sent']} of "
+            f"{disconnect['chunks_requested']} chunks sent"
+        )
+        print(f"server: {json.dumps(results['server'])}")
+
+    failed = False
+    tool_seconds = 3 * args.wikipedia_latency
+    if stream["failed"]:
+        print(f"FAIL: {stream['failed']} streams failed")
+        failed = True
+    if stream["content_frames_per_response"] * args.min_tokens_per_frame > args.tokens:
+        print(
+            f"FAIL: {stream['content_frames_per_response']} content frames "
+            f"for {args.tokens} tokens"
+        )
+        failed = True
+    if stream["tool_events_per_response"] < 2:
+        print("FAIL: tool calls were not reported")
+        failed = True
+    if tool_seconds > args.heartbeat * 1.5 and not stream["heartbeats_per_response"]:
+        print(f"FAIL: no heartbeat during {tool_seconds:g}s tool calls")
+        failed = True
+    if disconnect["stop_ms"] > args.stop_within * 1000:
+        print(
+            f"FAIL: dropped runs kept streaming for {disconnect['stop_ms']} ms, "
+            f"over {args.stop_within}s"
+        )
+        failed = True
+    print("FAIL" if failed else "PASS")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main_cli()
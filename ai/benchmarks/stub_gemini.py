@@ -0,0 +1,209 @@
+"""
+Local stub of the Gemini API for offline benchmarks.
+
+StubGemini serves ``generateContent`` and ``streamGenerateContent`` (SSE)
+on a local TCP socket, so the real google-genai client and agno's Gemini
+model are exercised without a network or an API key. Each response waits
+``first_token`` seconds, then emits ``tokens`` chunks ``token`` seconds
+apart; the text is derived from the prompt, so equal prompts get equal
+answers. The stub counts calls and the most it served at once.
+
+With ``tool_calls`` set, the first response to a request that declares
+tools is a call of the first one, every argument set to the prompt's first
+word; once the request carries the tool's result the stub answers as usual.
+
+    stub = StubGemini(Latencies(first_token=0.5))
+    stub.start()
+    os.environ["GEMINI_BASE_URL"] = stub.base_url
+"""
+
+import json
+import threading
+import time
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Iterable, List, Optional
+
+
+@dataclass
+class Latencies:
+    first_token: float = 0.5  # from request until the first chunk
+    token: float = 0.01  # between chunks
+    tokens: int = 20  # chunks per response
+
+
+class StubGemini:
+    def __init__(self, latencies: Optional[Latencies] = None, tool_calls: bool = False):
+        self.latencies = latencies or Latencies()
+        self.tool_calls = tool_calls
+        self.calls = 0
+        # Streamed chunks sent, to count tokens spent on a stopped stream
+        self.chunks = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+        self._server.daemon_threads = True
+        self._server.stub = self
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, name="stub-gemini", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def reset(self):
+        with self._lock:
+            self.calls = 0
+            self.chunks = 0
+            self.max_in_flight = self.in_flight
+
+    def begin(self):
+        with self._lock:
+            self.calls += 1
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+
+    def sent(self):
+        with self._lock:
+            self.chunks += 1
+
+    def end(self):
+        with self._lock:
+            self.in_flight -= 1
+
+    def answer(self, body: dict) -> List[str]:
+        """Response text, in chunks, for the request's last user message"""
+        words = _prompt(body).split() or ["empty"]
+        return [
+            f"{words[index % len(words)]} " for index in range(self.latencies.tokens)
+        ]
+
+    def tool_call(self, body: dict) -> Optional[dict]:
+        """A functionCall part, if the request is due one"""
+        if not self.tool_calls:
+            return None
+        declarations = [
+            declaration
+            for tool in body.get("tools") or []
+            for declaration in tool.get("functionDeclarations") or []
+        ]
+        answered = any(
+            "functionResponse" in part
+            for content in body.get("contents") or []
+            for part in content.get("parts") or []
+        )
+        if not declarations or answered:
+            return None
+        declaration = declarations[0]
+        properties = (declaration.get("parameters") or {}).get("properties") or {}
+        topic = (_prompt(body).split() or ["empty"])[0]
+        return {
+            "functionCall": {
+                "name": declaration["name"],
+                "args": {name: topic for name in properties},
+            }
+        }
+
+
+def _prompt(body: dict) -> str:
+    prompt = ""
+    for content in body.get("contents") or []:
+        for part in content.get("parts") or []:
+            if "text" in part:
+                prompt = part["text"]
+    return prompt
+
+
+def _chunk(text: str, model: str, final: bool, part: Optional[dict] = None) -> dict:
+    candidate = {
+        "content": {"role": "model", "parts": [part or {"text": text}]},
+        "index": 0,
+    }
+    chunk = {"candidates": [candidate], "modelVersion": model}
+    if final:
+        candidate["finishReason"] = "STOP"
+        chunk["usageMetadata"] = {
+            "promptTokenCount": 10,
+            "candidatesTokenCount": 20,
+            "totalTokenCount": 30,
+        }
+    return chunk
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        stub: StubGemini = self.server.stub
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+        path = self.path.split("?", 1)[0]
+        model, _, method = path.rsplit("/", 1)[-1].partition(":")
+        if method not in ("generateContent", "streamGenerateContent"):
+            self.send_error(404)
+            return
+
+        stub.begin()
+        try:
+            latencies = stub.latencies
+            call = stub.tool_call(body)
+            chunks = stub.answer(body)
+            time.sleep(latencies.first_token)
+            if call is not None:
+                chunk = _chunk("", model, final=True, part=call)
+                if method == "generateContent":
+                    self._send_json(chunk)
+                else:
+                    self._send_events([chunk])
+                return
+            if method == "generateContent":
+                time.sleep(latencies.token * (len(chunks) - 1))
+                self._send_json(_chunk("".join(chunks), model, final=True))
+                return
+
+            self._send_events(
+                _chunk(text, model, index == len(chunks) - 1)
+                for index, text in enumerate(chunks)
+            )
+        except OSError:
+            pass
+        finally:
+            stub.end()
+
+    def _send_json(self, payload: dict):
+        data = json.dumps(payload).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _send_events(self, chunks: Iterable[dict]):
+        """Stream ``chunks`` as SSE, ``token`` seconds apart"""
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        for index, chunk in enumerate(chunks):
+            if index:
+                time.sleep(self.server.stub.latencies.token)
+            self._write_chunk(f"data: {json.dumps(chunk)}\r\n\r\n".encode())
+            self.server.stub.sent()
+        self._write_chunk(b"")
+
+    def _write_chunk(self, data: bytes):
+        self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+        self.wfile.flush()
@@ -0,0 +1,97 @@
+"""
+Local stub of the MediaWiki API for offline benchmarks.
+
+StubWikipedia answers the searches, page loads and extract queries the
+``wikipedia`` package makes for ``wikipedia.summary``, so WikipediaTools
+runs unchanged without a network. Every request waits ``latency`` seconds;
+every title exists, and its summary is derived from the title. The stub
+counts requests and summaries served.
+
+    stub = StubWikipedia(latency=0.1)
+    stub.start()
+    os.environ["WIKIPEDIA_API_URL"] = stub.api_url
+"""
+
+import json
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+from urllib.parse import parse_qs, urlsplit
+
+
+class StubWikipedia:
+    def __init__(self, latency: float = 0.1):
+        self.latency = latency
+        self.requests = 0
+        self.summaries = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+        self._server.daemon_threads = True
+        self._server.stub = self
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def api_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/w/api.php"
+
+    def start(self):
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, name="stub-wikipedia", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def reset(self):
+        with self._lock:
+            self.requests = 0
+            self.summaries = 0
+
+    def respond(self, params: dict) -> dict:
+        """API response for one request's query parameters"""
+        with self._lock:
+            self.requests += 1
+        if params.get("list") == "search":
+            return {"query": {"search": [{"title": params["srsearch"]}]}}
+
+        title = params["titles"]
+        pageid = str(zlib.crc32(title.encode()))
+        if params.get("prop") == "extracts":
+            with self._lock:
+                self.summaries += 1
+            extract = f"{title} is the subject of this stub article."
+            return {"query": {"pages": {pageid: {"extract": extract}}}}
+        page = {
+            "pageid": int(pageid),
+            "title": title,
+            "fullurl": f"https://en.wikipedia.org/wiki/{title}",
+        }
+        return {"query": {"pages": {pageid: page}}}
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        stub: StubWikipedia = self.server.stub
+        params = {
+            name: values[0]
+            for name, values in parse_qs(
+                urlsplit(self.path).query, keep_blank_values=True
+            ).items()
+        }
+        time.sleep(stub.latency)
+        data = json.dumps(stub.respond(params)).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
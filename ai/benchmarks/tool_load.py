@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+Load test of the tool cache against stub Gemini and Wikipedia APIs.
+
+Starts StubGemini in tool-calling mode and StubWikipedia
+(benchmarks/stub_wikipedia.py), so every prompt makes the real agent call
+WikipediaTools once for the prompt's topic. --prompts prompts spread over
+--topics topics are sent three times:
+
+    cold     empty cache: each topic is looked up once, however many
+             prompts ask for it at the same time
+    warm     every lookup is served from memory
+    restart  memory cleared, every lookup is served from the cache file
+
+Each phase reports throughput, p50 latency, lookups that reached Wikipedia
+and the tool hit ratio; the test fails if a phase looks up more than that.
+
+    python -m benchmarks.tool_load --prompts 32 --topics 4 --concurrency 8
+    python -m benchmarks.tool_load --wikipedia-latency 0.3 --json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+from typing import Dict, List
+
+import httpx
+
+from benchmarks.agent_load import percentile
+from benchmarks.stub_gemini import Latencies, StubGemini
+from benchmarks.stub_wikipedia import StubWikipedia
+
+TOOL = "search_wikipedia"
+
+
+async def run_phase(client: httpx.AsyncClient, args, phase: str) -> Dict[str, float]:
+    """Send every prompt, ``args.concurrency`` at a time"""
+    semaphore = asyncio.Semaphore(args.concurrency)
+    latencies: List[float] = []
+    failures: List[str] = []
+
+    async def send(index: int):
+        # The stub model looks up the prompt's first word
+        prompt = f"topic{index % args.topics} {phase} question {index}"
+        async with semaphore:
+            started = time.perf_counter()
+            response = await client.post(args.endpoint, json={"prompt": prompt})
+            latencies.append(time.perf_counter() - started)
+            failed = response.status_code >= 400 or (
+                '"type": "error"' in response.text
+                if args.endpoint == "/stream"
+                else "error" in response.json()
+            )
+            if failed:
+                failures.append(f"{response.status_code} {response.text[:200]}")
+
+    before = (await client.get("/cache")).json()["tools"].get(TOOL, {})
+    args.wikipedia.reset()
+    started = time.perf_counter()
+    await asyncio.gather(*(send(index) for index in range(args.prompts)))
+    elapsed = time.perf_counter() - started
+    after = (await client.get("/cache")).json()["tools"][TOOL]
+    for failure in failures[:5]:
+        print(f"  {phase} failed: {failure}", file=sys.stderr)
+
+    calls = after["calls"] - before.get("calls", 0)
+    served = (
+        after["hits"]
+        + after["coalesced"]
+        - before.get("hits", 0)
+        - before.get("coalesced", 0)
+    )
+    return {
+        "phase": phase,
+        "requests": args.prompts,
+        "failed": len(failures),
+        "seconds": round(elapsed, 3),
+        "req_per_s": round(args.prompts / elapsed, 2),
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 1),
+        "tool_calls": calls,
+        "lookups": args.wikipedia.summaries,
+        "hit_ratio": round(served / calls, 4) if calls else 0.0,
+    }
+
+
+async def run(args) -> Dict[str, object]:
+    import main
+    from cache import DiskStore, TTLCache
+    from wikipedia import wikipedia as wikipedia_api
+
+    phases = []
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://test", timeout=300
+    ) as client:
+        for phase in ("cold", "warm", "restart"):
+            if phase == "restart":
+                # A new process: nothing in memory, the cache file kept
+                main.tool_cache.cache = TTLCache(
+                    main.tool_cache_ttl,
+                    main.tool_cache_size,
+                    DiskStore(main.tool_cache_path),
+                )
+                wikipedia_api.search.clear_cache()
+                wikipedia_api.summary.clear_cache()
+            phases.append(await run_phase(client, args, phase))
+        tools = (await client.get("/cache")).json()["tools"]
+    return {"phases": phases, "tools": tools}
+
+
+def print_table(results: Dict[str, object]):
+    print(
+        f"{'phase':<8} {'requests':>8} {'failed':>6} {'seconds':>8} {'req/s':>8} "
+        f"{'p50 ms':>8} {'calls':>6} {'lookups':>7} {'hit ratio':>9}"
+    )
+    for phase in results["phases"]:
+        print(
+            f"{phase['phase']:<8} {phase['requests']:>8} {phase['failed']:>6} "
+            f"{phase['seconds']:>8.3f} {phase['req_per_s']:>8.2f} "
+            f"{phase['p50_ms']:>8.1f} {phase['tool_calls']:>6} "
+            f"{phase['lookups']:>7} {phase['hit_ratio']:>9.2f}"
+        )
+    for name, stats in results["tools"].items():
+        print(
+            f"{name}: {stats['calls']} calls, hit ratio {stats['hit_ratio']:.2f}, "
+            f"hits {stats['avg_hit_ms']:.2f} ms, misses {stats['avg_miss_ms']:.1f} ms "
+            f"(max {stats['max_miss_ms']:.1f} ms)"
+        )
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--prompts", type=int, default=32)
+    parser.add_argument("--topics", type=int, default=4)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--endpoint", default="/chat")
+    parser.add_argument("--first-token", type=float, default=0.05)
+    parser.add_argument(
+        "--wikipedia-latency",
+        type=float,
+        default=0.1,
+        help="seconds per Wikipedia API request; a lookup makes three",
+    )
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+
+    args.gemini = StubGemini(Latencies(args.first_token, 0.0, 5), tool_calls=True)
+    args.wikipedia = StubWikipedia(args.wikipedia_latency)
+    args.gemini.start()
+    args.wikipedia.start()
+    cache_dir = tempfile.TemporaryDirectory()
+    # main reads its configuration on import
+    os.environ.update(
+        GEMINI_BASE_URL=args.gemini.base_url,
+        WIKIPEDIA_API_URL=args.wikipedia.api_url,
+        GOOGLE_API_KEY="stub",
+        MAX_CONCURRENT_RUNS=str(args.concurrency),
+        # Every prompt must reach the agent and its tools
+        RESPONSE_CACHE_TTL="0",
+        # One client sends every prompt
+        CLIENT_RATE_LIMIT="0",
+        TOOL_CACHE_PATH=os.path.join(cache_dir.name, "tool_cache.db"),
+        AGNO_TELEMETRY="false",
+    )
+    try:
+        results = asyncio.run(run(args))
+    finally:
+        args.gemini.stop()
+        args.wikipedia.stop()
+        cache_dir.cleanup()
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print_table(results)
+
+    failed = False
+    expected = {"cold": min(args.topics, args.prompts), "warm": 0, "restart": 0}
+    for phase in results["phases"]:
+        if phase["failed"]:
+            print(f"FAIL: {phase['phase']} had {phase['failed']} failed requests")
+            failed = True
+        if phase["tool_calls"] != phase["requests"]:
+            print(
+                f"FAIL: {phase['phase']} made {phase['tool_calls']} tool calls "
+                f"for {phase['requests']} prompts"
+            )
+            failed = True
+        if phase["lookups"] > expected[phase["phase"]]:
+            print(
+                f"FAIL: {phase['phase']} looked up {phase['lookups']} articles, "
+                f"expected at most {expected[phase['phase']]}"
+            )
+            failed = True
+    print("FAIL" if failed else "PASS")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,197 @@
+import asyncio
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, AsyncIterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_prompt(prompt: str) -> str:
+    """Prompt with case and runs of whitespace folded"""
+    return " ".join(prompt.split()).casefold()
+
+
+def cache_key(*parts: Any) -> str:
+    """Stable key for JSON-serialisable parts"""
+    encoded = json.dumps(parts, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(encoded.encode()).hexdigest()
+
+
+class DiskStore:
+    """Key-value SQLite file whose entries expire
+
+    Values are JSON. Expired entries are skipped on read and purged on open.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS entries "
+            "(key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+        )
+        self.purge()
+
+    def get(self, key: str) -> Optional[Tuple[Any, float]]:
+        """Value and expiry time of a live entry"""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT value, expires_at FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None or row[1] <= time.time():
+            return None
+        return json.loads(row[0]), row[1]
+
+    def put(self, key: str, value: Any, expires_at: float):
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO entries VALUES (?, ?, ?)",
+                (key, json.dumps(value), expires_at),
+            )
+            self._db.commit()
+
+    def purge(self):
+        """Delete expired entries"""
+        with self._lock:
+            self._db.execute(
+                "DELETE FROM entries WHERE expires_at <= ?", (time.time(),)
+            )
+            self._db.commit()
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+class TTLCache:
+    """In-memory LRU cache whose entries expire after ``ttl`` seconds
+
+    At most ``max_entries`` are kept in memory, least recently used first
+    out. With a ``store`` every entry is also written through to disk, and
+    memory misses are looked up there, so entries outlive the process. A
+    ``ttl`` of 0 disables the cache.
+    """
+
+    def __init__(self, ttl: float, max_entries: int, store: Optional[DiskStore] = None):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.store = store
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, Tuple[Any, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0 and self.max_entries > 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> Optional[Any]:
+        if not self.enabled:
+            return None
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] <= now:
+                del self._entries[key]
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(key)
+        if entry is None and self.store is not None:
+            try:
+                entry = self.store.get(key)
+            except sqlite3.Error as e:
+                logger.error(f"Cache store lookup failed: {e}")
+            if entry is not None:
+                self._remember(key, entry)
+        # Tool lookups run on worker threads; count under the lock
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        return entry[0]
+
+    def put(self, key: str, value: Any):
+        if not self.enabled:
+            return
+        expires_at = time.time() + self.ttl
+        self._remember(key, (value, expires_at))
+        if self.store is not None:
+            try:
+                self.store.put(key, value, expires_at)
+            except sqlite3.Error as e:
+                logger.error(f"Cache store write failed: {e}")
+
+    def stats(self) -> dict:
+        with self._lock:
+            hits, misses, entries = self.hits, self.misses, len(self._entries)
+        lookups = hits + misses
+        return {
+            "enabled": self.enabled,
+            "entries": entries,
+            "hits": hits,
+            "misses": misses,
+            "hit_ratio": round(hits / lookups, 4) if lookups else 0.0,
+        }
+
+    def _remember(self, key: str, entry: Tuple[Any, float]):
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+class Flight:
+    """One upstream run whose output every caller asking the same thing shares
+
+    The run publishes content chunks, and any progress events, as they
+    arrive; each follower gets every one from the first, however late it
+    joined.
+    """
+
+    def __init__(self):
+        self.chunks: List[Any] = []
+        # Callers reading the run, counted from their first read until they stop
+        self.followers = 0
+        self.done = False
+        self.error: Optional[BaseException] = None
+        self.task: Optional[asyncio.Task] = None
+        self._changed = asyncio.Event()
+
+    def publish(self, chunk: Any):
+        self.chunks.append(chunk)
+        self._notify()
+
+    def finish(self, error: Optional[BaseException] = None):
+        self.done = True
+        self.error = error
+        self._notify()
+
+    async def follow(self) -> AsyncIterator[Any]:
+        index = 0
+        while True:
+            while index < len(self.chunks):
+                yield self.chunks[index]
+                index += 1
+            if self.done:
+                if self.error is not None:
+                    raise self.error
+                return
+            await self._changed.wait()
+
+    def _notify(self):
+        """Wake every follower"""
+        self._changed.set()
+        self._changed = asyncio.Event()
@@ -1,14 +1,32 @@
+import asyncio
+import math
 import os
-from fastapi import FastAPI, Request
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import aclosing
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.responses import StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from agno.agent import Agent, RunResponse, RunResponseEvent
 from agno.models.google import Gemini
+from agno.run.base import RunStatus
 from dotenv import load_dotenv
-from typing import Iterator
-import json
+from google import genai
+from google.genai import types
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional
+from admission import Admission, Overloaded, RateLimiter, Slot
+from cache import DiskStore, Flight, TTLCache, cache_key, normalize_prompt
+from streaming import (
+    AbortableStream,
+    AbortableTransport,
+    StreamStats,
+    frames,
+    sse,
+)
+from tools import ToolCache
 from agno.tools.duckduckgo import DuckDuckGoTools
 from agno.tools.wikipedia import WikipediaTools
+from wikipedia import wikipedia as wikipedia_api
 
 load_dotenv()
 
@@ -23,31 +41,305 @@ app.add_middleware(
 
 
 api_key = os.getenv("GOOGLE_API_KEY")
-agent = Agent(
-    model=Gemini(id="gemini-2.0-flash-exp", api_key=api_key),
-    markdown=True,
-    tools=[WikipediaTools()],
-    show_tool_calls=True,
+model_id = os.getenv("GEMINI_MODEL", "gemini-2.0-flash-exp")
+# Alternative Gemini API endpoint, e.g. a proxy or benchmarks/stub_gemini.py
+base_url = os.getenv("GEMINI_BASE_URL")
+# Agent runs in flight at once; further requests wait for a free slot
+max_concurrent_runs = int(os.getenv("MAX_CONCURRENT_RUNS", "8"))
+# Requests waiting for a slot; beyond either limit they are turned away with 429
+max_queued_runs = int(os.getenv("MAX_QUEUED_RUNS", "64"))
+max_queue_wait = float(os.getenv("MAX_QUEUE_WAIT", "30"))
+# Requests a second per client, in bursts of up to CLIENT_BURST; 0 disables
+client_rate_limit = float(os.getenv("CLIENT_RATE_LIMIT", "2"))
+client_burst = float(os.getenv("CLIENT_BURST", "20"))
+# Only a gateway in front of the service may name clients with X-Client-ID;
+# otherwise any caller could dodge its rate limit by changing the header
+trust_client_id_header = os.getenv("TRUST_CLIENT_ID_HEADER", "").lower() == "true"
+# Responses are reused for identical prompts; a TTL of 0 disables the cache
+response_cache_ttl = float(os.getenv("RESPONSE_CACHE_TTL", "3600"))
+response_cache_size = int(os.getenv("RESPONSE_CACHE_SIZE", "1024"))
+# SQLite file keeping cached responses across restarts
+response_cache_path = os.getenv("RESPONSE_CACHE_PATH")
+# Tool results are reused across runs; a TTL of 0 disables the cache
+tool_cache_ttl = float(os.getenv("TOOL_CACHE_TTL", "86400"))
+tool_cache_size = int(os.getenv("TOOL_CACHE_SIZE", "4096"))
+# SQLite file keeping tool results across restarts; empty keeps them in memory
+tool_cache_path = os.getenv("TOOL_CACHE_PATH", "tool_cache.db")
+# Streamed content is sent once this many seconds or bytes have gathered
+stream_flush_interval = float(os.getenv("STREAM_FLUSH_INTERVAL", "0.05"))
+stream_flush_bytes = int(os.getenv("STREAM_FLUSH_BYTES", "1024"))
+# Seconds without a frame, e.g. while a tool runs, before a heartbeat comment
+stream_heartbeat_interval = float(os.getenv("STREAM_HEARTBEAT_INTERVAL", "15"))
+# Alternative MediaWiki API endpoint, e.g. benchmarks/stub_wikipedia.py
+wikipedia_api_url = os.getenv("WIKIPEDIA_API_URL")
+if wikipedia_api_url:
+    wikipedia_api.API_URL = wikipedia_api_url
+
+# Interactive /stream runs are let in ahead of /chat
+admission = Admission(
+    max_concurrent_runs, max_queued_runs, max_queue_wait, ("stream", "chat")
 )
+rate_limiter = RateLimiter(client_rate_limit, client_burst)
+run_executor = ThreadPoolExecutor(max_concurrent_runs, thread_name_prefix="agent-run")
+# Model requests of streamed runs, so a cancelled run can cut off its stream
+model_transport = AbortableTransport()
+response_cache = TTLCache(
+    response_cache_ttl,
+    response_cache_size,
+    DiskStore(response_cache_path) if response_cache_path else None,
+)
+tool_cache = ToolCache(
+    TTLCache(
+        tool_cache_ttl,
+        tool_cache_size,
+        DiskStore(tool_cache_path) if tool_cache_path and tool_cache_ttl > 0 else None,
+    )
+)
+# Runs in progress by cache key, joined by identical requests
+flights: Dict[str, Flight] = {}
+coalesced = 0
+# Runs stopped because every client waiting for them disconnected
+cancelled_runs = 0
+stream_stats = StreamStats()
+# Everything besides the prompt that shapes a response
+agent_config = {"model": model_id, "tools": ["wikipedia"], "markdown": True}
+_client: Optional[genai.Client] = None
+_done = object()
 
 
-def stream_agent_response(prompt: str) -> Iterator[str]:
-    """Stream agent responses as Server-Sent Events"""
-    try:
-        response_stream: Iterator[RunResponseEvent] = agent.run(
-            prompt, stream=True, stream_intermediate_steps=True
+def get_client() -> genai.Client:
+    """Gemini API client shared by every run, so connections are pooled"""
+    global _client
+    if _client is None:
+        _client = genai.Client(
+            api_key=api_key,
+            http_options=types.HttpOptions(
+                base_url=base_url, client_args={"transport": model_transport}
+            ),
         )
+    return _client
+
+
+def create_agent() -> Agent:
+    """A new agent for one run
+
+    An Agent keeps the state of its current run on itself, so concurrent
+    requests must not share one. The model client behind it and the
+    results of its tools are shared.
+    """
+    return Agent(
+        model=Gemini(id=model_id, client=get_client()),
+        markdown=True,
+        tools=[tool_cache.wrap(WikipediaTools())],
+        show_tool_calls=True,
+    )
+
+
+async def run_agent_stream(prompt: str) -> AsyncIterator[RunResponseEvent]:
+    """Stream a run's events from a worker thread into the event loop
+
+    google-genai's async streaming requires aiohttp, which is not installed,
+    so streamed runs use the synchronous client on ``run_executor``. Closing
+    the iterator stops the run at its next event, and cuts off the model
+    stream the worker is reading so a stalled upstream cannot hold it.
+    """
+    loop = asyncio.get_running_loop()
+    events: asyncio.Queue = asyncio.Queue()
+    stopped = threading.Event()
+    streams: List[AbortableStream] = []
 
-        for event in response_stream:
-            if event.event == "RunResponseContent":
-                yield f"data: {json.dumps({'type': 'content', 'content': event.content})}\n\n"
-            elif event.event == "RunResponseEnd":
-                yield f"data: {json.dumps({'type': 'end'})}\n\n"
+    def publish(item):
+        try:
+            loop.call_soon_threadsafe(events.put_nowait, item)
+        except RuntimeError:
+            # The loop has closed
+            stopped.set()
+
+    def run():
+        model_transport.track(streams)
+        try:
+            response_stream: Iterator[RunResponseEvent] = create_agent().run(
+                prompt, stream=True, stream_intermediate_steps=True
+            )
+            for event in response_stream:
+                if stopped.is_set():
+                    response_stream.close()
+                    break
+                publish(event)
+        except Exception as e:
+            publish(e)
+        finally:
+            model_transport.untrack()
+            publish(_done)
+
+    loop.run_in_executor(run_executor, run)
+    try:
+        while True:
+            item = await events.get()
+            if item is _done:
                 break
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        stopped.set()
+        model_transport.abort(streams)
+
+
+def tool_progress(event: RunResponseEvent) -> dict:
+    """Stream event for a tool call starting or completing"""
+    progress = {
+        "type": "tool_call",
+        "tool": event.tool.tool_name,
+        "status": "started" if event.event == "ToolCallStarted" else "completed",
+    }
+    if event.event == "ToolCallStarted":
+        progress["args"] = event.tool.tool_args
+    else:
+        progress["error"] = bool(event.tool.tool_call_error)
+    return progress
+
+
+async def run_flight(key: str, prompt: str, flight: Flight, stream: bool, slot: Slot):
+    """Run the agent for a flight in ``slot`` and cache what it answered
+
+    Only a run that completed with some content is cached; a failed or
+    empty answer is served to the flight's followers and then forgotten.
+    """
+    try:
+        if stream:
+            async with aclosing(run_agent_stream(prompt)) as events:
+                async for event in events:
+                    if event.event == "RunResponseContent" and event.content:
+                        flight.publish(event.content)
+                    elif event.event in ("ToolCallStarted", "ToolCallCompleted"):
+                        if event.tool is not None:
+                            flight.publish(tool_progress(event))
+                    elif event.event == "RunError":
+                        raise RuntimeError(event.content or "Run failed")
+                    elif event.event == "RunCancelled":
+                        raise RuntimeError(event.reason or "Run cancelled")
+                    elif event.event == "RunResponseEnd":
+                        break
+        else:
+            response: RunResponse = await create_agent().arun(prompt, stream=False)
+            if response.status in (RunStatus.error, RunStatus.cancelled):
+                raise RuntimeError(response.content or "Run failed")
+            if response.content:
+                flight.publish(response.content)
+        content = [chunk for chunk in flight.chunks if isinstance(chunk, str)]
+        if content:
+            response_cache.put(key, content)
+        flight.finish()
+    except asyncio.CancelledError:
+        flight.finish(RuntimeError("Run cancelled"))
+        raise
+    except Exception as e:
+        flight.finish(e)
+    finally:
+        slot.release()
+        flights.pop(key, None)
+
+
+async def respond(prompt: str, stream: bool) -> AsyncIterator[Any]:
+    """Start answering ``prompt``; the content follows as it arrives
+
+    The iterator yields content strings and, for streamed runs, tool
+    progress dicts. Cached answers are replayed chunk by chunk. A prompt
+    that is already being answered joins that run instead of starting
+    another. A new run waits for an admission slot, ``/stream`` ahead of
+    ``/chat``, and raises Overloaded if it is shed; ``stream`` also picks
+    how the run is made, token by token or in one piece.
+    """
+    global coalesced
+    key = cache_key(normalize_prompt(prompt), agent_config)
+    cached = response_cache.get(key)
+    if cached is not None:
+        return replay(cached)
+
+    flight = flights.get(key)
+    if flight is None:
+        slot = await admission.acquire("stream" if stream else "chat")
+        # The same prompt may have been started while this one queued
+        flight = flights.get(key)
+        if flight is None:
+            flight = flights[key] = Flight()
+            flight.task = asyncio.create_task(
+                run_flight(key, prompt, flight, stream, slot)
+            )
+            # In case the run is cancelled before it starts
+            flight.task.add_done_callback(lambda _: slot.release())
+        else:
+            slot.release()
+            coalesced += 1
+    else:
+        coalesced += 1
+    return follow(key, flight)
+
+
+async def replay(chunks: List[Any]) -> AsyncIterator[Any]:
+    for chunk in chunks:
+        yield chunk
+
+
+async def follow(key: str, flight: Flight) -> AsyncIterator[Any]:
+    """A flight's chunks; the run is stopped once all its callers have gone
+
+    A caller counts as following from its first read until it closes the
+    iterator, so one that never reads does not keep the run alive.
+    """
+    global cancelled_runs
+    flight.followers += 1
+    try:
+        async with aclosing(flight.follow()) as chunks:
+            async for chunk in chunks:
+                yield chunk
+    finally:
+        flight.followers -= 1
+        if not flight.done and flight.followers == 0:
+            if flights.get(key) is flight:
+                del flights[key]
+            flight.task.cancel()
+            cancelled_runs += 1
+
+
+async def stream_agent_response(chunks: AsyncIterator[Any]) -> AsyncIterator[str]:
+    """Stream agent responses as Server-Sent Events"""
+    try:
+        async with aclosing(
+            frames(
+                chunks,
+                stream_stats,
+                stream_flush_interval,
+                stream_flush_bytes,
+                stream_heartbeat_interval,
+            )
+        ) as events:
+            async for event in events:
+                yield event
+        yield sse({"type": "end"})
 
     except Exception as e:
-        error_data = json.dumps({"type": "error", "error": str(e)})
-        yield f"data: {error_data}\n\n"
+        yield sse({"type": "error", "error": str(e)})
+
+
+def client_id(request: Request) -> str:
+    """Who a request is rate limited as
+
+    The X-Client-ID header when TRUST_CLIENT_ID_HEADER says a gateway sets
+    it, or else the peer address.
+    """
+    if trust_client_id_header and request.headers.get("x-client-id"):
+        return request.headers["x-client-id"]
+    return request.client.host if request.client else "unknown"
+
+
+def too_many_requests(e: Overloaded) -> HTTPException:
+    return HTTPException(
+        status_code=429,
+        detail=f"Too many requests: {e.reason}",
+        headers={"Retry-After": str(max(1, math.ceil(e.retry_after)))},
+    )
 
 
 @app.get("/")
@@ -61,8 +353,14 @@ async def stream_response(request: Request):
     body = await request.json()
     prompt = body.get("prompt", "Tell me a story about space exploration")
 
+    try:
+        rate_limiter.check(client_id(request))
+        chunks = await respond(prompt, stream=True)
+    except Overloaded as e:
+        raise too_many_requests(e)
+
     return StreamingResponse(
-        stream_agent_response(prompt),
+        stream_agent_response(chunks),
         media_type="text/plain",
         headers={
             "Cache-Control": "no-cache",
@@ -79,23 +377,42 @@ async def chat(request: Request):
     prompt = body.get("prompt", "Tell me a story about space exploration")
 
     try:
-        response_stream: Iterator[RunResponseEvent] = agent.run(
-            prompt, stream=False, stream_intermediate_steps=False  # Get full response
-        )
-
-        # Get the final response
-        final_response = None
-        for event in response_stream:
-            if event.event == "RunResponseContent":
-                final_response = event.content
-                break
+        rate_limiter.check(client_id(request))
+        answer = await respond(prompt, stream=False)
+    except Overloaded as e:
+        raise too_many_requests(e)
 
-        return {"response": final_response}
+    try:
+        chunks = [chunk async for chunk in answer]
+        return {"response": "".join(c for c in chunks if isinstance(c, str))}
 
     except Exception as e:
         return {"error": str(e)}
 
 
+@app.get("/cache")
+async def cache_stats():
+    """Response cache hit/miss counters, coalesced requests and tool caching"""
+    return {
+        **response_cache.stats(),
+        "coalesced": coalesced,
+        "in_flight": len(flights),
+        "tools": tool_cache.stats(),
+    }
+
+
+@app.get("/streams")
+async def streams_stats():
+    """Frames per response, time to first byte and cancelled runs of /stream"""
+    return {**stream_stats.as_dict(), "cancelled_runs": cancelled_runs}
+
+
+@app.get("/admission")
+async def admission_stats():
+    """Runs in progress and queued, queue wait by request class, and shedding"""
+    return {**admission.stats(), "rate_limit": rate_limiter.stats()}
+
+
 if __name__ == "__main__":
     import uvicorn
 
@@ -0,0 +1,244 @@
+import asyncio
+import json
+import socket
+import threading
+from collections import deque
+from typing import Any, AsyncIterator, Deque, Iterator, List, Optional
+
+import httpx
+
+# SSE comment line, ignored by clients but keeping proxies from timing out
+HEARTBEAT = ": heartbeat\n\n"
+
+
+def sse(payload: dict) -> str:
+    """One Server-Sent Events data frame"""
+    return f"data: {json.dumps(payload)}\n\n"
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+class AbortableStream(httpx.SyncByteStream):
+    """A response body that knows whether its connection is still its own"""
+
+    def __init__(self, stream: httpx.SyncByteStream, network_stream: Any):
+        self._stream = stream
+        self.network_stream = network_stream
+        self.open = True
+
+    def __iter__(self) -> Iterator[bytes]:
+        try:
+            yield from self._stream
+        finally:
+            # Finished, failed or abandoned: the connection may be reused
+            self.open = False
+
+    def close(self):
+        self.open = False
+        self._stream.close()
+
+
+class AbortableTransport(httpx.HTTPTransport):
+    """HTTP transport whose streamed responses can be cut off from any thread
+
+    A thread reading a stalled response stream blocks in the socket read,
+    where neither a stop flag nor closing the response reaches it. While a
+    thread is tracking, the bodies of the responses it opens are recorded
+    so that ``abort`` can shut their sockets down, ending the blocked read.
+    """
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self._local = threading.local()
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        response = super().handle_request(request)
+        streams = getattr(self._local, "streams", None)
+        if streams is not None:
+            response.stream = AbortableStream(
+                response.stream, response.extensions.get("network_stream")
+            )
+            streams.append(response.stream)
+        return response
+
+    def close(self):
+        # Shared by every client, including the short-lived copies genai makes
+        # and closes on deletion; the pool lives as long as the process
+        pass
+
+    def track(self, streams: List[AbortableStream]):
+        """Record the response bodies this thread opens from now on"""
+        self._local.streams = streams
+
+    def untrack(self):
+        self._local.streams = None
+
+    @staticmethod
+    def abort(streams: List[AbortableStream]):
+        """Shut down the connections of response bodies still being read"""
+        for stream in list(streams):
+            if not stream.open or stream.network_stream is None:
+                continue
+            sock = stream.network_stream.get_extra_info("socket")
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except (AttributeError, OSError):
+                pass
+
+
+class StreamStats:
+    """Frames and time to first byte of streamed responses
+
+    Totals cover every response; the distributions the latest ``samples``.
+    """
+
+    def __init__(self, samples: int = 1024):
+        self.responses = 0
+        self.disconnects = 0
+        self.frames = 0
+        self.heartbeats = 0
+        self.bytes = 0
+        self.ttfb: Deque[float] = deque(maxlen=samples)
+        self.frames_per_response: Deque[int] = deque(maxlen=samples)
+
+    def record(
+        self,
+        frames: int,
+        heartbeats: int,
+        size: int,
+        ttfb: Optional[float],
+        disconnected: bool,
+    ):
+        self.responses += 1
+        self.disconnects += disconnected
+        self.frames += frames
+        self.heartbeats += heartbeats
+        self.bytes += size
+        if ttfb is not None:
+            self.ttfb.append(ttfb)
+        if not disconnected:
+            self.frames_per_response.append(frames)
+
+    def as_dict(self) -> dict:
+        ttfb = list(self.ttfb)
+        frames = list(self.frames_per_response)
+        return {
+            "responses": self.responses,
+            "disconnects": self.disconnects,
+            "frames": self.frames,
+            "heartbeats": self.heartbeats,
+            "bytes": self.bytes,
+            "avg_frames_per_response": (
+                round(sum(frames) / len(frames), 2) if frames else 0.0
+            ),
+            "p50_ttfb_ms": round(percentile(ttfb, 0.50) * 1000, 1),
+            "p99_ttfb_ms": round(percentile(ttfb, 0.99) * 1000, 1),
+        }
+
+
+async def frames(
+    items: AsyncIterator[Any],
+    stats: StreamStats,
+    flush_interval: float,
+    flush_bytes: int,
+    heartbeat_interval: float,
+) -> AsyncIterator[str]:
+    """SSE frames for a response's content strings and event dicts
+
+    A response's first frame is sent at once; after that, content is held until
+    ``flush_bytes`` have gathered or the oldest has waited
+    ``flush_interval`` seconds, so a token-by-token run takes a few writes
+    rather than one per token. Events flush any held content and are sent
+    as they come. After ``heartbeat_interval`` seconds without a frame, as
+    while a tool runs, a heartbeat comment is sent.
+
+    ``items`` is only ever advanced by helper tasks, so when the caller
+    stops, even by cancellation, it is closed without awaiting it.
+    """
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    sent_at = started
+    ttfb: Optional[float] = None
+    buffer: List[str] = []
+    buffered = 0
+    flush_at = 0.0
+    count = heartbeats = size = 0
+    # Whether the response reached its end, or its source failed
+    finished = failed = False
+    iterator = items.__aiter__()
+    pending: Optional[asyncio.Future] = asyncio.ensure_future(iterator.__anext__())
+
+    def frame(text: str) -> str:
+        nonlocal count, size, sent_at, ttfb
+        count += 1
+        size += len(text)
+        sent_at = loop.time()
+        if ttfb is None:
+            ttfb = sent_at - started
+        return text
+
+    def flush() -> str:
+        nonlocal buffered
+        content = "".join(buffer)
+        buffer.clear()
+        buffered = 0
+        return frame(sse({"type": "content", "content": content}))
+
+    try:
+        while True:
+            deadline = flush_at if buffer else sent_at + heartbeat_interval
+            done, _ = await asyncio.wait(
+                {pending}, timeout=max(0.0, deadline - loop.time())
+            )
+            if not done:
+                if buffer:
+                    yield flush()
+                else:
+                    heartbeats += 1
+                    size += len(HEARTBEAT)
+                    sent_at = loop.time()
+                    yield HEARTBEAT
+                continue
+
+            try:
+                item = pending.result()
+            except StopAsyncIteration:
+                pending = None
+                break
+            except BaseException:
+                pending = None
+                failed = True
+                if buffer:
+                    yield flush()
+                raise
+            # Fetch the next item while this one is sent
+            pending = asyncio.ensure_future(iterator.__anext__())
+
+            if isinstance(item, str):
+                if not buffer:
+                    flush_at = loop.time() + flush_interval
+                buffer.append(item)
+                buffered += len(item)
+                if ttfb is None or buffered >= flush_bytes:
+                    yield flush()
+            else:
+                if buffer:
+                    yield flush()
+                yield frame(sse(item))
+        if buffer:
+            yield flush()
+        finished = True
+    finally:
+        if pending is not None and not pending.done():
+            pending.cancel()
+        elif not (finished or failed):
+            # Closing would need an await, which a cancelled caller cannot make
+            asyncio.ensure_future(iterator.aclose())
+        stats.record(
+            count, heartbeats, size, ttfb, disconnected=not (finished or failed)
+        )
@@ -0,0 +1,130 @@
+import functools
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Dict
+
+from agno.tools import Toolkit
+
+from cache import TTLCache, cache_key
+
+
+class ToolStats:
+    """Calls, cache hits and latency of one tool"""
+
+    def __init__(self):
+        self.calls = 0
+        self.hits = 0
+        # Calls that waited for an identical call already running
+        self.coalesced = 0
+        self.errors = 0
+        self.hit_seconds = 0.0
+        self.miss_seconds = 0.0
+        self.max_miss_seconds = 0.0
+
+    def as_dict(self) -> dict:
+        served = self.hits + self.coalesced
+        misses = self.calls - served - self.errors
+        return {
+            "calls": self.calls,
+            "hits": self.hits,
+            "coalesced": self.coalesced,
+            "misses": misses,
+            "errors": self.errors,
+            "hit_ratio": round(served / self.calls, 4) if self.calls else 0.0,
+            "avg_hit_ms": (
+                round(self.hit_seconds / self.hits * 1000, 2) if self.hits else 0.0
+            ),
+            "avg_miss_ms": (
+                round(self.miss_seconds / misses * 1000, 2) if misses else 0.0
+            ),
+            "max_miss_ms": round(self.max_miss_seconds * 1000, 2),
+        }
+
+
+class ToolCache:
+    """Results of toolkit functions shared by every agent
+
+    Wrapped functions look their name and arguments up in ``cache`` before
+    running, so a repeated lookup costs nothing, and calls with the same
+    arguments already running are waited for instead of repeated. Only
+    text results are cached; failures are not, so they are retried.
+    """
+
+    def __init__(self, cache: TTLCache):
+        self.cache = cache
+        self.tools: Dict[str, ToolStats] = {}
+        self._pending: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+
+    def wrap(self, toolkit: Toolkit) -> Toolkit:
+        """Cache the results of every function in ``toolkit``, in place"""
+        for name, function in toolkit.functions.items():
+            if function.entrypoint is not None:
+                function.entrypoint = self._cached(name, function.entrypoint)
+        return toolkit
+
+    def stats(self) -> Dict[str, dict]:
+        """Per-tool counters, by tool name"""
+        with self._lock:
+            return {name: stats.as_dict() for name, stats in self.tools.items()}
+
+    def _cached(self, name: str, entrypoint: Callable[..., Any]) -> Callable[..., Any]:
+        with self._lock:
+            stats = self.tools.setdefault(name, ToolStats())
+
+        @functools.wraps(entrypoint)
+        def cached(*args, **kwargs):
+            started = time.perf_counter()
+            key = cache_key(name, args, kwargs)
+            result = self.cache.get(key)
+            if result is not None:
+                self._record(stats, "hit", started)
+                return result
+
+            with self._lock:
+                pending = self._pending.get(key)
+                running = pending is not None
+                if not running:
+                    pending = self._pending[key] = Future()
+            if running:
+                try:
+                    result = pending.result()
+                except Exception:
+                    self._record(stats, "error", started)
+                    raise
+                self._record(stats, "coalesced", started)
+                return result
+
+            try:
+                result = entrypoint(*args, **kwargs)
+            except Exception as e:
+                pending.set_exception(e)
+                self._record(stats, "error", started)
+                raise
+            else:
+                if isinstance(result, str):
+                    self.cache.put(key, result)
+                pending.set_result(result)
+                self._record(stats, "miss", started)
+                return result
+            finally:
+                with self._lock:
+                    self._pending.pop(key, None)
+
+        return cached
+
+    def _record(self, stats: ToolStats, outcome: str, started: float):
+        elapsed = time.perf_counter() - started
+        with self._lock:
+            stats.calls += 1
+            if outcome == "hit":
+                stats.hits += 1
+                stats.hit_seconds += elapsed
+            elif outcome == "coalesced":
+                stats.coalesced += 1
+            elif outcome == "error":
+                stats.errors += 1
+            else:
+                stats.miss_seconds += elapsed
+                stats.max_miss_seconds = max(stats.max_miss_seconds, elapsed)
@@ -1,5 +1,8 @@
-from fastapi import APIRouter, HTTPException
-from app.services.docker_service import DockerService
+from fastapi import APIRouter, Depends, HTTPException
+from app.services.async_docker_service import (
+    AsyncDockerService,
+    get_async_docker_service,
+)
 import time
 
 router = APIRouter(tags=["System"])
@@ -17,17 +20,42 @@ async def root():
             "/containers/create",
             "/containers/{container_id}",
             "/containers/{container_id}/stats",
+            "/containers/{container_id}/stats/history",
             "/containers/{container_id}/stop",
             "/containers/{container_id}/start",
             "/containers/{container_id}/remove",
+            "/containers/{container_id}/hibernate",
+            "/containers/{container_id}/wake",
+            "/containers/batch/create",
+            "/containers/batch/start",
+            "/containers/batch/stop",
+            "/containers/batch/remove",
+            "/deployments",
+            "/deployments/{name}",
             "/ports",
+            "/system/stats",
+            "/system/stats/history",
+            "/system/stats/rollups",
+            "/pool",
+            "/hibernation",
+            "/admission",
+            "/nodes",
+            "/registry",
+            "/stream/stats",
+            "/metrics",
+            "/v2/containers/stats",
+            "/v2/containers/{container_id}/stats",
+            "/v2/system/stats",
+            "/v2/system/stats/history",
+            "/proxy/{container_id}/{path}",
         ],
     }
 
 
 @router.get("/health")
-async def health():
+async def health(
+    docker_service: AsyncDockerService = Depends(get_async_docker_service),
+):
     """Health check endpoint"""
-    docker_service = DockerService()
-    docker_status = "healthy" if docker_service.is_available() else "unhealthy"
+    docker_status = "healthy" if await docker_service.ping() else "unhealthy"
     return {"status": "healthy", "docker": docker_status, "timestamp": time.time()}
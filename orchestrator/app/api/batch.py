@@ -0,0 +1,184 @@
+import asyncio
+import time
+from fastapi import APIRouter, Depends, HTTPException
+from docker.errors import NotFound
+from typing import Awaitable, Callable, List
+from app.core.config import settings
+from app.models.container import (
+    BatchCreateRequest,
+    BatchItemResult,
+    BatchResult,
+    BatchSelector,
+)
+from app.services.admission import AdmissionRejected
+from app.services.async_docker_service import (
+    AsyncDockerService,
+    get_async_docker_service,
+)
+from app.services.hibernation import IdleManager, get_idle_manager
+from app.services.readiness import ContainerNotReadyError
+from app.services.registry import ContainerRegistry, get_container_registry
+from app.services.warm_pool import WarmPool, get_warm_pool
+
+router = APIRouter(prefix="/containers/batch", tags=["Batch Operations"])
+
+
+async def _fan_out(
+    keys: List[str], operation: Callable[[str], Awaitable[BatchItemResult]]
+) -> BatchResult:
+    """Run ``operation`` for every key with bounded concurrency"""
+    semaphore = asyncio.Semaphore(settings.batch_concurrency)
+
+    async def run_one(key: str) -> BatchItemResult:
+        async with semaphore:
+            try:
+                return await operation(key)
+            except NotFound:
+                return BatchItemResult(
+                    id=key, success=False, status_code=404, error="Container not found"
+                )
+            except AdmissionRejected as e:
+                return BatchItemResult(
+                    id=key, success=False, status_code=e.status_code, error=str(e)
+                )
+            except ContainerNotReadyError as e:
+                return BatchItemResult(
+                    id=key, success=False, status_code=504, error=str(e)
+                )
+            except Exception as e:
+                return BatchItemResult(
+                    id=key, success=False, status_code=500, error=str(e)
+                )
+
+    results = await asyncio.gather(*(run_one(key) for key in keys))
+    succeeded = sum(1 for result in results if result.success)
+    return BatchResult(
+        total=len(results),
+        succeeded=succeeded,
+        failed=len(results) - succeeded,
+        results=results,
+    )
+
+
+async def _select(
+    selector: BatchSelector,
+    docker_service: AsyncDockerService,
+    registry: ContainerRegistry,
+) -> List[str]:
+    """Container references named by ID or matched by every label"""
+    if not selector.ids and not selector.labels:
+        raise HTTPException(status_code=400, detail="Provide ids or labels")
+
+    selected = list(dict.fromkeys(selector.ids))
+    if selector.labels:
+        if registry.fresh:
+            matches = registry.list(labels=selector.labels)
+        else:
+            matches = await docker_service.list_containers(labels=selector.labels)
+        known = set(selected)
+        for info in matches:
+            if info is not None and info.id not in known and info.name not in known:
+                selected.append(info.id)
+                known.add(info.id)
+    return selected
+
+
+async def _release_in_bulk(
+    keys: List[str],
+    operation: Callable[[str], Awaitable[List[int]]],
+    docker_service: AsyncDockerService,
+) -> BatchResult:
+    """Fan out a stop/remove and release every freed port at once"""
+    freed: List[int] = []
+
+    async def run(key: str) -> BatchItemResult:
+        freed.extend(await operation(key))
+        return BatchItemResult(id=key, success=True, status_code=200)
+
+    result = await _fan_out(keys, run)
+    docker_service.release_ports(freed)
+    return result
+
+
+@router.post("/create", response_model=BatchResult)
+async def batch_create(
+    request: BatchCreateRequest,
+    docker_service: AsyncDockerService = Depends(get_async_docker_service),
+    warm_pool: WarmPool = Depends(get_warm_pool),
+):
+    """Create ``count`` containers concurrently
+
+    Successful items are reported by container ID, failed ones by the name
+    they would have had.
+    """
+    if not await docker_service.is_available():
+        raise HTTPException(status_code=500, detail="Docker service not available")
+
+    prefix = request.name_prefix or f"api-server-{int(time.time())}"
+    names = [f"{prefix}-{index}" for index in range(request.count)]
+
+    async def create(name: str) -> BatchItemResult:
+        info = await warm_pool.provision(request.image, name, request.resources)
+        return BatchItemResult(
+            id=info.id, success=True, status_code=200, container=info
+        )
+
+    return await _fan_out(names, create)
+
+
+@router.post("/start", response_model=BatchResult)
+async def batch_start(
+    selector: BatchSelector,
+    docker_service: AsyncDockerService = Depends(get_async_docker_service),
+    registry: ContainerRegistry = Depends(get_container_registry),
+):
+    """Start the selected containers concurrently"""
+    if not await docker_service.is_available():
+        raise HTTPException(status_code=500, detail="Docker service not available")
+
+    keys = await _select(selector, docker_service, registry)
+
+    async def start(key: str) -> BatchItemResult:
+        if not await docker_service.start_container(key):
+            return BatchItemResult(
+                id=key, success=False, status_code=500, error="Failed to start"
+            )
+        return BatchItemResult(id=key, success=True, status_code=200)
+
+    return await _fan_out(keys, start)
+
+
+@router.post("/stop", response_model=BatchResult)
+async def batch_stop(
+    selector: BatchSelector,
+    docker_service: AsyncDockerService = Depends(get_async_docker_service),
+    registry: ContainerRegistry = Depends(get_container_registry),
+    idle_manager: IdleManager = Depends(get_idle_manager),
+):
+    """Stop the selected containers concurrently, releasing ports in bulk"""
+    if not await docker_service.is_available():
+        raise HTTPException(status_code=500, detail="Docker service not available")
+
+    keys = await _select(selector, docker_service, registry)
+    for key in keys:
+        # An explicit stop keeps a hibernated container asleep for good
+        idle_manager.forget(key)
+    return await _release_in_bulk(
+        keys, docker_service.stop_container_ports, docker_service
+    )
+
+
+@router.post("/remove", response_model=BatchResult)
+async def batch_remove(
+    selector: BatchSelector,
+    docker_service: AsyncDockerService = Depends(get_async_docker_service),
+    registry: ContainerRegistry = Depends(get_container_registry),
+):
+    """Remove the selected containers concurrently, releasing ports in bulk"""
+    if not await docker_service.is_available():
+        raise HTTPException(status_code=500, detail="Docker service not available")
+
+    keys = await _select(selector, docker_service, registry)
+    return await _release_in_bulk(
+        keys, docker_service.remove_container_ports, docker_service
+    )
@@ -1,21 +1,53 @@
-from fastapi import APIRouter, HTTPException
-from typing import List
-from app.models.container import ContainerCreateRequest, ContainerInfo, ContainerStats
-from app.services.docker_service import DockerService
+import time
+from docker.errors import NotFound
+from fastapi import APIRouter, Depends, HTTPException, Query
+from typing import List, Literal, Optional, Union
+from app.models.container import (
+    ContainerCreateRequest,
+    ContainerInfo,
+    ContainerStats,
+    ContainerStatsWindow,
+    StatsHistory,
+)
+from app.services.admission import AdmissionRejected
+from app.services.async_docker_service import (
+    AsyncDockerService,
+    get_async_docker_service,
+)
+from app.services.hibernation import IdleManager, get_idle_manager
+from app.services.readiness import ContainerNotReadyError
+from app.services.registry import ContainerRegistry, get_container_registry
+from app.services.stats_collector import StatsCollector, get_stats_collector
+from app.services.timeseries import TimeSeriesStore, get_timeseries_store
+from app.services.warm_pool import WarmPool, get_warm_pool
 
 router = APIRouter(prefix="/containers", tags=["Container Management"])
 
+ContainerStatus = Literal[
+    "created", "restarting", "running", "removing", "paused", "exited", "dead"
+]
 
-@router.post("/create", response_model=ContainerInfo)
-async def create_container(request: ContainerCreateRequest):
-    """Create a new container from the base image"""
-    docker_service = DockerService()
 
-    if not docker_service.is_available():
+@router.post("/create", response_model=ContainerInfo)
+async def create_container(
+    request: ContainerCreateRequest,
+    docker_service: AsyncDockerService = Depends(get_async_docker_service),
+    warm_pool: WarmPool = Depends(get_warm_pool),
+):
+    """Create a new container, handing out a warm one when available"""
+    if not await docker_service.is_available():
         raise HTTPException(status_code=500, detail="Docker service not available")
 
     try:
-        return docker_service.create_container(request.image, request.name)
+        return await warm_pool.provision(request.image, request.name, request.resources)
+    except AdmissionRejected as e:
+        raise HTTPException(
+            status_code=e.status_code,
+            detail=str(e),
+            headers={"Retry-After": str(int(e.retry_after))},
+        )
+    except ContainerNotReadyError as e:
+        raise HTTPException(status_code=504, detail=str(e))
     except Exception as e:
         raise HTTPException(
             status_code=500, detail=f"Failed to create container: {str(e)}"
@@ -23,15 +55,38 @@ async def create_container(request: ContainerCreateRequest):
 
 
 @router.get("/", response_model=List[ContainerInfo])
-async def list_containers():
-    """List all containers (running, stopped, and created)"""
-    docker_service = DockerService()
+async def list_containers(
+    status: Optional[ContainerStatus] = None,
+    label: Optional[List[str]] = Query(None, description="key or key=value"),
+    name_prefix: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1),
+    offset: int = Query(0, ge=0),
+    docker_service: AsyncDockerService = Depends(get_async_docker_service),
+    registry: ContainerRegistry = Depends(get_container_registry),
+):
+    """List all containers (running, stopped, and created), newest first"""
+    if registry.fresh:
+        return registry.list(
+            all_containers=True,
+            status=status,
+            labels=label,
+            name_prefix=name_prefix,
+            limit=limit,
+            offset=offset,
+        )
 
-    if not docker_service.is_available():
+    if not await docker_service.is_available():
         raise HTTPException(status_code=500, detail="Docker service not available")
 
     try:
-        return docker_service.list_containers(all_containers=True)
+        return await docker_service.list_containers(
+            all_containers=True,
+            status=status,
+            labels=label,
+            name_prefix=name_prefix,
+            limit=limit,
+            offset=offset,
+        )
     except Exception as e:
         raise HTTPException(
             status_code=500, detail=f"Failed to list containers: {str(e)}"
@@ -39,15 +94,35 @@ async def list_containers():
 
 
 @router.get("/running", response_model=List[ContainerInfo])
-async def list_running_containers():
-    """List only running containers"""
-    docker_service = DockerService()
+async def list_running_containers(
+    label: Optional[List[str]] = Query(None, description="key or key=value"),
+    name_prefix: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1),
+    offset: int = Query(0, ge=0),
+    docker_service: AsyncDockerService = Depends(get_async_docker_service),
+    registry: ContainerRegistry = Depends(get_container_registry),
+):
+    """List only running containers, newest first"""
+    if registry.fresh:
+        return registry.list(
+            all_containers=False,
+            labels=label,
+            name_prefix=name_prefix,
+            limit=limit,
+            offset=offset,
+        )
 
-    if not docker_service.is_available():
+    if not await docker_service.is_available():
         raise HTTPException(status_code=500, detail="Docker service not available")
 
     try:
-        return docker_service.list_containers(all_containers=False)
+        return await docker_service.list_containers(
+            all_containers=False,
+            labels=label,
+            name_prefix=name_prefix,
+            limit=limit,
+            offset=offset,
+        )
     except Exception as e:
         raise HTTPException(
             status_code=500, detail=f"Failed to list running containers: {str(e)}"
@@ -55,106 +130,225 @@ async def list_running_containers():
 
 
 @router.get("/{container_id}", response_model=ContainerInfo)
-async def get_container(container_id: str):
+async def get_container(
+    container_id: str,
+    docker_service: AsyncDockerService = Depends(get_async_docker_service),
+    registry: ContainerRegistry = Depends(get_container_registry),
+):
     """Get information about a specific container"""
-    docker_service = DockerService()
+    if registry.fresh:
+        info = registry.get(container_id)
+        if info is not None:
+            return info
 
-    if not docker_service.is_available():
+    # Not cached yet (or the cache is not live): ask the daemon directly
+    if not await docker_service.is_available():
         raise HTTPException(status_code=500, detail="Docker service not available")
 
     try:
-        return docker_service.get_container(container_id)
+        return await docker_service.get_container(container_id)
+    except NotFound:
+        raise HTTPException(status_code=404, detail="Container not found")
     except Exception as e:
-        if "not found" in str(e).lower():
-            raise HTTPException(status_code=404, detail="Container not found")
         raise HTTPException(
             status_code=500, detail=f"Failed to get container: {str(e)}"
         )
 
 
-@router.get("/{container_id}/stats", response_model=ContainerStats)
-async def get_container_stats(container_id: str):
-    """Get real-time statistics for a specific container"""
-    docker_service = DockerService()
-
-    if not docker_service.is_available():
+@router.get(
+    "/{container_id}/stats",
+    response_model=Union[ContainerStats, ContainerStatsWindow],
+)
+async def get_container_stats(
+    container_id: str,
+    window: Optional[int] = Query(
+        None, ge=1, description="Return up to this many recent samples"
+    ),
+    docker_service: AsyncDockerService = Depends(get_async_docker_service),
+    collector: StatsCollector = Depends(get_stats_collector),
+):
+    """Get the latest statistics for a container, optionally with history"""
+    if window is not None:
+        samples = collector.window(container_id, window)
+        if samples:
+            return ContainerStatsWindow(
+                container_id=samples[-1].container_id,
+                name=samples[-1].name,
+                samples=samples,
+            )
+    else:
+        stats = collector.latest(container_id)
+        if stats is not None:
+            return stats
+
+    # Not collected (yet): take a one-off sample from the daemon
+    if not await docker_service.is_available():
         raise HTTPException(status_code=500, detail="Docker service not available")
 
     try:
-        container = docker_service.client.containers.get(container_id)
-        stats = docker_service.get_container_stats(container)
+        stats = await docker_service.get_container_stats(container_id)
         if stats is None:
             raise HTTPException(status_code=500, detail="Failed to get container stats")
+        if window is not None:
+            return ContainerStatsWindow(
+                container_id=stats.container_id, name=stats.name, samples=[stats]
+            )
         return stats
+    except HTTPException:
+        raise
+    except NotFound:
+        raise HTTPException(status_code=404, detail="Container not found")
     except Exception as e:
-        if "not found" in str(e).lower():
-            raise HTTPException(status_code=404, detail="Container not found")
         raise HTTPException(
             status_code=500, detail=f"Failed to get container stats: {str(e)}"
         )
 
 
+@router.get("/{container_id}/stats/history", response_model=StatsHistory)
+async def get_container_stats_history(
+    container_id: str,
+    start: Optional[float] = Query(
+        None, alias="from", description="Unix time; defaults to one hour ago"
+    ),
+    end: Optional[float] = Query(
+        None, alias="to", description="Unix time; defaults to now"
+    ),
+    step: int = Query(10, ge=10, description="Seconds per point"),
+    registry: ContainerRegistry = Depends(get_container_registry),
+    store: TimeSeriesStore = Depends(get_timeseries_store),
+):
+    """Get min/max/avg/p95 statistics for a container over a time range"""
+    end = end if end is not None else time.time()
+    start = start if start is not None else end - 3600
+    full_id = registry.resolve_id(container_id) or store.resolve_id(container_id)
+    history = store.query(full_id, start, end, step) if full_id else None
+    if history is None:
+        raise HTTPException(status_code=404, detail="No history for container")
+
+    # The container may have left the registry since its ID was resolved
+    info = registry.get(full_id)
+    history.series = info.id if info is not None else full_id[:12]
+    history.name = info.name if info is not None else None
+    return history
+
+
 @router.post("/{container_id}/stop")
-async def stop_container(container_id: str):
+async def stop_container(
+    container_id: str,
+    docker_service: AsyncDockerService = Depends(get_async_docker_service),
+    idle_manager: IdleManager = Depends(get_idle_manager),
+):
     """Stop a running container"""
-    docker_service = DockerService()
-
-    if not docker_service.is_available():
+    if not await docker_service.is_available():
         raise HTTPException(status_code=500, detail="Docker service not available")
 
+    # An explicit stop keeps a hibernated container asleep for good
+    idle_manager.forget(container_id)
     try:
-        success = docker_service.stop_container(container_id)
+        success = await docker_service.stop_container(container_id)
         if success:
             return {"message": f"Container {container_id} stopped successfully"}
         else:
             raise HTTPException(status_code=500, detail="Failed to stop container")
+    except HTTPException:
+        raise
+    except NotFound:
+        raise HTTPException(status_code=404, detail="Container not found")
     except Exception as e:
-        if "not found" in str(e).lower():
-            raise HTTPException(status_code=404, detail="Container not found")
         raise HTTPException(
             status_code=500, detail=f"Failed to stop container: {str(e)}"
         )
 
 
 @router.post("/{container_id}/start")
-async def start_container(container_id: str):
+async def start_container(
+    container_id: str,
+    docker_service: AsyncDockerService = Depends(get_async_docker_service),
+):
     """Start a stopped container"""
-    docker_service = DockerService()
-
-    if not docker_service.is_available():
+    if not await docker_service.is_available():
         raise HTTPException(status_code=500, detail="Docker service not available")
 
     try:
-        success = docker_service.start_container(container_id)
+        success = await docker_service.start_container(container_id)
         if success:
             return {"message": f"Container {container_id} started successfully"}
         else:
             raise HTTPException(status_code=500, detail="Failed to start container")
+    except HTTPException:
+        raise
+    except NotFound:
+        raise HTTPException(status_code=404, detail="Container not found")
     except Exception as e:
-        if "not found" in str(e).lower():
-            raise HTTPException(status_code=404, detail="Container not found")
         raise HTTPException(
             status_code=500, detail=f"Failed to start container: {str(e)}"
         )
 
 
+@router.post("/{container_id}/hibernate", response_model=ContainerInfo)
+async def hibernate_container(
+    container_id: str,
+    docker_service: AsyncDockerService = Depends(get_async_docker_service),
+    idle_manager: IdleManager = Depends(get_idle_manager),
+):
+    """Pause (or stop) a running container until its next request"""
+    if not await docker_service.is_available():
+        raise HTTPException(status_code=500, detail="Docker service not available")
+
+    try:
+        return await idle_manager.hibernate(container_id)
+    except NotFound:
+        raise HTTPException(status_code=404, detail="Container not found")
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except Exception as e:
+        raise HTTPException(
+            status_code=500, detail=f"Failed to hibernate container: {str(e)}"
+        )
+
+
+@router.post("/{container_id}/wake", response_model=ContainerInfo)
+async def wake_container(
+    container_id: str,
+    docker_service: AsyncDockerService = Depends(get_async_docker_service),
+    idle_manager: IdleManager = Depends(get_idle_manager),
+):
+    """Resume a hibernated container; startup_seconds is the wake latency"""
+    if not await docker_service.is_available():
+        raise HTTPException(status_code=500, detail="Docker service not available")
+
+    try:
+        return await idle_manager.wake(container_id)
+    except NotFound:
+        raise HTTPException(status_code=404, detail="Container not found")
+    except ContainerNotReadyError as e:
+        raise HTTPException(status_code=504, detail=str(e))
+    except Exception as e:
+        raise HTTPException(
+            status_code=500, detail=f"Failed to wake container: {str(e)}"
+        )
+
+
 @router.delete("/{container_id}")
-async def remove_container(container_id: str):
+async def remove_container(
+    container_id: str,
+    docker_service: AsyncDockerService = Depends(get_async_docker_service),
+):
     """Remove a container"""
-    docker_service = DockerService()
-
-    if not docker_service.is_available():
+    if not await docker_service.is_available():
         raise HTTPException(status_code=500, detail="Docker service not available")
 
     try:
-        success = docker_service.remove_container(container_id)
+        success = await docker_service.remove_container(container_id)
         if success:
             return {"message": f"Container {container_id} removed successfully"}
         else:
             raise HTTPException(status_code=500, detail="Failed to remove container")
+    except HTTPException:
+        raise
+    except NotFound:
+        raise HTTPException(status_code=404, detail="Container not found")
     except Exception as e:
-        if "not found" in str(e).lower():
-            raise HTTPException(status_code=404, detail="Container not found")
         raise HTTPException(
             status_code=500, detail=f"Failed to remove container: {str(e)}"
         )
@@ -0,0 +1,52 @@
+from fastapi import APIRouter, Depends, HTTPException, Path
+from typing import List
+from app.models.container import DeploymentSpec, DeploymentStatus
+from app.services.autoscaler import (
+    DEPLOYMENT_NAME_PATTERN,
+    Autoscaler,
+    get_autoscaler,
+)
+
+router = APIRouter(prefix="/deployments", tags=["Deployments"])
+
+
+@router.get("/", response_model=List[DeploymentStatus])
+async def list_deployments(autoscaler: Autoscaler = Depends(get_autoscaler)):
+    """Every deployment with its replicas and latest load"""
+    return await autoscaler.statuses()
+
+
+@router.put("/{name}", response_model=DeploymentStatus)
+async def apply_deployment(
+    spec: DeploymentSpec,
+    name: str = Path(pattern=DEPLOYMENT_NAME_PATTERN, max_length=48),
+    autoscaler: Autoscaler = Depends(get_autoscaler),
+):
+    """Create a deployment or replace its spec
+
+    Replicas are created or removed by the autoscaler in the background;
+    poll the deployment to follow them.
+    """
+    autoscaler.apply(name, spec)
+    return await autoscaler.status(name)
+
+
+@router.get("/{name}", response_model=DeploymentStatus)
+async def get_deployment(name: str, autoscaler: Autoscaler = Depends(get_autoscaler)):
+    """A deployment's spec, replicas and scaling history"""
+    try:
+        return await autoscaler.status(name)
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Deployment not found")
+
+
+@router.delete("/{name}")
+async def delete_deployment(
+    name: str, autoscaler: Autoscaler = Depends(get_autoscaler)
+):
+    """Delete a deployment and remove its replicas"""
+    try:
+        removed = await autoscaler.delete(name)
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Deployment not found")
+    return {"message": f"Deployment {name} deleted, {removed} replicas removed"}
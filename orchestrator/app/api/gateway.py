@@ -0,0 +1,30 @@
+from fastapi import APIRouter, Depends, Request
+from app.services.gateway import Gateway, get_gateway
+
+router = APIRouter(prefix="/proxy", tags=["Gateway"])
+
+PROXY_METHODS = ["GET", "HEAD", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"]
+
+
+@router.api_route("/{container_id}", methods=PROXY_METHODS, include_in_schema=False)
+@router.api_route(
+    "/{container_id}/{path:path}",
+    methods=PROXY_METHODS,
+    summary="Proxy a request to a container",
+)
+async def proxy(
+    container_id: str,
+    request: Request,
+    path: str = "",
+    gateway: Gateway = Depends(get_gateway),
+):
+    """Forward the request to ``/<path>`` on a running container
+
+    The container is looked up by ID or name in the registry and reached
+    over the container network through a pooled keep-alive connection.
+    Request and response bodies are streamed, so server-sent events and
+    large downloads pass through unbuffered.
+    """
+    return await gateway.forward(
+        request, container_id, path, prefix=f"/proxy/{container_id}"
+    )
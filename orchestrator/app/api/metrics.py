@@ -0,0 +1,55 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from app.services.cluster import get_docker_cluster
+from app.services.metrics import get_loop_lag_monitor, registry
+from app.services.registry import get_container_registry
+from app.utils.metrics import Gauge
+
+router = APIRouter(tags=["Monitoring"])
+
+
+def _port_usage():
+    port_manager = get_docker_cluster().port_manager
+    return [((), port_manager.utilization())]
+
+
+def _containers_by_state():
+    container_registry = get_container_registry()
+    if not container_registry.synced:
+        return []
+    return [
+        ((state,), count)
+        for state, count in container_registry.count_by_status().items()
+    ]
+
+
+registry.register(
+    Gauge(
+        "nubrix_port_allocator_utilization_ratio",
+        "Fraction of the host port range that is allocated",
+        _port_usage,
+    )
+)
+registry.register(
+    Gauge(
+        "nubrix_containers",
+        "Known containers by state",
+        _containers_by_state,
+        labelnames=("state",),
+    )
+)
+registry.register(
+    Gauge(
+        "nubrix_event_loop_lag_last_seconds",
+        "Most recent event loop lag measurement",
+        lambda: [((), get_loop_lag_monitor().last_lag)],
+    )
+)
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """Prometheus metrics in text exposition format"""
+    return PlainTextResponse(
+        registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
@@ -1,16 +1,38 @@
-from fastapi import APIRouter, HTTPException
-from app.models.container import SystemStats, PortInfo
-from app.services.docker_service import DockerService
+import time
+from fastapi import APIRouter, Depends, HTTPException, Query
+from typing import List, Optional
+from app.models.container import (
+    AdmissionStats,
+    HibernationStats,
+    NodeStats,
+    PortInfo,
+    RegistryStats,
+    StatsHistory,
+    SystemStats,
+    SystemStatsHistory,
+    WarmPoolStats,
+)
+from app.services.admission import AdmissionController, get_admission_controller
+from app.services.async_docker_service import (
+    AsyncDockerService,
+    get_async_docker_service,
+)
+from app.services.hibernation import IdleManager, get_idle_manager
+from app.services.registry import ContainerRegistry, get_container_registry
+from app.services.scheduler import Scheduler, get_scheduler
+from app.services.system_sampler import SystemSampler, get_system_sampler
+from app.services.timeseries import HOST_SERIES, TimeSeriesStore, get_timeseries_store
+from app.services.warm_pool import WarmPool, get_warm_pool
 
 router = APIRouter(tags=["Monitoring"])
 
 
 @router.get("/ports", response_model=PortInfo)
-async def get_port_info():
+async def get_port_info(
+    docker_service: AsyncDockerService = Depends(get_async_docker_service),
+):
     """Get port usage information"""
-    docker_service = DockerService()
-
-    if not docker_service.is_available():
+    if not await docker_service.is_available():
         raise HTTPException(status_code=500, detail="Docker service not available")
 
     try:
@@ -23,19 +45,77 @@ async def get_port_info():
 
 
 @router.get("/system/stats", response_model=SystemStats)
-async def get_system_stats():
-    """Get system-wide statistics"""
-    docker_service = DockerService()
+async def get_system_stats(sampler: SystemSampler = Depends(get_system_sampler)):
+    """Get the latest system-wide statistics"""
+    stats = sampler.latest()
+    if stats is None:
+        raise HTTPException(status_code=503, detail="No system sample taken yet")
+    return stats
 
-    if not docker_service.is_available():
-        raise HTTPException(status_code=500, detail="Docker service not available")
 
-    try:
-        stats = docker_service.get_system_stats()
-        if stats is None:
-            raise HTTPException(status_code=500, detail="Failed to get system stats")
-        return stats
-    except Exception as e:
-        raise HTTPException(
-            status_code=500, detail=f"Failed to get system stats: {str(e)}"
-        )
+@router.get("/system/stats/history", response_model=SystemStatsHistory)
+async def get_system_stats_history(
+    window: float = Query(300.0, gt=0, description="Seconds of history"),
+    points: int = Query(60, ge=1, le=3600, description="Maximum samples returned"),
+    sampler: SystemSampler = Depends(get_system_sampler),
+):
+    """Get recent system-wide statistics, averaged down to ``points`` samples"""
+    return SystemStatsHistory(
+        interval=sampler.interval, samples=sampler.history(window, points)
+    )
+
+
+@router.get("/system/stats/rollups", response_model=StatsHistory)
+async def get_system_stats_rollups(
+    start: Optional[float] = Query(
+        None, alias="from", description="Unix time; defaults to one hour ago"
+    ),
+    end: Optional[float] = Query(
+        None, alias="to", description="Unix time; defaults to now"
+    ),
+    step: int = Query(10, ge=10, description="Seconds per point"),
+    store: TimeSeriesStore = Depends(get_timeseries_store),
+):
+    """Get min/max/avg/p95 host statistics over a time range"""
+    end = end if end is not None else time.time()
+    start = start if start is not None else end - 3600
+    history = store.query(HOST_SERIES, start, end, step)
+    if history is None:
+        raise HTTPException(status_code=404, detail="No host history yet")
+    return history
+
+
+@router.get("/pool", response_model=WarmPoolStats)
+async def get_pool_stats(warm_pool: WarmPool = Depends(get_warm_pool)):
+    """Get warm pool occupancy and hit/miss counters"""
+    return warm_pool.stats()
+
+
+@router.get("/hibernation", response_model=HibernationStats)
+async def get_hibernation_stats(
+    idle_manager: IdleManager = Depends(get_idle_manager),
+):
+    """Get hibernated container counts and wake latency"""
+    return idle_manager.stats()
+
+
+@router.get("/admission", response_model=AdmissionStats)
+async def get_admission_stats(
+    admission: AdmissionController = Depends(get_admission_controller),
+):
+    """Get admitted/rejected creates, reserved resources and host headroom"""
+    return admission.stats()
+
+
+@router.get("/nodes", response_model=List[NodeStats])
+async def get_nodes(scheduler: Scheduler = Depends(get_scheduler)):
+    """Get every Docker node's capacity, reservations and load"""
+    return scheduler.nodes()
+
+
+@router.get("/registry", response_model=RegistryStats)
+async def get_registry_stats(
+    registry: ContainerRegistry = Depends(get_container_registry),
+):
+    """Get container cache size, freshness and event lag"""
+    return registry.stats()
@@ -0,0 +1,148 @@
+from docker.errors import NotFound
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import JSONResponse, Response
+from pydantic import BaseModel
+from typing import Dict, List, Literal, Optional, Sequence, Type, Union
+from app.models.container import (
+    ContainerStatsV2,
+    ContainerStatsV2Window,
+    SystemStatsV2,
+    SystemStatsV2History,
+)
+from app.services.async_docker_service import (
+    AsyncDockerService,
+    get_async_docker_service,
+)
+from app.services.stats_collector import StatsCollector, get_stats_collector
+from app.services.system_sampler import SystemSampler, get_system_sampler
+
+try:
+    import msgpack
+except ImportError:  # optional: pip install "nubrixai[msgpack]"
+    msgpack = None
+
+router = APIRouter(prefix="/v2", tags=["Statistics v2"])
+
+StatsFormat = Literal["json", "columnar", "msgpack"]
+
+FORMAT_DESCRIPTION = (
+    "json: one object per sample; columnar: one array per field; "
+    "msgpack: columnar, msgpack-encoded"
+)
+
+
+def _columns(
+    model: Type[BaseModel], rows: Sequence[BaseModel], exclude: Sequence[str] = ()
+) -> Dict[str, list]:
+    """One list per model field, in field order"""
+    return {
+        field: [getattr(row, field) for row in rows]
+        for field in model.model_fields
+        if field not in exclude
+    }
+
+
+def _encode(payload: dict, format: StatsFormat) -> Response:
+    """Serialize a columnar payload as JSON or msgpack"""
+    if format == "msgpack":
+        if msgpack is None:
+            raise HTTPException(
+                status_code=406, detail="msgpack encoding is not installed"
+            )
+        return Response(msgpack.packb(payload), media_type="application/msgpack")
+    return JSONResponse(payload)
+
+
+@router.get("/containers/stats", response_model=List[ContainerStatsV2])
+async def get_all_container_stats(
+    container: Optional[List[str]] = Query(
+        None, description="Container ID or name; all running containers if omitted"
+    ),
+    format: StatsFormat = Query("json", description=FORMAT_DESCRIPTION),
+    collector: StatsCollector = Depends(get_stats_collector),
+):
+    """Get the latest statistics of many containers in one response"""
+    stats = collector.latest_v2(container)
+    if format == "json":
+        return stats
+    return _encode(
+        {"count": len(stats), "columns": _columns(ContainerStatsV2, stats)}, format
+    )
+
+
+@router.get(
+    "/containers/{container_id}/stats",
+    response_model=Union[ContainerStatsV2, ContainerStatsV2Window],
+)
+async def get_container_stats(
+    container_id: str,
+    window: Optional[int] = Query(
+        None, ge=1, description="Return up to this many recent samples"
+    ),
+    format: StatsFormat = Query("json", description=FORMAT_DESCRIPTION),
+    docker_service: AsyncDockerService = Depends(get_async_docker_service),
+    collector: StatsCollector = Depends(get_stats_collector),
+):
+    """Get numeric statistics for a container, optionally with history"""
+    samples = collector.window_v2(container_id, window or 1)
+
+    if not samples:
+        # Not collected (yet): take a one-off sample from the daemon
+        if not await docker_service.is_available():
+            raise HTTPException(status_code=500, detail="Docker service not available")
+        try:
+            samples = [await docker_service.get_container_stats_v2(container_id)]
+        except NotFound:
+            raise HTTPException(status_code=404, detail="Container not found")
+        except Exception as e:
+            raise HTTPException(
+                status_code=500, detail=f"Failed to get container stats: {str(e)}"
+            )
+
+    if window is None:
+        return samples[-1]
+    if format == "json":
+        return ContainerStatsV2Window(
+            container_id=samples[-1].container_id,
+            name=samples[-1].name,
+            samples=samples,
+        )
+    return _encode(
+        {
+            "container_id": samples[-1].container_id,
+            "name": samples[-1].name,
+            "columns": _columns(
+                ContainerStatsV2, samples, exclude=("container_id", "name")
+            ),
+        },
+        format,
+    )
+
+
+@router.get("/system/stats", response_model=SystemStatsV2)
+async def get_system_stats(sampler: SystemSampler = Depends(get_system_sampler)):
+    """Get the latest numeric system-wide statistics"""
+    stats = sampler.latest_v2()
+    if stats is None:
+        raise HTTPException(status_code=503, detail="No system sample taken yet")
+    return stats
+
+
+@router.get("/system/stats/history", response_model=SystemStatsV2History)
+async def get_system_stats_history(
+    window: float = Query(300.0, gt=0, description="Seconds of history"),
+    points: int = Query(60, ge=1, le=3600, description="Maximum samples returned"),
+    format: StatsFormat = Query("json", description=FORMAT_DESCRIPTION),
+    sampler: SystemSampler = Depends(get_system_sampler),
+):
+    """Get recent numeric system statistics, averaged down to ``points``"""
+    samples = sampler.history_v2(window, points)
+    if format == "json":
+        return SystemStatsV2History(interval=sampler.interval, samples=samples)
+    return _encode(
+        {
+            "interval": sampler.interval,
+            "columns": _columns(SystemStatsV2, samples),
+        },
+        format,
+    )
@@ -0,0 +1,52 @@
+import asyncio
+import json
+from fastapi import APIRouter, Depends, Query, Request
+from fastapi.responses import StreamingResponse
+from typing import List, Optional
+from app.core.config import settings
+from app.services.stats_hub import StatsHub, get_stats_hub
+
+router = APIRouter(prefix="/stream", tags=["Streaming"])
+
+
+@router.get("/stats")
+async def stream_stats(
+    request: Request,
+    container: Optional[List[str]] = Query(
+        None, description="Container ID or name; all containers if omitted"
+    ),
+    system: bool = Query(True, description="Include host statistics"),
+    interval: float = Query(1.0, ge=0.1, le=60, description="Seconds between frames"),
+    hub: StatsHub = Depends(get_stats_hub),
+):
+    """Stream container and system statistics as Server-Sent Events
+
+    The first ``snapshot`` event carries every selected value; later
+    ``delta`` events carry only what changed. A client that reads slower
+    than ``interval`` skips frames (reported in ``dropped``) instead of
+    having them queued.
+    """
+    subscription = hub.subscribe(container, system=system, interval=interval)
+
+    async def events():
+        loop = asyncio.get_running_loop()
+        hub.subscribers += 1
+        try:
+            last_write = loop.time()
+            while not await request.is_disconnected():
+                frame = await subscription.next_frame()
+                if frame is not None:
+                    data = json.dumps(frame, separators=(",", ":"))
+                    yield f"event: {frame['type']}\ndata: {data}\n\n"
+                    last_write = loop.time()
+                elif loop.time() - last_write >= settings.stream_heartbeat_interval:
+                    yield ": keepalive\n\n"
+                    last_write = loop.time()
+        finally:
+            hub.subscribers -= 1
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
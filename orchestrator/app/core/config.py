@@ -1,5 +1,5 @@
 from pydantic_settings import BaseSettings
-from typing import Optional
+from typing import Dict, Optional
 
 
 class Settings(BaseSettings):
@@ -12,10 +12,122 @@ class Settings(BaseSettings):
     # Docker settings
     docker_host: Optional[str] = None
     docker_timeout: int = 30
+    docker_pool_size: int = 10
+    docker_reconnect_interval: float = 5.0
+
+    # Several Docker endpoints to schedule containers across, by node name,
+    # e.g. {"a": "tcp://10.0.0.5:2376", "b": "ssh://ops@10.0.0.6"}; when
+    # empty, docker_host is the only node. docker_node_hosts overrides the
+    # address a node's published ports are reached at (default: the
+    # endpoint's host, or readiness_host for local sockets and docker_host)
+    docker_nodes: Dict[str, str] = {}
+    docker_node_hosts: Dict[str, str] = {}
+    # Placement of new containers: "least_loaded" spreads them across
+    # nodes, "binpack" fills the busiest node that still fits first
+    scheduler_strategy: str = "least_loaded"
+
+    # Worker threads for blocking docker-py calls, and per-operation caps
+    docker_executor_workers: int = 32
+    docker_operation_limits: Dict[str, int] = {
+        "create": 8,
+        "start": 8,
+        "stop": 8,
+        "remove": 8,
+        "stats": 16,
+        "system": 2,
+    }
+
+    # Default limits for created containers (None = unlimited)
+    container_cpus: Optional[float] = None
+    container_memory_mb: Optional[int] = None
+    container_memory_reservation_mb: Optional[int] = None
+    container_pids_limit: Optional[int] = None
+
+    # Admission control of creates against host headroom and committed
+    # reservations; creates that do not fit wait in a bounded queue
+    admission_enabled: bool = True
+    admission_cpu_overcommit: float = 4.0  # committed cores per host core
+    admission_memory_overcommit: float = 1.0  # committed memory per host byte
+    admission_min_free_memory_mb: int = 256
+    admission_max_cpu_percent: float = 95.0
+    admission_default_memory_mb: int = 256  # assumed for unlimited containers
+    admission_queue_size: int = 32
+    admission_queue_timeout: float = 10.0
+
+    # Readiness probing of newly created containers
+    readiness_host: str = "localhost"
+    readiness_path: str = "/health"
+    readiness_timeout: float = 30.0
+    readiness_initial_backoff: float = 0.05
+    readiness_max_backoff: float = 1.0
+    readiness_pool_size: int = 20
+
+    # Warm pool of pre-started containers
+    warm_pool_enabled: bool = False
+    warm_pool_image: str = "base-api-server:latest"
+    warm_pool_size: int = 2
+    warm_pool_targets: Dict[str, int] = {}
+    warm_pool_max_idle_seconds: float = 900.0
+    warm_pool_refill_interval: float = 5.0
+    warm_pool_refill_concurrency: int = 2
+
+    # Idle hibernation: containers without traffic for hibernate_idle_seconds
+    # are paused ("pause") or stopped ("stop"), and woken on the next request
+    hibernate_enabled: bool = False
+    hibernate_mode: str = "pause"
+    hibernate_idle_seconds: float = 600.0
+    hibernate_check_interval: float = 30.0
+
+    # Deployments: replica counts reconciled against load every
+    # autoscaler_interval seconds; specs persist to deployments_file
+    # (default: <data_dir>/deployments.json)
+    autoscaler_interval: float = 15.0
+    deployments_file: Optional[str] = None
+
+    # Background container stats collection (samples kept per container)
+    stats_history_size: int = 300
+
+    # Background host sampling; host_proc_path defaults to /host/proc if mounted
+    system_sample_interval: float = 1.0
+    system_history_size: int = 3600
+    host_proc_path: Optional[str] = None
+    # A mount of the host's root filesystem for disk usage; without one the
+    # orchestrator container's own filesystem is reported
+    host_disk_path: Optional[str] = None
+
+    # Maximum concurrent operations per batch request
+    batch_concurrency: int = 16
+
+    # Metric rollups: buckets kept per resolution (1 hour of 10s, 1 day of 1min)
+    timeseries_retention_10s: int = 360
+    timeseries_retention_1m: int = 1440
+    timeseries_persist_interval: int = 60
+    timeseries_file: Optional[str] = None
+
+    # Live stats streaming: snapshot period and idle keepalive period
+    stream_tick_interval: float = 1.0
+    stream_heartbeat_interval: float = 15.0
+
+    # Local state (port allocations, metric rollups)
+    data_dir: str = ".nubrix"
 
     # Port management
     port_start: int = 8000
     port_end: int = 9000
+    port_state_file: Optional[str] = None  # defaults to <data_dir>/ports.json
+    port_state_flush_interval: float = 1.0
+    port_probe_bind: bool = True
+
+    # Containers join container_network; with publish_ports off they bind no
+    # host port and are reached only through the gateway on that network
+    publish_ports: bool = True
+    container_network: Optional[str] = None
+
+    # Reverse-proxy gateway: /proxy/<container>/..., or <container>.<domain>
+    gateway_domain: Optional[str] = None
+    gateway_pool_size: int = 20  # keep-alive connections per upstream
+    gateway_timeout: float = 60.0
+    gateway_idle_timeout: float = 300.0
 
     # API settings
     api_host: str = "0.0.0.0"
@@ -1,5 +1,73 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
-from app.api import base, containers, monitoring
+from app.api import (
+    base,
+    batch,
+    containers,
+    deployments,
+    gateway,
+    metrics,
+    monitoring,
+    stats_v2,
+    stream,
+)
+from app.services.async_docker_service import (
+    close_async_docker_service,
+    get_async_docker_service,
+)
+from app.services.autoscaler import close_autoscaler, get_autoscaler
+from app.services.cluster import close_docker_cluster
+from app.services.events import close_event_stream, get_event_stream
+from app.services.gateway import GatewayHostMiddleware, close_gateway
+from app.services.hibernation import close_idle_manager, get_idle_manager
+from app.services.metrics import (
+    MetricsMiddleware,
+    close_loop_lag_monitor,
+    get_loop_lag_monitor,
+)
+from app.services.registry import get_container_registry
+from app.services.stats_collector import close_stats_collector, get_stats_collector
+from app.services.stats_hub import close_stats_hub, get_stats_hub
+from app.services.system_sampler import close_system_sampler, get_system_sampler
+from app.services.timeseries import close_timeseries_store, get_timeseries_store
+from app.services.warm_pool import close_warm_pool, get_warm_pool
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start background services and release shared resources on shutdown"""
+    await get_loop_lag_monitor().start()
+    get_system_sampler().start()
+    registry = get_container_registry()
+    collector = get_stats_collector()
+    get_event_stream().start()
+    docker_service = get_async_docker_service()
+    await docker_service.executor.run("list", registry.resync)
+    if registry.synced:
+        # Rebuild port allocations from what the daemon actually binds
+        await docker_service.executor.run(
+            "list", docker_service.service.reconcile_ports
+        )
+    collector.start()
+    get_timeseries_store().start()
+    await get_stats_hub().start()
+    await get_warm_pool().start()
+    await get_idle_manager().start()
+    await get_autoscaler().start()
+    yield
+    await close_autoscaler()
+    await close_gateway()
+    await close_idle_manager()
+    await close_warm_pool()
+    await close_stats_hub()
+    close_timeseries_store()
+    close_stats_collector()
+    close_event_stream()
+    close_system_sampler()
+    await close_async_docker_service()
+    close_docker_cluster()
+    await close_loop_lag_monitor()
+
 
 # Create FastAPI app
 app = FastAPI(
@@ -8,12 +76,25 @@ app = FastAPI(
     version="1.0.0",
     docs_url="/docs",
     redoc_url="/redoc",
+    lifespan=lifespan,
 )
 
+# Added first so MetricsMiddleware, the outermost, also times gateway traffic
+app.add_middleware(GatewayHostMiddleware)
+app.add_middleware(MetricsMiddleware)
+
 # Include routers
 app.include_router(base.router)
+# Registered before the containers router so /containers/batch/* is not
+# captured by /containers/{container_id}/*
+app.include_router(batch.router)
 app.include_router(containers.router)
+app.include_router(deployments.router)
 app.include_router(monitoring.router)
+app.include_router(stream.router)
+app.include_router(stats_v2.router)
+app.include_router(metrics.router)
+app.include_router(gateway.router)
 
 if __name__ == "__main__":
     import uvicorn
@@ -1,10 +1,71 @@
-from pydantic import BaseModel
-from typing import Dict, Optional
+from pydantic import BaseModel, Field, model_validator
+from typing import Dict, List, Optional
+
+
+class ContainerResources(BaseModel):
+    cpus: Optional[float] = Field(None, gt=0, description="CPU quota in cores")
+    memory_mb: Optional[int] = Field(None, ge=6, description="Hard memory limit")
+    memory_reservation_mb: Optional[int] = Field(
+        None, ge=6, description="Soft memory limit, reserved for admission"
+    )
+    pids_limit: Optional[int] = Field(None, ge=1)
+
+    def merged(self, defaults: "ContainerResources") -> "ContainerResources":
+        """These resources with unset fields taken from ``defaults``"""
+        return ContainerResources(
+            **{
+                field: (
+                    getattr(self, field)
+                    if getattr(self, field) is not None
+                    else getattr(defaults, field)
+                )
+                for field in ContainerResources.model_fields
+            }
+        )
 
 
 class ContainerCreateRequest(BaseModel):
     name: Optional[str] = None
     image: str = "base-api-server:latest"
+    resources: Optional[ContainerResources] = None
+
+
+class BatchCreateRequest(BaseModel):
+    count: int = Field(ge=1, le=500)
+    image: str = "base-api-server:latest"
+    name_prefix: Optional[str] = None
+    resources: Optional[ContainerResources] = None
+
+
+class DeploymentSpec(BaseModel):
+    """Desired replicas of one image, scaled between the bounds on load"""
+
+    image: str = "base-api-server:latest"
+    min_replicas: int = Field(1, ge=1)
+    max_replicas: int = Field(10, ge=1)
+    target_cpu_percent: Optional[float] = Field(
+        None, gt=0, description="Average container cpu_percent to hold"
+    )
+    target_requests_per_second: Optional[float] = Field(
+        None, gt=0, description="Gateway requests per second per replica to hold"
+    )
+    resources: Optional[ContainerResources] = None
+    tolerance: float = Field(
+        0.1, ge=0, lt=1, description="Load within this fraction of target is left"
+    )
+    scale_up_cooldown: float = Field(30.0, ge=0)
+    scale_down_cooldown: float = Field(300.0, ge=0)
+
+    @model_validator(mode="after")
+    def _check_bounds(self) -> "DeploymentSpec":
+        if self.max_replicas < self.min_replicas:
+            raise ValueError("max_replicas must be at least min_replicas")
+        return self
+
+
+class BatchSelector(BaseModel):
+    ids: List[str] = []
+    labels: List[str] = Field(default=[], description="key or key=value")
 
 
 class ContainerInfo(BaseModel):
@@ -15,6 +76,25 @@ class ContainerInfo(BaseModel):
     ports: Dict[str, str]
     created: str
     state: str
+    address: Optional[str] = None
+    node: Optional[str] = None
+    managed: bool = False  # created by the orchestrator
+    startup_seconds: Optional[float] = None
+
+
+class BatchItemResult(BaseModel):
+    id: str
+    success: bool
+    status_code: int
+    error: Optional[str] = None
+    container: Optional[ContainerInfo] = None
+
+
+class BatchResult(BaseModel):
+    total: int
+    succeeded: int
+    failed: int
+    results: List[BatchItemResult]
 
 
 class ContainerStats(BaseModel):
@@ -29,6 +109,12 @@ class ContainerStats(BaseModel):
     timestamp: float
 
 
+class ContainerStatsWindow(BaseModel):
+    container_id: str
+    name: str
+    samples: List[ContainerStats]
+
+
 class SystemStats(BaseModel):
     cpu_percent: float
     memory_percent: float
@@ -36,9 +122,168 @@ class SystemStats(BaseModel):
     memory_total: str
     disk_usage_percent: float
     timestamp: float
+    cpu_per_core: List[float] = []
+    disk_read_rate: float = 0.0
+    disk_write_rate: float = 0.0
+    net_rx_rate: float = 0.0
+    net_tx_rate: float = 0.0
+
+
+class SystemStatsHistory(BaseModel):
+    interval: float
+    samples: List[SystemStats]
+
+
+class ContainerStatsV2(BaseModel):
+    """Container statistics with raw byte counts and per-second rates"""
+
+    container_id: str
+    name: str
+    timestamp: float
+    cpu_percent: float
+    memory_usage: int
+    memory_limit: int
+    memory_percent: float
+    network_rx_bytes: int
+    network_tx_bytes: int
+    network_rx_rate: Optional[float] = None
+    network_tx_rate: Optional[float] = None
+    block_read_bytes: int
+    block_write_bytes: int
+    block_read_rate: Optional[float] = None
+    block_write_rate: Optional[float] = None
+    pids: int
+
+
+class ContainerStatsV2Window(BaseModel):
+    container_id: str
+    name: str
+    samples: List[ContainerStatsV2]
+
+
+class StatsHistory(BaseModel):
+    """Rolled-up statistics: metric -> aggregate -> one value per bucket"""
+
+    series: str
+    name: Optional[str] = None
+    resolution: int
+    step: int
+    timestamps: List[float]
+    counts: List[int]
+    metrics: Dict[str, Dict[str, List[Optional[float]]]]
+
+
+class SystemStatsV2(BaseModel):
+    """Host statistics with raw byte counts"""
+
+    timestamp: float
+    cpu_percent: float
+    cpu_per_core: List[float]
+    memory_percent: float
+    memory_used: int
+    memory_total: int
+    disk_usage_percent: float
+    disk_read_rate: float
+    disk_write_rate: float
+    net_rx_rate: float
+    net_tx_rate: float
+
+
+class SystemStatsV2History(BaseModel):
+    interval: float
+    samples: List[SystemStatsV2]
 
 
 class PortInfo(BaseModel):
     used_ports: list[int]
     available_range: str
     total_ports: int
+
+
+class WarmPoolImageStats(BaseModel):
+    target: int
+    idle: int
+    starting: int
+
+
+class WarmPoolStats(BaseModel):
+    enabled: bool
+    hits: int
+    misses: int
+    hit_ratio: float
+    created: int
+    evicted: int
+    failed: int
+    images: Dict[str, WarmPoolImageStats]
+
+
+class HibernationStats(BaseModel):
+    enabled: bool
+    mode: str
+    idle_seconds: float
+    tracked: int
+    hibernated: int
+    hibernations: int
+    wakes: int
+    wake_failures: int
+    last_wake_seconds: Optional[float]
+    wake_p50_seconds: Optional[float]
+    wake_p99_seconds: Optional[float]
+
+
+class AdmissionStats(BaseModel):
+    enabled: bool
+    admitted: int
+    rejected: int
+    timed_out: int
+    queued: int
+    pending: int
+    committed_cpus: float
+    committed_memory_mb: int
+    cpu_capacity: float
+    memory_capacity_mb: int
+    host_memory_available_mb: Optional[int]
+    host_cpu_percent: Optional[float]
+
+
+class NodeStats(BaseModel):
+    """Capacity and load of one Docker node, as seen by the scheduler"""
+
+    name: str
+    endpoint: Optional[str]
+    connected: bool
+    local: bool
+    cpus: Optional[float]
+    memory_mb: Optional[int]
+    running: int
+    reserved_cpus: float
+    reserved_memory_mb: int
+    memory_used_mb: Optional[int]
+    cpu_percent: Optional[float]
+    utilization: float
+
+
+class DeploymentStatus(BaseModel):
+    name: str
+    spec: DeploymentSpec
+    replicas: int
+    ready: int
+    desired: int
+    cpu_percent: Optional[float]
+    requests_per_second: Optional[float]
+    scale_ups: int
+    scale_downs: int
+    last_scale_time: Optional[float]
+    last_scale_reason: Optional[str]
+    containers: List[ContainerInfo]
+
+
+class RegistryStats(BaseModel):
+    synced: bool
+    fresh: bool
+    containers: int
+    last_sync: Optional[float]
+    last_event_time: Optional[float]
+    last_event_lag_seconds: Optional[float]
+    events_processed: int
+    resyncs: int
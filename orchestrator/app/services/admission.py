@@ -0,0 +1,240 @@
+import asyncio
+import logging
+import threading
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Deque, Dict, Optional, Tuple
+
+from app.core.config import settings
+from app.models.container import AdmissionStats, ContainerResources
+from app.services.cluster import DockerCluster, get_docker_cluster
+from app.services.scheduler import Demand, Scheduler, get_scheduler
+from app.services.system_sampler import SystemSampler, get_system_sampler
+
+logger = logging.getLogger(__name__)
+
+MB = 1024 * 1024
+
+
+class AdmissionRejected(RuntimeError):
+    """Raised when a create cannot be admitted
+
+    ``status_code`` is 429 when the admission queue is full and 503 when
+    the cluster lacks capacity; ``retry_after`` is a hint in seconds.
+    """
+
+    def __init__(self, reason: str, status_code: int, retry_after: float):
+        super().__init__(reason)
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """Admits container creates only while some node has room for them
+
+    Whether a create fits, and where, is the scheduler's call: a node
+    must have CPU and memory left to reserve within its overcommit ratios,
+    keep a memory floor free and stay below a CPU ceiling (see
+    ``Scheduler``). Creates admitted but not yet finished count against the
+    node they were placed on, so a burst does not all land on one node.
+
+    A create that fits nowhere waits in a FIFO queue of at most
+    ``queue_size`` entries for up to ``queue_timeout`` seconds, re-checked
+    whenever an admitted create finishes and on every host sample. A full
+    queue rejects with 429, a timeout with 503. Only the head of the queue
+    is admitted, so large requests are not starved by small ones.
+    """
+
+    def __init__(
+        self,
+        docker_service: DockerCluster,
+        scheduler: Scheduler,
+        sampler: SystemSampler,
+        enabled: bool = True,
+        default_memory_mb: int = 256,
+        queue_size: int = 32,
+        queue_timeout: float = 10.0,
+    ):
+        self.docker_service = docker_service
+        self.scheduler = scheduler
+        self.sampler = sampler
+        self.enabled = enabled
+        self.default_memory_mb = default_memory_mb
+        self.queue_size = queue_size
+        self.queue_timeout = queue_timeout
+        self.admitted = 0
+        self.rejected = 0
+        self.timed_out = 0
+        self._pending: Dict[str, Demand] = {}
+        self._waiters: Deque[object] = deque()
+        self._changed: Optional[asyncio.Event] = None
+
+    @asynccontextmanager
+    async def admit(
+        self,
+        resources: Optional[ContainerResources] = None,
+        image: Optional[str] = None,
+    ) -> AsyncIterator[Optional[str]]:
+        """Hold a place for one create and yield the node to create it on
+
+        Waits in the queue or raises AdmissionRejected. ``image`` lets the
+        scheduler prefer nodes that already have it.
+        """
+        demand = self.demand(resources)
+        if not self.enabled:
+            node, _ = self.scheduler.place(
+                demand, self._pending, enforce=False, image=image
+            )
+            yield node
+            return
+        node = await self._acquire(demand, image)
+        try:
+            yield node
+        finally:
+            self._release(node, demand)
+
+    def has_capacity(self, resources: Optional[ContainerResources] = None) -> bool:
+        """Whether a create would be admitted right now without queueing"""
+        if not self.enabled:
+            return True
+        node, _ = self._check(self.demand(resources))
+        return not self._waiters and node is not None
+
+    def demand(self, resources: Optional[ContainerResources] = None) -> Demand:
+        resources = self.docker_service.effective_resources(resources)
+        reserved = resources.memory_reservation_mb or resources.memory_mb or 0
+        return Demand(
+            resources.cpus or 0.0,
+            reserved,
+            reserved or self.default_memory_mb,
+        )
+
+    def stats(self) -> AdmissionStats:
+        """Admission counters, commitments and host headroom"""
+        loads = self.scheduler.nodes(self._pending)
+        sample = self.sampler.latest_v2()
+        return AdmissionStats(
+            enabled=self.enabled,
+            admitted=self.admitted,
+            rejected=self.rejected,
+            timed_out=self.timed_out,
+            queued=len(self._waiters),
+            pending=sum(demand.containers for demand in self._pending.values()),
+            committed_cpus=round(sum(load.reserved_cpus for load in loads), 3),
+            committed_memory_mb=sum(load.reserved_memory_mb for load in loads),
+            cpu_capacity=sum(
+                load.cpus * self.scheduler.cpu_overcommit for load in loads if load.cpus
+            ),
+            memory_capacity_mb=sum(
+                int(load.memory_mb * self.scheduler.memory_overcommit)
+                for load in loads
+                if load.memory_mb
+            ),
+            host_memory_available_mb=(
+                (sample.memory_total - sample.memory_used) // MB if sample else None
+            ),
+            host_cpu_percent=sample.cpu_percent if sample else None,
+        )
+
+    def _check(
+        self, demand: Demand, image: Optional[str] = None
+    ) -> Tuple[Optional[str], Optional[str]]:
+        """The node ``demand`` fits on now, or None and why it fits nowhere"""
+        return self.scheduler.place(demand, self._pending, image=image)
+
+    async def _acquire(self, demand: Demand, image: Optional[str] = None) -> str:
+        if not self.scheduler.could_fit(demand):
+            self.rejected += 1
+            raise AdmissionRejected(
+                "Requested resources exceed the capacity of every node",
+                503,
+                self.queue_timeout,
+            )
+        if not self._waiters:
+            node, _ = self._check(demand, image)
+            if node is not None:
+                self._take(node, demand)
+                return node
+        if len(self._waiters) >= self.queue_size:
+            self.rejected += 1
+            raise AdmissionRejected(
+                f"Admission queue full ({self.queue_size} creates waiting)",
+                429,
+                self.queue_timeout,
+            )
+
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.queue_timeout
+        token = object()
+        self._waiters.append(token)
+        try:
+            while True:
+                reason = None
+                if self._waiters[0] is token:
+                    node, reason = self._check(demand, image)
+                    if node is not None:
+                        self._take(node, demand)
+                        return node
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    self.timed_out += 1
+                    raise AdmissionRejected(
+                        f"Insufficient capacity: {reason or 'queued behind others'}",
+                        503,
+                        self.queue_timeout,
+                    )
+                try:
+                    await asyncio.wait_for(
+                        self._changed_event().wait(),
+                        timeout=min(remaining, self.sampler.interval),
+                    )
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            self._waiters.remove(token)
+            self._notify()
+
+    def _take(self, node: str, demand: Demand):
+        self.admitted += 1
+        self._pending.setdefault(node, Demand(containers=0)).add(demand)
+
+    def _release(self, node: str, demand: Demand):
+        pending = self._pending.get(node)
+        if pending is not None:
+            pending.add(demand, -1)
+            if pending.containers <= 0:
+                del self._pending[node]
+        self._notify()
+
+    def _changed_event(self) -> asyncio.Event:
+        if self._changed is None:
+            self._changed = asyncio.Event()
+        return self._changed
+
+    def _notify(self):
+        """Wake every queued create to re-check"""
+        if self._changed is not None:
+            self._changed.set()
+            self._changed = None
+
+
+_admission: Optional[AdmissionController] = None
+_admission_lock = threading.Lock()
+
+
+def get_admission_controller() -> AdmissionController:
+    """Return the process-wide AdmissionController, creating it on first use"""
+    global _admission
+    if _admission is None:
+        with _admission_lock:
+            if _admission is None:
+                _admission = AdmissionController(
+                    get_docker_cluster(),
+                    get_scheduler(),
+                    get_system_sampler(),
+                    enabled=settings.admission_enabled,
+                    default_memory_mb=settings.admission_default_memory_mb,
+                    queue_size=settings.admission_queue_size,
+                    queue_timeout=settings.admission_queue_timeout,
+                )
+    return _admission
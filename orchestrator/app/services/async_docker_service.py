@@ -0,0 +1,210 @@
+import threading
+import time
+from typing import Dict, List, Optional, Union
+from app.core.config import settings
+from app.models.container import (
+    ContainerInfo,
+    ContainerResources,
+    ContainerStats,
+    ContainerStatsV2,
+)
+from app.services.cluster import DockerCluster, get_docker_cluster
+from app.services.executor import DockerExecutor
+from app.services.readiness import ReadinessProbe
+
+
+class AsyncDockerService:
+    """Awaitable facade over DockerCluster for use in async handlers
+
+    The wrapped DockerCluster stays synchronous; each call is dispatched to
+    a DockerExecutor so that slow daemon round-trips never run on the event
+    loop.
+    """
+
+    def __init__(
+        self,
+        service: DockerCluster,
+        executor: DockerExecutor,
+        readiness: Optional[ReadinessProbe] = None,
+    ):
+        self.service = service
+        self.executor = executor
+        self.readiness = readiness
+
+    async def is_available(self) -> bool:
+        """Check if Docker service is available"""
+        if self.service.is_connected():
+            return True
+        return await self.executor.run("connect", self.service.is_available)
+
+    async def ping(self) -> bool:
+        """Check that the daemon still answers"""
+        return await self.executor.run("ping", self.service.ping)
+
+    async def create_container(
+        self,
+        image: str,
+        name: Optional[str] = None,
+        labels: Optional[Dict[str, str]] = None,
+        resources: Optional[ContainerResources] = None,
+        node: Optional[str] = None,
+    ) -> ContainerInfo:
+        """Create a new container on ``node`` and wait until it is ready to serve"""
+        since = time.time()
+        info = await self.executor.run(
+            "create",
+            self.service.create_container,
+            image,
+            name,
+            labels,
+            resources,
+            node,
+        )
+        if self.readiness is not None:
+            startup = await self.readiness.wait(self.service, info, since)
+            info.startup_seconds = round(startup, 3)
+        return info
+
+    async def list_containers(
+        self,
+        all_containers: bool = True,
+        status: Optional[str] = None,
+        labels: Optional[List[str]] = None,
+        name_prefix: Optional[str] = None,
+        limit: Optional[int] = None,
+        offset: int = 0,
+    ) -> List[ContainerInfo]:
+        """List containers"""
+        return await self.executor.run(
+            "list",
+            self.service.list_containers,
+            all_containers,
+            status,
+            labels,
+            name_prefix,
+            limit,
+            offset,
+        )
+
+    async def get_container(self, container_id: str) -> ContainerInfo:
+        """Get specific container"""
+        return await self.executor.run(
+            "inspect", self.service.get_container, container_id
+        )
+
+    async def find_containers(
+        self, name_prefix: str, label: Optional[str] = None
+    ) -> List[ContainerInfo]:
+        """List containers whose name starts with ``name_prefix``"""
+        return await self.executor.run(
+            "list", self.service.find_containers, name_prefix, label
+        )
+
+    async def rename_container(self, container_id: str, name: str) -> ContainerInfo:
+        """Rename a container"""
+        return await self.executor.run(
+            "rename", self.service.rename_container, container_id, name
+        )
+
+    async def get_container_stats(self, container_id: str) -> ContainerStats:
+        """Get real-time statistics for a container"""
+        return await self.executor.run(
+            "stats", self.service.get_container_stats_by_id, container_id
+        )
+
+    async def get_container_stats_v2(self, container_id: str) -> ContainerStatsV2:
+        """Get one numeric statistics sample for a container"""
+        return await self.executor.run(
+            "stats", self.service.get_container_stats_v2_by_id, container_id
+        )
+
+    async def stop_container(self, container_id: str) -> Union[bool, None]:
+        """Stop a container"""
+        return await self.executor.run(
+            "stop", self.service.stop_container, container_id
+        )
+
+    async def stop_container_ports(self, container_id: str) -> List[int]:
+        """Stop a container, returning the host ports it had bound"""
+        return await self.executor.run(
+            "stop", self.service.stop_container_ports, container_id
+        )
+
+    async def start_container(self, container_id: str) -> Union[bool, None]:
+        """Start a stopped container"""
+        return await self.executor.run(
+            "start", self.service.start_container, container_id
+        )
+
+    async def pause_container(self, container_id: str) -> bool:
+        """Pause a running container"""
+        return await self.executor.run(
+            "stop", self.service.pause_container, container_id
+        )
+
+    async def unpause_container(self, container_id: str) -> bool:
+        """Resume a paused container"""
+        return await self.executor.run(
+            "start", self.service.unpause_container, container_id
+        )
+
+    async def remove_container(self, container_id: str) -> Union[bool, None]:
+        """Remove a container"""
+        return await self.executor.run(
+            "remove", self.service.remove_container, container_id
+        )
+
+    async def remove_container_ports(self, container_id: str) -> List[int]:
+        """Remove a container, returning the host ports to release"""
+        return await self.executor.run(
+            "remove", self.service.remove_container_ports, container_id
+        )
+
+    def release_ports(self, ports: List[int]):
+        """Release host ports in bulk"""
+        self.service.port_manager.release_ports(ports)
+
+    def get_port_info(self):
+        """Get port usage information"""
+        return self.service.get_port_info()
+
+
+_async_docker_service: Optional[AsyncDockerService] = None
+_async_docker_service_lock = threading.Lock()
+
+
+def get_async_docker_service() -> AsyncDockerService:
+    """Return the process-wide AsyncDockerService, creating it on first use"""
+    global _async_docker_service
+    if _async_docker_service is None:
+        with _async_docker_service_lock:
+            if _async_docker_service is None:
+                executor = DockerExecutor(
+                    max_workers=settings.docker_executor_workers,
+                    limits=settings.docker_operation_limits,
+                )
+                _async_docker_service = AsyncDockerService(
+                    get_docker_cluster(),
+                    executor,
+                    ReadinessProbe(
+                        executor,
+                        host=settings.readiness_host,
+                        path=settings.readiness_path,
+                        timeout=settings.readiness_timeout,
+                        initial_backoff=settings.readiness_initial_backoff,
+                        max_backoff=settings.readiness_max_backoff,
+                        pool_size=settings.readiness_pool_size,
+                    ),
+                )
+    return _async_docker_service
+
+
+async def close_async_docker_service():
+    """Release the process-wide AsyncDockerService"""
+    global _async_docker_service
+    with _async_docker_service_lock:
+        service, _async_docker_service = _async_docker_service, None
+    if service is not None:
+        if service.readiness is not None:
+            await service.readiness.close()
+        service.executor.shutdown()
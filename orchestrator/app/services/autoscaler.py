@@ -0,0 +1,454 @@
+import asyncio
+import json
+import logging
+import math
+import os
+import re
+import threading
+import time
+import uuid
+from collections import deque
+from typing import Deque, Dict, List, Optional, Tuple
+
+from app.core.config import settings
+from app.models.container import ContainerInfo, DeploymentSpec, DeploymentStatus
+from app.services.async_docker_service import (
+    AsyncDockerService,
+    get_async_docker_service,
+)
+from app.services.gateway import Gateway, get_gateway
+from app.services.hibernation import IdleManager, get_idle_manager
+from app.services.metrics import DEPLOYMENT_SCALE_EVENTS
+from app.services.registry import ContainerRegistry, get_container_registry
+from app.services.stats_collector import StatsCollector, get_stats_collector
+from app.services.warm_pool import WarmPool, get_warm_pool
+
+logger = logging.getLogger(__name__)
+
+# Lowercase words joined by single hyphens, so "--" can separate the suffix
+DEPLOYMENT_NAME_PATTERN = r"^[a-z0-9]+(-[a-z0-9]+)*$"
+REPLICA_SEPARATOR = "--"
+
+
+class Deployment:
+    """A deployment's spec and what the autoscaler tracks for it"""
+
+    __slots__ = (
+        "name",
+        "spec",
+        "lock",
+        "desired",
+        "recommendations",
+        "request_counts",
+        "sampled_at",
+        "cpu_percent",
+        "requests_per_second",
+        "scale_ups",
+        "scale_downs",
+        "last_scaled",
+        "last_scale_time",
+        "last_scale_reason",
+    )
+
+    def __init__(self, name: str, spec: DeploymentSpec):
+        self.name = name
+        self.spec = spec
+        self.lock = asyncio.Lock()
+        self.desired: Optional[int] = None
+        self.recommendations: Deque[Tuple[float, int]] = deque()
+        self.request_counts: Dict[str, int] = {}
+        self.sampled_at: Optional[float] = None
+        self.cpu_percent: Optional[float] = None
+        self.requests_per_second: Optional[float] = None
+        self.scale_ups = 0
+        self.scale_downs = 0
+        self.last_scaled: Optional[float] = None
+        self.last_scale_time: Optional[float] = None
+        self.last_scale_reason: Optional[str] = None
+
+    @property
+    def prefix(self) -> str:
+        return self.name + REPLICA_SEPARATOR
+
+
+class Autoscaler:
+    """Keeps each deployment's replica count in line with its load
+
+    A deployment runs between ``min_replicas`` and ``max_replicas``
+    containers of one image, named ``<deployment>--<suffix>``. As with warm
+    pool membership, the name is what ties a container to its deployment,
+    so a warm container renamed on hand-out joins it like a fresh one.
+
+    Every ``interval`` seconds each deployment is reconciled. Load is the
+    average ``cpu_percent`` of its running replicas, from the stats
+    collector, and the gateway requests per second per replica; each is
+    divided by its target and the higher ratio wins. As in the Kubernetes
+    HPA the new count is ``ceil(desired * ratio)`` within the bounds, and a
+    ratio within ``tolerance`` of 1 changes nothing. Scaling up waits
+    ``scale_up_cooldown`` after the previous change; scaling down waits
+    ``scale_down_cooldown`` and goes no lower than the highest count
+    recommended during that window, so a brief dip does not drop replicas
+    a returning peak needs again. Replicas that exited without being
+    hibernated are removed and replaced straight away.
+
+    Scale-ups go through the warm pool, which hands out a pre-started
+    container when it has one for the image, and otherwise through
+    admission, whose scheduler prefers nodes that already have the image.
+    Scale-downs remove paused and stopped replicas first, then the newest.
+
+    Specs are persisted to ``path``, so deployments survive a restart.
+    """
+
+    def __init__(
+        self,
+        docker_service: AsyncDockerService,
+        registry: ContainerRegistry,
+        collector: StatsCollector,
+        warm_pool: WarmPool,
+        gateway: Gateway,
+        idle_manager: IdleManager,
+        interval: float = 15.0,
+        path: Optional[str] = None,
+    ):
+        self.docker_service = docker_service
+        self.registry = registry
+        self.collector = collector
+        self.warm_pool = warm_pool
+        self.gateway = gateway
+        self.idle_manager = idle_manager
+        self.interval = interval
+        self.path = path
+        self._deployments: Dict[str, Deployment] = {}
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        if path:
+            self._load()
+
+    async def start(self):
+        if self._task is None:
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop reconciling; replicas keep running for the next process"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def apply(self, name: str, spec: DeploymentSpec):
+        """Create a deployment or replace its spec; reconciled right away"""
+        if not re.match(DEPLOYMENT_NAME_PATTERN, name):
+            raise ValueError(
+                f"Deployment name must match {DEPLOYMENT_NAME_PATTERN}: {name}"
+            )
+        deployment = self._deployments.get(name)
+        if deployment is None:
+            self._deployments[name] = Deployment(name, spec)
+        else:
+            deployment.spec = spec
+        self._save()
+        self._signal()
+
+    async def delete(self, name: str) -> int:
+        """Drop a deployment and remove its replicas; returns how many"""
+        deployment = self._deployments.pop(name, None)
+        if deployment is None:
+            raise KeyError(name)
+        self._save()
+        async with deployment.lock:
+            replicas = await self._replicas(deployment)
+            await self._remove(replicas)
+        logger.info(f"Deleted deployment {name} and {len(replicas)} replicas")
+        return len(replicas)
+
+    async def status(self, name: str) -> DeploymentStatus:
+        deployment = self._deployments.get(name)
+        if deployment is None:
+            raise KeyError(name)
+        replicas = await self._replicas(deployment)
+        return DeploymentStatus(
+            name=name,
+            spec=deployment.spec,
+            replicas=len(replicas),
+            ready=sum(1 for info in replicas if info.state == "running"),
+            desired=(
+                deployment.desired
+                if deployment.desired is not None
+                else deployment.spec.min_replicas
+            ),
+            cpu_percent=deployment.cpu_percent,
+            requests_per_second=deployment.requests_per_second,
+            scale_ups=deployment.scale_ups,
+            scale_downs=deployment.scale_downs,
+            last_scale_time=deployment.last_scale_time,
+            last_scale_reason=deployment.last_scale_reason,
+            containers=sorted(replicas, key=lambda info: info.name),
+        )
+
+    async def statuses(self) -> List[DeploymentStatus]:
+        return [await self.status(name) for name in sorted(self._deployments)]
+
+    async def reconcile(self, name: str):
+        """Bring one deployment's replicas in line with its spec and load"""
+        deployment = self._deployments.get(name)
+        if deployment is None:
+            return
+        async with deployment.lock:
+            replicas = await self._replicas(deployment)
+            crashed = [
+                info
+                for info in replicas
+                if info.state in ("exited", "dead")
+                and not self.idle_manager.is_hibernated(info.id)
+            ]
+            if crashed:
+                logger.warning(
+                    f"Replacing {len(crashed)} exited replicas of {deployment.name}"
+                )
+                await self._remove(crashed)
+                crashed_ids = {info.id for info in crashed}
+                replicas = [info for info in replicas if info.id not in crashed_ids]
+
+            current = (
+                deployment.desired if deployment.desired is not None else len(replicas)
+            )
+            desired, reason = self._desired(deployment, current, replicas)
+            deployment.desired = desired
+            if desired != current:
+                self._record(deployment, current, desired, reason)
+
+            if desired > len(replicas):
+                await self._scale_up(deployment, desired - len(replicas))
+            elif desired < len(replicas):
+                await self._remove(self._victims(replicas, len(replicas) - desired))
+
+    def _desired(
+        self, deployment: Deployment, current: int, replicas: List[ContainerInfo]
+    ) -> Tuple[int, str]:
+        """Replica count to run instead of ``current``, and why"""
+        spec = deployment.spec
+        now = time.monotonic()
+        ratio, load = self._measure(deployment, replicas, now)
+
+        proposal = current
+        if ratio is not None and abs(ratio - 1) > spec.tolerance:
+            proposal = math.ceil(current * ratio)
+        proposal = min(max(proposal, spec.min_replicas), spec.max_replicas)
+        deployment.recommendations.append((now, proposal))
+        cutoff = now - spec.scale_down_cooldown
+        while deployment.recommendations[0][0] < cutoff:
+            deployment.recommendations.popleft()
+
+        if current < spec.min_replicas:
+            return spec.min_replicas, f"below min_replicas {spec.min_replicas}"
+        if current > spec.max_replicas:
+            return spec.max_replicas, f"above max_replicas {spec.max_replicas}"
+        since_scaled = (
+            now - deployment.last_scaled
+            if deployment.last_scaled is not None
+            else math.inf
+        )
+        if proposal > current and since_scaled >= spec.scale_up_cooldown:
+            return proposal, load
+        stable = max(count for _, count in deployment.recommendations)
+        if stable < current and since_scaled >= spec.scale_down_cooldown:
+            return stable, load
+        return current, load
+
+    def _measure(
+        self, deployment: Deployment, replicas: List[ContainerInfo], now: float
+    ) -> Tuple[Optional[float], str]:
+        """Highest load-to-target ratio, or None without a measured target"""
+        spec = deployment.spec
+        samples = [
+            self.collector.latest(info.id)
+            for info in replicas
+            if info.state == "running"
+        ]
+        cpu = [sample.cpu_percent for sample in samples if sample is not None]
+        deployment.cpu_percent = round(sum(cpu) / len(cpu), 2) if cpu else None
+
+        # Request counts only grow until the gateway drops an idle pool
+        counts = {info.id: self.gateway.request_count(info) for info in replicas}
+        if deployment.sampled_at is not None and now > deployment.sampled_at:
+            requests = 0
+            for container_id, count in counts.items():
+                previous = deployment.request_counts.get(container_id, 0)
+                requests += count - previous if count >= previous else count
+            deployment.requests_per_second = round(
+                requests / (now - deployment.sampled_at) / max(len(replicas), 1), 3
+            )
+        deployment.request_counts = counts
+        deployment.sampled_at = now
+
+        ratios = []
+        loads = []
+        if spec.target_cpu_percent and deployment.cpu_percent is not None:
+            ratios.append(deployment.cpu_percent / spec.target_cpu_percent)
+            loads.append(
+                f"cpu {deployment.cpu_percent:g}% of {spec.target_cpu_percent:g}%"
+            )
+        if (
+            spec.target_requests_per_second
+            and deployment.requests_per_second is not None
+        ):
+            ratios.append(
+                deployment.requests_per_second / spec.target_requests_per_second
+            )
+            loads.append(
+                f"{deployment.requests_per_second:g} req/s per replica "
+                f"of {spec.target_requests_per_second:g}"
+            )
+        return (max(ratios) if ratios else None), ", ".join(loads) or "no load target"
+
+    def _record(self, deployment: Deployment, previous: int, desired: int, reason: str):
+        direction = "up" if desired > previous else "down"
+        if direction == "up":
+            deployment.scale_ups += 1
+        else:
+            deployment.scale_downs += 1
+        deployment.last_scaled = time.monotonic()
+        deployment.last_scale_time = time.time()
+        deployment.last_scale_reason = f"{previous} -> {desired}: {reason}"
+        DEPLOYMENT_SCALE_EVENTS.labels(deployment.name, direction).inc()
+        logger.info(f"Scaling {deployment.name} {deployment.last_scale_reason}")
+
+    async def _scale_up(self, deployment: Deployment, count: int):
+        spec = deployment.spec
+        names = [f"{deployment.prefix}{uuid.uuid4().hex[:8]}" for _ in range(count)]
+        results = await asyncio.gather(
+            *(
+                self.warm_pool.provision(spec.image, name, spec.resources)
+                for name in names
+            ),
+            return_exceptions=True,
+        )
+        for name, result in zip(names, results):
+            if isinstance(result, Exception):
+                # Retried on the next pass, since the desired count stands
+                logger.error(f"Failed to create replica {name}: {result}")
+
+    @staticmethod
+    def _victims(replicas: List[ContainerInfo], count: int) -> List[ContainerInfo]:
+        """Replicas to remove: hibernated or stopped ones first, then newest"""
+        newest_first = sorted(replicas, key=lambda info: info.created, reverse=True)
+        newest_first.sort(key=lambda info: info.state == "running")
+        return newest_first[:count]
+
+    async def _remove(self, replicas: List[ContainerInfo]):
+        async def remove(info: ContainerInfo):
+            try:
+                self.idle_manager.forget(info.id)
+                if info.state != "exited":
+                    await self.docker_service.stop_container(info.id)
+                await self.docker_service.remove_container(info.id)
+            except Exception as e:
+                logger.error(f"Failed to remove replica {info.name}: {e}")
+
+        await asyncio.gather(*(remove(info) for info in replicas))
+
+    async def _replicas(self, deployment: Deployment) -> List[ContainerInfo]:
+        if self.registry.fresh:
+            replicas = self.registry.list(
+                all_containers=True, name_prefix=deployment.prefix
+            )
+        else:
+            replicas = await self.docker_service.list_containers(
+                all_containers=True, name_prefix=deployment.prefix
+            )
+        return [
+            info for info in replicas if info is not None and info.state != "removing"
+        ]
+
+    def _signal(self):
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def _run(self):
+        while True:
+            for name in list(self._deployments):
+                try:
+                    await self.reconcile(name)
+                except Exception as e:
+                    logger.error(f"Failed to reconcile deployment {name}: {e}")
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+    def _load(self):
+        try:
+            with open(self.path) as state:
+                specs = json.load(state)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            logger.error(f"Ignoring unreadable deployments {self.path}: {e}")
+            return
+        for name, spec in specs.items():
+            try:
+                self._deployments[name] = Deployment(
+                    name, DeploymentSpec.model_validate(spec)
+                )
+            except ValueError as e:
+                logger.error(f"Ignoring invalid deployment {name}: {e}")
+        logger.info(f"Loaded {len(self._deployments)} deployments from {self.path}")
+
+    def _save(self):
+        """Write every spec atomically"""
+        if not self.path:
+            return
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        try:
+            with open(tmp_path, "w") as state:
+                json.dump(
+                    {
+                        name: deployment.spec.model_dump(exclude_none=True)
+                        for name, deployment in self._deployments.items()
+                    },
+                    state,
+                )
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.error(f"Failed to persist deployments: {e}")
+
+
+_autoscaler: Optional[Autoscaler] = None
+_autoscaler_lock = threading.Lock()
+
+
+def get_autoscaler() -> Autoscaler:
+    """Return the process-wide Autoscaler, creating it on first use"""
+    global _autoscaler
+    if _autoscaler is None:
+        with _autoscaler_lock:
+            if _autoscaler is None:
+                _autoscaler = Autoscaler(
+                    get_async_docker_service(),
+                    get_container_registry(),
+                    get_stats_collector(),
+                    get_warm_pool(),
+                    get_gateway(),
+                    get_idle_manager(),
+                    interval=settings.autoscaler_interval,
+                    path=settings.deployments_file
+                    or os.path.join(settings.data_dir, "deployments.json"),
+                )
+    return _autoscaler
+
+
+async def close_autoscaler():
+    """Stop the process-wide Autoscaler's control loop"""
+    global _autoscaler
+    with _autoscaler_lock:
+        autoscaler, _autoscaler = _autoscaler, None
+    if autoscaler is not None:
+        await autoscaler.stop()
@@ -0,0 +1,491 @@
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, List, Optional, Union
+from urllib.parse import urlparse
+
+import docker
+
+from app.core.config import settings
+from app.models.container import (
+    ContainerInfo,
+    ContainerResources,
+    ContainerStats,
+    ContainerStatsV2,
+)
+from app.services.docker_service import DockerService
+from app.utils.port_manager import PortManager
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_NODE = "default"
+
+
+def endpoint_host(base_url: Optional[str]) -> Optional[str]:
+    """Host part of a Docker endpoint URL, or None for a local socket"""
+    if not base_url or base_url.startswith(("unix://", "npipe://")):
+        return None
+    return urlparse(base_url if "://" in base_url else f"tcp://{base_url}").hostname
+
+
+class DockerCluster:
+    """One or more Docker daemons behind the DockerService interface
+
+    Every node is a DockerService with its own connection pool; they share
+    one PortManager, so a host port is never handed out twice even when
+    several nodes run on one machine. Listing calls fan out to every node
+    concurrently and merge the results newest first, tagging each raw
+    summary with a ``Node`` key. Per-container calls go to the node the
+    container lives on, found in a location cache that is filled from
+    creates, listings and events, and otherwise by asking every node.
+
+    Placement is not decided here: ``create_container`` takes the node the
+    scheduler picked and falls back to the first connected node.
+    """
+
+    def __init__(
+        self,
+        nodes: Dict[str, DockerService],
+        port_manager: PortManager,
+        workers: int = 32,
+    ):
+        if not nodes:
+            raise ValueError("A cluster needs at least one node")
+        self.nodes = dict(nodes)
+        self.port_manager = port_manager
+        self._locations: Dict[str, str] = {}
+        self._locations_lock = threading.Lock()
+        self._pool = (
+            ThreadPoolExecutor(max_workers=workers, thread_name_prefix="docker-fanout")
+            if len(self.nodes) > 1
+            else None
+        )
+
+    @property
+    def default(self) -> DockerService:
+        """The first connected node, in configuration order"""
+        for service in self.nodes.values():
+            if service.is_connected():
+                return service
+        return next(iter(self.nodes.values()))
+
+    @property
+    def publish_ports(self) -> bool:
+        return self.default.publish_ports
+
+    def node_host(self, node: Optional[str]) -> Optional[str]:
+        """Address a node's published ports are reached at, if not the default"""
+        service = self.nodes.get(node) if node else None
+        return service.host if service is not None else None
+
+    def is_remote(self, node: Optional[str]) -> bool:
+        """Whether a node publishes its ports on another machine"""
+        service = self.nodes.get(node) if node else None
+        return service.remote if service is not None else False
+
+    def is_available(self) -> bool:
+        """Check if any node is available"""
+        return any(service.is_available() for service in self.nodes.values())
+
+    def is_connected(self) -> bool:
+        """Check for a live client on any node without reconnecting"""
+        return any(service.is_connected() for service in self.nodes.values())
+
+    def ping(self) -> bool:
+        """Check that at least one daemon still answers"""
+        return any(
+            result is True
+            for result in self._fan_out(lambda service: service.ping()).values()
+        )
+
+    def close(self):
+        """Close every node's connection pool"""
+        for service in self.nodes.values():
+            service.close()
+        self.port_manager.close()
+        if self._pool is not None:
+            self._pool.shutdown(wait=False)
+
+    def effective_resources(
+        self, resources: Optional[ContainerResources] = None
+    ) -> ContainerResources:
+        """Requested resources with unset fields taken from the defaults"""
+        return self.default.effective_resources(resources)
+
+    def locate(self, container_ref: str) -> DockerService:
+        """The node a container lives on, raising NotFound if none has it"""
+        if len(self.nodes) == 1:
+            return next(iter(self.nodes.values()))
+        node = self._locations.get(container_ref.lstrip("/"))
+        if node in self.nodes:
+            return self.nodes[node]
+
+        # A node that is down cannot serve the container either way
+        connected = [
+            name for name, service in self.nodes.items() if service.is_connected()
+        ]
+        results = self._fan_out(
+            lambda service: service.get_container(container_ref), connected or None
+        )
+        for node, result in results.items():
+            if isinstance(result, ContainerInfo):
+                self._remember(node, result.id, result.name)
+                return self.nodes[node]
+        for result in results.values():
+            if isinstance(result, Exception) and not isinstance(
+                result, docker.errors.NotFound
+            ):
+                raise result
+        raise docker.errors.NotFound(f"No such container: {container_ref}")
+
+    def create_container(
+        self,
+        image: str,
+        name: Optional[str] = None,
+        labels: Optional[Dict[str, str]] = None,
+        resources: Optional[ContainerResources] = None,
+        node: Optional[str] = None,
+    ) -> ContainerInfo:
+        """Create a container on ``node``, or on the first connected node"""
+        service = self.nodes[node] if node else self.default
+        info = service.create_container(image, name, labels, resources)
+        self._remember(service.node, info.id, info.name)
+        return info
+
+    def wait_for_event(
+        self, container_id: str, event: str, since: float, until: float
+    ) -> bool:
+        """Block until the container's node reports ``event`` for it"""
+        return self._on_node(
+            container_id,
+            lambda service: service.wait_for_event(container_id, event, since, until),
+        )
+
+    def get_container_info_from_summary(self, summary: dict) -> ContainerInfo:
+        """Build ContainerInfo from a summary tagged with its ``Node``"""
+        service = self.nodes.get(summary.get("Node")) or self.default
+        return service.get_container_info_from_summary(summary)
+
+    def list_container_summaries(
+        self,
+        all_containers: bool = True,
+        filters: Optional[Dict[str, Union[str, List[str]]]] = None,
+        limit: Optional[int] = None,
+    ) -> List[dict]:
+        """Raw ``/containers/json`` entries of every node, newest first
+
+        A node that fails is left out and logged, unless every node fails.
+        A lookup by a known container ID only asks that container's node.
+        """
+        nodes = None
+        container_id = (filters or {}).get("id")
+        if isinstance(container_id, str) and len(self.nodes) > 1:
+            node = self._locations.get(container_id)
+            if node in self.nodes:
+                nodes = [node]
+
+        results = self._fan_out(
+            lambda service: service.list_container_summaries(
+                all_containers, filters, limit
+            ),
+            nodes,
+        )
+        summaries: List[dict] = []
+        errors = []
+        for node, result in results.items():
+            if isinstance(result, Exception):
+                errors.append((node, result))
+                continue
+            for summary in result:
+                summary["Node"] = node
+            self._remember_summaries(node, result)
+            summaries.extend(result)
+        if errors and len(errors) == len(results):
+            raise errors[0][1]
+        for node, error in errors:
+            logger.warning(f"Listing containers on node {node} failed: {error}")
+
+        if len(results) > 1:
+            summaries.sort(
+                key=lambda summary: (summary.get("Created", 0), summary["Id"]),
+                reverse=True,
+            )
+            if limit is not None:
+                del summaries[limit:]
+        return summaries
+
+    def list_containers(
+        self,
+        all_containers: bool = True,
+        status: Optional[str] = None,
+        labels: Optional[List[str]] = None,
+        name_prefix: Optional[str] = None,
+        limit: Optional[int] = None,
+        offset: int = 0,
+    ) -> List[ContainerInfo]:
+        """List containers of every node, newest first
+
+        Each node is asked for at most ``offset + limit`` entries, so the
+        merged page is exact.
+        """
+        if limit is not None and not all_containers and not status:
+            # The daemon includes stopped containers whenever a limit is set
+            status = "running"
+        summaries = self.list_container_summaries(
+            all_containers=all_containers,
+            filters=DockerService.build_list_filters(status, labels, name_prefix),
+            limit=offset + limit if limit is not None else None,
+        )
+        return [
+            self.get_container_info_from_summary(summary)
+            for summary in summaries[offset:]
+        ]
+
+    def find_containers(
+        self, name_prefix: str, label: Optional[str] = None
+    ) -> List[ContainerInfo]:
+        """List containers whose name starts with ``name_prefix``"""
+        return self.list_containers(
+            name_prefix=name_prefix, labels=[label] if label else None
+        )
+
+    def get_container(self, container_id: str) -> ContainerInfo:
+        """Get specific container"""
+        return self._on_node(
+            container_id, lambda service: service.get_container(container_id)
+        )
+
+    def rename_container(self, container_id: str, name: str) -> ContainerInfo:
+        """Rename a container and return its refreshed information"""
+        info = self._on_node(
+            container_id, lambda service: service.rename_container(container_id, name)
+        )
+        self._remember(info.node, info.id, info.name)
+        return info
+
+    def get_container_stats_by_id(self, container_id: str) -> ContainerStats:
+        """Look up a container and get its real-time statistics"""
+        return self._on_node(
+            container_id,
+            lambda service: service.get_container_stats_by_id(container_id),
+        )
+
+    def get_container_stats_v2_by_id(self, container_id: str) -> ContainerStatsV2:
+        """Look up a container and take one numeric statistics sample"""
+        return self._on_node(
+            container_id,
+            lambda service: service.get_container_stats_v2_by_id(container_id),
+        )
+
+    def stop_container_ports(self, container_id: str) -> List[int]:
+        """Stop a container and return the host ports it had bound"""
+        return self._on_node(
+            container_id, lambda service: service.stop_container_ports(container_id)
+        )
+
+    def stop_container(self, container_id: str) -> Union[bool, None]:
+        """Stop a container"""
+        return self._on_node(
+            container_id, lambda service: service.stop_container(container_id)
+        )
+
+    def start_container(self, container_id: str) -> Union[bool, None]:
+        """Start a stopped container"""
+        return self._on_node(
+            container_id, lambda service: service.start_container(container_id)
+        )
+
+    def pause_container(self, container_id: str) -> bool:
+        """Freeze a running container's processes"""
+        return self._on_node(
+            container_id, lambda service: service.pause_container(container_id)
+        )
+
+    def unpause_container(self, container_id: str) -> bool:
+        """Resume a paused container"""
+        return self._on_node(
+            container_id, lambda service: service.unpause_container(container_id)
+        )
+
+    def remove_container_ports(self, container_id: str) -> List[int]:
+        """Remove a container and return the host ports to release"""
+        return self._on_node(
+            container_id, lambda service: service.remove_container_ports(container_id)
+        )
+
+    def remove_container(self, container_id: str) -> Union[bool, None]:
+        """Remove a container"""
+        return self._on_node(
+            container_id, lambda service: service.remove_container(container_id)
+        )
+
+    def reconcile_ports(self):
+        """Rebuild the port allocator from the ports every node's containers bind
+
+        Skipped when a node cannot be listed, since its ports would be freed.
+        """
+        results = self._fan_out(
+            lambda service: service.list_container_summaries(all_containers=False)
+        )
+        for node, result in results.items():
+            if isinstance(result, Exception):
+                logger.warning(f"Not reconciling ports, node {node} failed: {result}")
+                return
+        self.port_manager.reconcile(
+            port["PublicPort"]
+            for summaries in results.values()
+            for summary in summaries
+            for port in summary.get("Ports") or []
+            if "PublicPort" in port
+        )
+
+    def get_port_info(self):
+        """Get port usage information"""
+        return self.default.get_port_info()
+
+    def handle_event(self, event: dict):
+        """Events stream subscriber keeping image caches and locations current"""
+        node = event.get("Node")
+        service = self.nodes.get(node)
+        if service is None:
+            return
+        if event.get("Type") == "image":
+            service.image_cache.handle_event(event)
+            return
+        if event.get("Type") != "container" or len(self.nodes) == 1:
+            return
+        actor = event.get("Actor") or {}
+        full_id = event.get("id") or actor.get("ID")
+        if not full_id:
+            return
+        name = (actor.get("Attributes") or {}).get("name")
+        if event.get("Action") == "destroy":
+            self._forget(node, full_id, name)
+        else:
+            self._remember(node, full_id, name)
+
+    def _on_node(self, container_ref: str, call: Callable[[DockerService], Any]):
+        """Run ``call`` on the container's node, re-locating a stale location"""
+        service = self.locate(container_ref)
+        try:
+            return call(service)
+        except docker.errors.NotFound:
+            if len(self.nodes) == 1 or not self._forget_ref(container_ref):
+                raise
+        return call(self.locate(container_ref))
+
+    def _fan_out(
+        self,
+        call: Callable[[DockerService], Any],
+        nodes: Optional[Iterable[str]] = None,
+    ) -> Dict[str, Any]:
+        """Run ``call`` on every node concurrently; errors are returned as values"""
+        names = list(nodes) if nodes is not None else list(self.nodes)
+        if len(names) == 1 or self._pool is None:
+            results = {}
+            for name in names:
+                try:
+                    results[name] = call(self.nodes[name])
+                except Exception as e:
+                    results[name] = e
+            return results
+
+        futures = {name: self._pool.submit(call, self.nodes[name]) for name in names}
+        results = {}
+        for name, future in futures.items():
+            try:
+                results[name] = future.result()
+            except Exception as e:
+                results[name] = e
+        return results
+
+    def _remember(self, node: Optional[str], *refs: Optional[str]):
+        if len(self.nodes) == 1 or node not in self.nodes:
+            return
+        with self._locations_lock:
+            for ref in refs:
+                if ref:
+                    self._locations[ref] = node
+                    if len(ref) == 64:
+                        self._locations[ref[:12]] = node
+
+    def _remember_summaries(self, node: str, summaries: List[dict]):
+        if len(self.nodes) == 1:
+            return
+        with self._locations_lock:
+            for summary in summaries:
+                self._locations[summary["Id"]] = node
+                self._locations[summary["Id"][:12]] = node
+                for name in summary.get("Names") or []:
+                    self._locations[name.lstrip("/")] = node
+
+    def _forget(self, node: str, full_id: str, name: Optional[str]):
+        with self._locations_lock:
+            for ref in (full_id, full_id[:12], name):
+                if ref and self._locations.get(ref) == node:
+                    del self._locations[ref]
+
+    def _forget_ref(self, container_ref: str) -> bool:
+        """Drop a cached location; True if there was one"""
+        with self._locations_lock:
+            return self._locations.pop(container_ref.lstrip("/"), None) is not None
+
+
+_cluster: Optional[DockerCluster] = None
+_cluster_lock = threading.Lock()
+
+
+def get_docker_cluster() -> DockerCluster:
+    """Return the process-wide DockerCluster, creating it on first use"""
+    global _cluster
+    if _cluster is None:
+        with _cluster_lock:
+            if _cluster is None:
+                endpoints = dict(settings.docker_nodes) or {
+                    DEFAULT_NODE: settings.docker_host
+                }
+                port_manager = PortManager(
+                    settings.port_start,
+                    settings.port_end,
+                    state_file=settings.port_state_file
+                    or os.path.join(settings.data_dir, "ports.json"),
+                    probe=settings.port_probe_bind and settings.publish_ports,
+                    flush_interval=settings.port_state_flush_interval,
+                )
+                default_resources = ContainerResources(
+                    cpus=settings.container_cpus,
+                    memory_mb=settings.container_memory_mb,
+                    memory_reservation_mb=settings.container_memory_reservation_mb,
+                    pids_limit=settings.container_pids_limit,
+                )
+                nodes = {
+                    node: DockerService(
+                        base_url=base_url,
+                        timeout=settings.docker_timeout,
+                        pool_size=settings.docker_pool_size,
+                        reconnect_interval=settings.docker_reconnect_interval,
+                        port_manager=port_manager,
+                        publish_ports=settings.publish_ports,
+                        network=settings.container_network,
+                        default_resources=default_resources,
+                        node=node,
+                        # A lone docker_host keeps using readiness_host
+                        host=settings.docker_node_hosts.get(node)
+                        or (endpoint_host(base_url) if settings.docker_nodes else None),
+                    )
+                    for node, base_url in endpoints.items()
+                }
+                _cluster = DockerCluster(
+                    nodes, port_manager, workers=settings.docker_executor_workers
+                )
+    return _cluster
+
+
+def close_docker_cluster():
+    """Release the process-wide DockerCluster"""
+    global _cluster
+    with _cluster_lock:
+        if _cluster is not None:
+            _cluster.close()
+            _cluster = None
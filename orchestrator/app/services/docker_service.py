@@ -1,37 +1,178 @@
 import docker
-import psutil
+import functools
+import re
+import requests
+import threading
 import time
 import logging
-from typing import List, Optional, Union
-from app.models.container import ContainerInfo, ContainerStats, SystemStats
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Union
+from app.models.container import (
+    ContainerInfo,
+    ContainerResources,
+    ContainerStats,
+    ContainerStatsV2,
+)
+from app.services.image_cache import ImageCache
+from app.services.metrics import docker_call
+from app.utils.container_stats import (
+    STATS_FIELDS,
+    sample_from_raw,
+    to_container_stats,
+    to_container_stats_v2,
+)
 from app.utils.port_manager import PortManager
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Labels recording the CPU cores and memory (MB) a container reserves
+CPUS_LABEL = "nubrix.cpus"
+MEMORY_LABEL = "nubrix.memory_mb"
+# Label marking containers created by the orchestrator
+MANAGED_LABEL = "nubrix.managed"
+
+# Node hosts that are this machine
+LOCAL_HOSTS = {"localhost", "127.0.0.1", "::1"}
+
+
+def _reconnect_on_failure(method):
+    """Drop the cached client when the daemon connection breaks"""
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        try:
+            return method(self, *args, **kwargs)
+        except requests.exceptions.ConnectionError:
+            self._invalidate_client()
+            raise
+
+    return wrapper
+
 
 class DockerService:
-    def __init__(self):
-        self.client = None
-        self.port_manager = PortManager()
+    def __init__(
+        self,
+        base_url: Optional[str] = None,
+        timeout: int = 30,
+        pool_size: int = 10,
+        reconnect_interval: float = 5.0,
+        port_manager: Optional[PortManager] = None,
+        publish_ports: bool = True,
+        network: Optional[str] = None,
+        default_resources: Optional[ContainerResources] = None,
+        node: str = "default",
+        host: Optional[str] = None,
+    ):
+        self.base_url = base_url
+        self.node = node
+        # Address the node's published ports are reached at; None means the
+        # configured readiness host
+        self.host = host
+        # Node capacity from /info, refreshed on every (re)connect
+        self.cpus: Optional[int] = None
+        self.memory_total: Optional[int] = None
+        self.timeout = timeout
+        self.pool_size = pool_size
+        self.reconnect_interval = reconnect_interval
+        self.port_manager = port_manager or PortManager()
+        self.publish_ports = publish_ports
+        self.network = network
+        self.default_resources = default_resources or ContainerResources()
+        self.image_cache = ImageCache(
+            lambda: docker_call("images", self.client.api.images)
+        )
+        self._client = None
+        self._client_lock = threading.Lock()
+        self._next_connect_attempt = 0.0
         self._initialize_client()
 
     def _initialize_client(self):
         """Initialize Docker client"""
         try:
-            self.client = docker.from_env()
+            if self.base_url:
+                client = docker.DockerClient(
+                    base_url=self.base_url,
+                    timeout=self.timeout,
+                    max_pool_size=self.pool_size,
+                )
+            else:
+                client = docker.from_env(
+                    timeout=self.timeout, max_pool_size=self.pool_size
+                )
             # Test connection
-            self.client.ping()
-            logger.info("Docker client initialized successfully")
+            client.ping()
+            info = docker_call("info", client.info)
+            self.cpus = info.get("NCPU")
+            self.memory_total = info.get("MemTotal")
+            self._client = client
+            logger.info(f"Docker client for node {self.node} initialized successfully")
         except Exception as e:
-            logger.error(f"Failed to initialize Docker client: {e}")
-            self.client = None
+            logger.error(
+                f"Failed to initialize Docker client for node {self.node}: {e}"
+            )
+            self._client = None
+            self._next_connect_attempt = time.monotonic() + self.reconnect_interval
+
+    def _invalidate_client(self):
+        """Forget the current client so the next call reconnects"""
+        with self._client_lock:
+            if self._client is not None:
+                logger.warning("Lost connection to Docker daemon, will reconnect")
+                try:
+                    self._client.close()
+                except Exception:
+                    pass
+                self._client = None
+                self._next_connect_attempt = 0.0
+
+    @property
+    def local(self) -> bool:
+        """Whether the daemon runs on this host (reached over a local socket)"""
+        return not self.base_url or self.base_url.startswith(("unix://", "npipe://"))
+
+    @property
+    def remote(self) -> bool:
+        """Whether published ports are on another machine than this one"""
+        return self.host is not None and self.host not in LOCAL_HOSTS
+
+    @property
+    def client(self):
+        """Docker client, reconnecting lazily if the daemon went away"""
+        if self._client is None and time.monotonic() >= self._next_connect_attempt:
+            with self._client_lock:
+                if self._client is None:
+                    self._initialize_client()
+        return self._client
 
     def is_available(self) -> bool:
         """Check if Docker service is available"""
         return self.client is not None
 
+    def is_connected(self) -> bool:
+        """Check for a live client without attempting to reconnect"""
+        return self._client is not None
+
+    def ping(self) -> bool:
+        """Check that the daemon still answers, reconnecting if needed"""
+        client = self.client
+        if client is None:
+            return False
+        try:
+            return docker_call("ping", client.ping)
+        except Exception as e:
+            logger.error(f"Docker ping failed: {e}")
+            self._invalidate_client()
+            return False
+
+    def close(self):
+        """Close the underlying connection pool"""
+        with self._client_lock:
+            if self._client is not None:
+                self._client.close()
+                self._client = None
+
     def get_container_info(self, container) -> ContainerInfo:
         """Extract container information into ContainerInfo model"""
         try:
@@ -46,18 +187,18 @@ class DockerService:
                                 f"{binding['HostIp']}:{binding['HostPort']}"
                             )
 
+            labels = container.attrs.get("Config", {}).get("Labels") or {}
             return ContainerInfo(
                 id=container.short_id,
                 name=container.name,
                 status=container.status,
-                image=(
-                    container.image.tags[0]
-                    if container.image.tags
-                    else container.image.id
-                ),
+                image=self.image_cache.resolve(container.attrs["Image"]),
                 ports=ports,
                 created=container.attrs["Created"],
                 state=container.attrs["State"]["Status"],
+                address=self.network_address(container.attrs.get("NetworkSettings")),
+                node=self.node,
+                managed=MANAGED_LABEL in labels,
             )
         except Exception as e:
             logger.error(f"Error extracting container info: {e}")
@@ -66,183 +207,428 @@ class DockerService:
     def get_container_stats(self, container) -> ContainerStats:
         """Get real-time statistics for a container"""
         try:
-            stats = container.stats(stream=False)
-
-            # Calculate CPU percentage
-            cpu_delta = (
-                stats["cpu_stats"]["cpu_usage"]["total_usage"]
-                - stats["precpu_stats"]["cpu_usage"]["total_usage"]
-            )
-            system_delta = (
-                stats["cpu_stats"]["system_cpu_usage"]
-                - stats["precpu_stats"]["system_cpu_usage"]
-            )
-            cpu_percent = (cpu_delta / system_delta) * 100 if system_delta > 0 else 0
-
-            # Memory calculations
-            memory_usage = stats["memory_stats"]["usage"]
-            memory_limit = stats["memory_stats"]["limit"]
-            memory_percent = (
-                (memory_usage / memory_limit) * 100 if memory_limit > 0 else 0
-            )
-
-            # Network calculations
-            network_rx = (
-                stats["networks"]["eth0"]["rx_bytes"]
-                if "networks" in stats and "eth0" in stats["networks"]
-                else 0
-            )
-            network_tx = (
-                stats["networks"]["eth0"]["tx_bytes"]
-                if "networks" in stats and "eth0" in stats["networks"]
-                else 0
-            )
-
-            return ContainerStats(
-                container_id=container.short_id,
-                name=container.name,
-                cpu_percent=round(cpu_percent, 2),
-                memory_usage=f"{memory_usage / (1024*1024):.2f} MB",
-                memory_limit=f"{memory_limit / (1024*1024):.2f} MB",
-                memory_percent=round(memory_percent, 2),
-                network_rx=f"{network_rx / (1024*1024):.2f} MB",
-                network_tx=f"{network_tx / (1024*1024):.2f} MB",
-                timestamp=time.time(),
+            stats = docker_call("stats", container.stats, stream=False)
+            sample = sample_from_raw(stats, time.time())
+            return to_container_stats(
+                container.short_id, container.name, dict(zip(STATS_FIELDS, sample))
             )
         except Exception as e:
             logger.error(f"Error getting stats for container {container.short_id}: {e}")
             return None
 
-    def get_system_stats(self) -> SystemStats:
-        """Get system-wide statistics"""
-        try:
-            cpu_percent = psutil.cpu_percent(interval=1)
-            memory = psutil.virtual_memory()
-            disk = psutil.disk_usage("/")
-
-            return SystemStats(
-                cpu_percent=cpu_percent,
-                memory_percent=memory.percent,
-                memory_used=f"{memory.used / (1024**3):.2f} GB",
-                memory_total=f"{memory.total / (1024**3):.2f} GB",
-                disk_usage_percent=disk.percent,
-                timestamp=time.time(),
-            )
-        except Exception as e:
-            logger.error(f"Error getting system stats: {e}")
-            return None
+    @_reconnect_on_failure
+    def get_container_stats_by_id(self, container_id: str) -> ContainerStats:
+        """Look up a container and get its real-time statistics"""
+        if not self.is_available():
+            raise RuntimeError("Docker service not available")
+
+        container = docker_call("inspect", self.client.containers.get, container_id)
+        return self.get_container_stats(container)
 
-    def create_container(self, image: str, name: Optional[str] = None) -> ContainerInfo:
-        """Create a new container"""
+    @_reconnect_on_failure
+    def get_container_stats_v2_by_id(self, container_id: str) -> ContainerStatsV2:
+        """Look up a container and take one numeric statistics sample
+
+        A single sample has no predecessor, so its rates are None.
+        """
+        if not self.is_available():
+            raise RuntimeError("Docker service not available")
+
+        container = docker_call("inspect", self.client.containers.get, container_id)
+        stats = docker_call("stats", container.stats, stream=False)
+        sample = dict(zip(STATS_FIELDS, sample_from_raw(stats, time.time())))
+        return to_container_stats_v2(container.short_id, container.name, sample)
+
+    def effective_resources(
+        self, resources: Optional[ContainerResources] = None
+    ) -> ContainerResources:
+        """Requested resources with unset fields taken from the defaults"""
+        return (resources or ContainerResources()).merged(self.default_resources)
+
+    @staticmethod
+    def resource_options(resources: ContainerResources) -> dict:
+        """``containers.run`` keyword arguments enforcing ``resources``"""
+        options = {}
+        if resources.cpus is not None:
+            options["nano_cpus"] = int(resources.cpus * 1e9)
+        if resources.memory_mb is not None:
+            options["mem_limit"] = f"{resources.memory_mb}m"
+        if resources.memory_reservation_mb is not None:
+            options["mem_reservation"] = f"{resources.memory_reservation_mb}m"
+        if resources.pids_limit is not None:
+            options["pids_limit"] = resources.pids_limit
+        return options
+
+    @staticmethod
+    def resource_labels(resources: ContainerResources) -> Dict[str, str]:
+        """Labels recording what a container reserves, for admission control"""
+        labels = {}
+        if resources.cpus is not None:
+            labels[CPUS_LABEL] = str(resources.cpus)
+        memory_mb = resources.memory_reservation_mb or resources.memory_mb
+        if memory_mb is not None:
+            labels[MEMORY_LABEL] = str(memory_mb)
+        return labels
+
+    @_reconnect_on_failure
+    def create_container(
+        self,
+        image: str,
+        name: Optional[str] = None,
+        labels: Optional[Dict[str, str]] = None,
+        resources: Optional[ContainerResources] = None,
+    ) -> ContainerInfo:
+        """Create a new container with CPU, memory and PID limits"""
         if not self.is_available():
             raise RuntimeError("Docker service not available")
 
-        # Find available port
-        host_port = self.port_manager.find_available_port()
+        resources = self.effective_resources(resources)
+
+        # Find available port, unless the container is only reached through
+        # the gateway on the container network
+        host_port = (
+            self.port_manager.find_available_port(probe=not self.remote)
+            if self.publish_ports
+            else None
+        )
 
         # Generate container name if not provided
         container_name = name or f"api-server-{int(time.time())}"
 
         # Create and start container
-        container = self.client.containers.run(
-            image=image,
-            name=container_name,
-            detach=True,
-            ports={"5000/tcp": host_port},
-            environment={"HOST_PORT": str(host_port)},
+        try:
+            container = docker_call(
+                "run",
+                self.client.containers.run,
+                image=image,
+                name=container_name,
+                detach=True,
+                ports={"5000/tcp": host_port} if host_port else {},
+                environment={"HOST_PORT": str(host_port)} if host_port else {},
+                labels={
+                    **(labels or {}),
+                    **self.resource_labels(resources),
+                    MANAGED_LABEL: "true",
+                },
+                network=self.network,
+                **self.resource_options(resources),
+            )
+        except Exception:
+            if host_port:
+                self.port_manager.release_port(host_port)
+            raise
+
+        logger.info(
+            f"Created container {container.short_id} "
+            + (f"on port {host_port}" if host_port else f"on network {self.network}")
         )
 
-        logger.info(f"Created container {container.short_id} on port {host_port}")
+        # run() returns the container as inspected right after create, before
+        # start; inspect it again for its state, port bindings and address
+        docker_call("inspect", container.reload)
+        return self.get_container_info(container)
 
-        # Wait a moment for container to start
-        time.sleep(2)
+    @_reconnect_on_failure
+    def wait_for_event(
+        self, container_id: str, event: str, since: float, until: float
+    ) -> bool:
+        """Block until the daemon reports ``event`` for a container
 
-        # Refresh container object to get updated info
-        container.reload()
-        return self.get_container_info(container)
+        Events are replayed from ``since``, so an event that fired before
+        the subscription was opened is still seen. Returns False if
+        ``until`` passes first.
+        """
+        if not self.is_available():
+            raise RuntimeError("Docker service not available")
 
-    def list_containers(self, all_containers: bool = True) -> List[ContainerInfo]:
-        """List containers"""
+        events = self.client.events(
+            since=int(since),
+            until=int(until) + 1,
+            filters={"container": container_id, "event": event},
+            decode=True,
+        )
+        try:
+            for _ in events:
+                return True
+            return False
+        finally:
+            events.close()
+
+    def get_container_info_from_summary(self, summary: dict) -> ContainerInfo:
+        """Build ContainerInfo from a ``/containers/json`` list entry
+
+        Unlike ``get_container_info`` this needs no per-container inspect;
+        the image tag comes from the image cache.
+        """
+        try:
+            ports = {}
+            for port in summary.get("Ports") or []:
+                if "PublicPort" not in port:
+                    continue
+                internal_port = f"{port['PrivatePort']}/{port['Type']}"
+                # Keep the first (IPv4) binding when a port is published twice
+                ports.setdefault(
+                    internal_port, f"{port.get('IP', '0.0.0.0')}:{port['PublicPort']}"
+                )
+
+            names = summary.get("Names") or []
+            created = datetime.fromtimestamp(summary["Created"], tz=timezone.utc)
+            return ContainerInfo(
+                id=summary["Id"][:12],
+                name=names[0].lstrip("/") if names else summary["Id"][:12],
+                status=summary["State"],
+                image=self.image_cache.resolve(summary["ImageID"]),
+                ports=ports,
+                created=created.strftime("%Y-%m-%dT%H:%M:%S.%fZ"),
+                state=summary["State"],
+                address=self.network_address(summary.get("NetworkSettings")),
+                node=self.node,
+                managed=MANAGED_LABEL in (summary.get("Labels") or {}),
+            )
+        except Exception as e:
+            logger.error(f"Error extracting container info: {e}")
+            return None
+
+    @staticmethod
+    def build_list_filters(
+        status: Optional[str] = None,
+        labels: Optional[List[str]] = None,
+        name_prefix: Optional[str] = None,
+    ) -> Dict[str, Union[str, List[str]]]:
+        """Translate API filters into daemon-side ``/containers/json`` filters"""
+        filters = {}
+        if status:
+            filters["status"] = status
+        if labels:
+            filters["label"] = list(labels)
+        if name_prefix:
+            filters["name"] = f"^/{re.escape(name_prefix)}"
+        return filters
+
+    @_reconnect_on_failure
+    def list_container_summaries(
+        self,
+        all_containers: bool = True,
+        filters: Optional[Dict[str, Union[str, List[str]]]] = None,
+        limit: Optional[int] = None,
+    ) -> List[dict]:
+        """Raw ``/containers/json`` entries, newest first"""
         if not self.is_available():
             raise RuntimeError("Docker service not available")
 
-        containers = self.client.containers.list(all=all_containers)
-        return [self.get_container_info(container) for container in containers]
+        return docker_call(
+            "list",
+            self.client.api.containers,
+            all=all_containers,
+            filters=filters or None,
+            limit=limit if limit is not None else -1,
+        )
+
+    @_reconnect_on_failure
+    def list_containers(
+        self,
+        all_containers: bool = True,
+        status: Optional[str] = None,
+        labels: Optional[List[str]] = None,
+        name_prefix: Optional[str] = None,
+        limit: Optional[int] = None,
+        offset: int = 0,
+    ) -> List[ContainerInfo]:
+        """List containers with a single daemon call
+
+        Filters are evaluated by the daemon. Results are ordered newest
+        first; ``limit`` is pushed down as ``offset + limit`` so the daemon
+        never returns more entries than the requested page needs.
+        """
+        if limit is not None and not all_containers and not status:
+            # The daemon includes stopped containers whenever a limit is set
+            status = "running"
+        summaries = self.list_container_summaries(
+            all_containers=all_containers,
+            filters=self.build_list_filters(status, labels, name_prefix),
+            limit=offset + limit if limit is not None else None,
+        )
+        return [
+            self.get_container_info_from_summary(summary)
+            for summary in summaries[offset:]
+        ]
 
+    @_reconnect_on_failure
     def get_container(self, container_id: str) -> ContainerInfo:
         """Get specific container"""
         if not self.is_available():
             raise RuntimeError("Docker service not available")
 
-        container = self.client.containers.get(container_id)
+        container = docker_call("inspect", self.client.containers.get, container_id)
         return self.get_container_info(container)
 
-    def stop_container(self, container_id: str) -> Union[bool, None]:
-        """Stop a container"""
+    def find_containers(
+        self, name_prefix: str, label: Optional[str] = None
+    ) -> List[ContainerInfo]:
+        """List containers whose name starts with ``name_prefix``"""
+        return self.list_containers(
+            name_prefix=name_prefix, labels=[label] if label else None
+        )
+
+    @_reconnect_on_failure
+    def rename_container(self, container_id: str, name: str) -> ContainerInfo:
+        """Rename a container and return its refreshed information"""
         if not self.is_available():
             raise RuntimeError("Docker service not available")
 
-        try:
-            container = self.client.containers.get(container_id)
-            container.stop()
+        container = docker_call("inspect", self.client.containers.get, container_id)
+        docker_call("rename", container.rename, name)
+        docker_call("inspect", container.reload)
+        logger.info(f"Renamed container {container_id} to {name}")
+        return self.get_container_info(container)
 
-            # Release the port
-            container.reload()
-            if container.attrs.get("NetworkSettings", {}).get("Ports"):
-                for internal_port, port_bindings in container.attrs["NetworkSettings"][
-                    "Ports"
-                ].items():
-                    if port_bindings:
-                        for binding in port_bindings:
-                            host_port = int(binding["HostPort"])
-                            self.port_manager.release_port(host_port)
+    @_reconnect_on_failure
+    def stop_container_ports(self, container_id: str) -> List[int]:
+        """Stop a container and return the host ports it had bound
 
-            logger.info(f"Stopped container {container_id}")
-            return True
+        The ports are not released; callers release them, possibly in bulk.
+        """
+        if not self.is_available():
+            raise RuntimeError("Docker service not available")
+
+        container = docker_call("inspect", self.client.containers.get, container_id)
+        # Bindings disappear from the inspect data once the container stops
+        host_ports = self._bound_host_ports(container.attrs)
+        docker_call("stop", container.stop)
+        logger.info(f"Stopped container {container_id}")
+        return host_ports
+
+    def stop_container(self, container_id: str) -> Union[bool, None]:
+        """Stop a container"""
+        try:
+            host_ports = self.stop_container_ports(container_id)
+        except docker.errors.NotFound:
+            raise
         except Exception as e:
             logger.error(f"Error stopping container {container_id}: {e}")
             return None
 
+        # Release the port
+        self.port_manager.release_ports(host_ports)
+        return True
+
+    @_reconnect_on_failure
     def start_container(self, container_id: str) -> Union[bool, None]:
         """Start a stopped container"""
         if not self.is_available():
             raise RuntimeError("Docker service not available")
 
+        container = docker_call("inspect", self.client.containers.get, container_id)
+        if container.status == "paused":
+            # Hibernated by pausing: resuming is what starting it means
+            docker_call("unpause", container.unpause)
+            logger.info(f"Unpaused container {container_id}")
+            return True
         try:
-            container = self.client.containers.get(container_id)
-            container.start()
+            docker_call("start", container.start)
+
+            # Take back the host ports released when it was stopped
+            docker_call("inspect", container.reload)
+            for host_port in self._bound_host_ports(container.attrs):
+                if not self.port_manager.reserve_port(host_port):
+                    logger.warning(
+                        f"Port {host_port} of container {container_id} was "
+                        "already allocated"
+                    )
             logger.info(f"Started container {container_id}")
             return True
         except Exception as e:
             logger.error(f"Error starting container {container_id}: {e}")
             return None
 
-    def remove_container(self, container_id: str) -> Union[bool, None]:
-        """Remove a container"""
+    @_reconnect_on_failure
+    def pause_container(self, container_id: str) -> bool:
+        """Freeze a running container's processes, keeping its ports"""
+        if not self.is_available():
+            raise RuntimeError("Docker service not available")
+
+        container = docker_call("inspect", self.client.containers.get, container_id)
+        docker_call("pause", container.pause)
+        logger.info(f"Paused container {container_id}")
+        return True
+
+    @_reconnect_on_failure
+    def unpause_container(self, container_id: str) -> bool:
+        """Resume a paused container"""
         if not self.is_available():
             raise RuntimeError("Docker service not available")
 
+        container = docker_call("inspect", self.client.containers.get, container_id)
+        docker_call("unpause", container.unpause)
+        logger.info(f"Unpaused container {container_id}")
+        return True
+
+    @_reconnect_on_failure
+    def remove_container_ports(self, container_id: str) -> List[int]:
+        """Remove a container and return the host ports to release
+
+        Only a running (or paused) container still holds its ports; a
+        stopped one released them when it was stopped.
+        """
+        if not self.is_available():
+            raise RuntimeError("Docker service not available")
+
+        container = docker_call("inspect", self.client.containers.get, container_id)
+        host_ports = (
+            self._bound_host_ports(container.attrs)
+            if container.status in ("running", "paused")
+            else []
+        )
+        docker_call("remove", container.remove)
+        logger.info(f"Removed container {container_id}")
+        return host_ports
+
+    def remove_container(self, container_id: str) -> Union[bool, None]:
+        """Remove a container"""
         try:
-            container = self.client.containers.get(container_id)
-
-            # Release the port if container was running
-            if container.status == "running":
-                if container.attrs.get("NetworkSettings", {}).get("Ports"):
-                    for internal_port, port_bindings in container.attrs[
-                        "NetworkSettings"
-                    ]["Ports"].items():
-                        if port_bindings:
-                            for binding in port_bindings:
-                                host_port = int(binding["HostPort"])
-                                self.port_manager.release_port(host_port)
-
-            container.remove()
-            logger.info(f"Removed container {container_id}")
-            return True
+            host_ports = self.remove_container_ports(container_id)
+        except docker.errors.NotFound:
+            raise
         except Exception as e:
             logger.error(f"Error removing container {container_id}: {e}")
             return None
 
+        # Release the port if container was running
+        self.port_manager.release_ports(host_ports)
+        return True
+
+    def network_address(self, network_settings: Optional[dict]) -> Optional[str]:
+        """Container IP on the configured network, else on its first network"""
+        networks = (network_settings or {}).get("Networks") or {}
+        if self.network in networks:
+            return networks[self.network].get("IPAddress") or None
+        for network in networks.values():
+            if network.get("IPAddress"):
+                return network["IPAddress"]
+        return None
+
+    @staticmethod
+    def _bound_host_ports(attrs: dict) -> List[int]:
+        """Host ports bound by an inspected container"""
+        host_ports = []
+        for port_bindings in (
+            attrs.get("NetworkSettings", {}).get("Ports") or {}
+        ).values():
+            for binding in port_bindings or []:
+                host_ports.append(int(binding["HostPort"]))
+        return host_ports
+
+    @_reconnect_on_failure
+    def reconcile_ports(self):
+        """Rebuild the port allocator from the ports running containers bind"""
+        summaries = self.list_container_summaries(all_containers=False)
+        self.port_manager.reconcile(
+            port["PublicPort"]
+            for summary in summaries
+            for port in summary.get("Ports") or []
+            if "PublicPort" in port
+        )
+
     def get_port_info(self):
         """Get port usage information"""
         used_ports = self.port_manager.get_used_ports()
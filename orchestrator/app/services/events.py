@@ -0,0 +1,158 @@
+import logging
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Set
+
+from app.services.cluster import DockerCluster, get_docker_cluster
+from app.services.docker_service import DockerService
+
+logger = logging.getLogger(__name__)
+
+
+class DockerEventStream:
+    """Background reader of every node's events stream
+
+    One daemon thread per node follows ``/events`` and passes every decoded
+    event, tagged with its ``Node``, to the registered subscribers. If a
+    stream breaks it reconnects with backoff, resuming from that node's
+    last seen event, and then calls the reconnect callbacks so that caches
+    can resynchronise. A node that was unreachable at start also triggers
+    them once it connects.
+    """
+
+    def __init__(
+        self,
+        service: DockerCluster,
+        reconnect_initial_backoff: float = 0.5,
+        reconnect_max_backoff: float = 10.0,
+    ):
+        self.service = service
+        self.reconnect_initial_backoff = reconnect_initial_backoff
+        self.reconnect_max_backoff = reconnect_max_backoff
+        self.last_event_time: Optional[float] = None
+        self._last_event_times: Dict[str, float] = {}
+        self._connected: Set[str] = set()
+        self._subscribers: List[Callable[[dict], None]] = []
+        self._reconnect_callbacks: List[Callable[[], None]] = []
+        self._streams: Dict[str, object] = {}
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+
+    @property
+    def connected(self) -> bool:
+        """Whether the stream of every node is connected"""
+        return len(self._connected) == len(self.service.nodes)
+
+    def subscribe(self, callback: Callable[[dict], None]):
+        """Call ``callback`` with every event received"""
+        self._subscribers.append(callback)
+
+    def on_reconnect(self, callback: Callable[[], None]):
+        """Call ``callback`` after the stream reconnects"""
+        self._reconnect_callbacks.append(callback)
+
+    def start(self):
+        """Start following the events stream of every node"""
+        if self._threads:
+            return
+        self._stop.clear()
+        for node, service in self.service.nodes.items():
+            thread = threading.Thread(
+                target=self._run,
+                args=(node, service),
+                name=f"docker-events-{node}",
+                daemon=True,
+            )
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self):
+        """Stop following the events streams"""
+        self._stop.set()
+        for stream in list(self._streams.values()):
+            try:
+                stream.close()
+            except Exception:
+                pass
+        for thread in self._threads:
+            thread.join(timeout=5)
+        self._threads = []
+
+    def _run(self, node: str, service: DockerService):
+        backoff = self.reconnect_initial_backoff
+        first = True
+        while not self._stop.is_set():
+            client = service.client
+            if client is None:
+                # Whatever was loaded meanwhile lacks this node: resync later
+                first = False
+                self._stop.wait(backoff)
+                backoff = min(backoff * 2, self.reconnect_max_backoff)
+                continue
+            try:
+                last = self._last_event_times.get(node)
+                stream = client.events(since=int(last) if last else None, decode=True)
+                self._streams[node] = stream
+                self._connected.add(node)
+                if not first:
+                    logger.info(f"Reconnected to Docker events stream of node {node}")
+                    self._notify_reconnect()
+                backoff = self.reconnect_initial_backoff
+                for event in stream:
+                    event["Node"] = node
+                    self._dispatch(node, event)
+                    if self._stop.is_set():
+                        break
+            except Exception as e:
+                if not self._stop.is_set():
+                    logger.warning(f"Docker events stream of node {node} failed: {e}")
+            finally:
+                self._connected.discard(node)
+                self._streams.pop(node, None)
+            first = False
+            if not self._stop.is_set():
+                self._stop.wait(backoff)
+                backoff = min(backoff * 2, self.reconnect_max_backoff)
+
+    def _dispatch(self, node: str, event: dict):
+        time_nano = event.get("timeNano")
+        event_time = time_nano / 1e9 if time_nano else time.time()
+        self._last_event_times[node] = event_time
+        self.last_event_time = event_time
+        for callback in self._subscribers:
+            try:
+                callback(event)
+            except Exception as e:
+                logger.error(f"Docker event subscriber failed: {e}")
+
+    def _notify_reconnect(self):
+        for callback in self._reconnect_callbacks:
+            try:
+                callback()
+            except Exception as e:
+                logger.error(f"Docker events reconnect callback failed: {e}")
+
+
+_event_stream: Optional[DockerEventStream] = None
+_event_stream_lock = threading.Lock()
+
+
+def get_event_stream() -> DockerEventStream:
+    """Return the process-wide DockerEventStream, creating it on first use"""
+    global _event_stream
+    if _event_stream is None:
+        with _event_stream_lock:
+            if _event_stream is None:
+                cluster = get_docker_cluster()
+                _event_stream = DockerEventStream(cluster)
+                _event_stream.subscribe(cluster.handle_event)
+    return _event_stream
+
+
+def close_event_stream():
+    """Stop the process-wide DockerEventStream"""
+    global _event_stream
+    with _event_stream_lock:
+        stream, _event_stream = _event_stream, None
+    if stream is not None:
+        stream.stop()
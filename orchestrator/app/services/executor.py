@@ -0,0 +1,53 @@
+import asyncio
+import functools
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class DockerExecutor:
+    """Runs blocking docker-py calls on a bounded thread pool
+
+    Every call is tagged with an operation name. Operations listed in
+    ``limits`` get their own concurrency cap so that a burst of slow calls
+    (for example ``stats`` or ``stop``) cannot occupy every worker thread.
+    """
+
+    def __init__(
+        self,
+        max_workers: int = 32,
+        limits: Optional[Dict[str, int]] = None,
+    ):
+        self.max_workers = max_workers
+        self.limits = dict(limits or {})
+        self._pool = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="docker"
+        )
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+
+    def _semaphore(self, operation: str) -> Optional[asyncio.Semaphore]:
+        """Return the concurrency limiter for an operation, if any"""
+        limit = self.limits.get(operation)
+        if not limit:
+            return None
+        semaphore = self._semaphores.get(operation)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(limit)
+            self._semaphores[operation] = semaphore
+        return semaphore
+
+    async def run(self, operation: str, func: Callable, *args, **kwargs) -> Any:
+        """Run ``func`` on the pool without blocking the event loop"""
+        loop = asyncio.get_running_loop()
+        call = functools.partial(func, *args, **kwargs)
+        semaphore = self._semaphore(operation)
+        if semaphore is None:
+            return await loop.run_in_executor(self._pool, call)
+        async with semaphore:
+            return await loop.run_in_executor(self._pool, call)
+
+    def shutdown(self):
+        """Stop accepting work and let running calls finish"""
+        self._pool.shutdown(wait=False)
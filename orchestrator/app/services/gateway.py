@@ -0,0 +1,353 @@
+import asyncio
+import logging
+import time
+from typing import AsyncIterator, Dict, Optional, Set
+
+import httpx
+from docker.errors import NotFound
+from starlette.background import BackgroundTask
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response, StreamingResponse
+
+from app.core.config import settings
+from app.models.container import ContainerInfo
+from app.services.async_docker_service import (
+    AsyncDockerService,
+    get_async_docker_service,
+)
+from app.services.hibernation import IdleManager, get_idle_manager
+from app.services.registry import ContainerRegistry, get_container_registry
+
+logger = logging.getLogger(__name__)
+
+# Connection-scoped headers that must not be forwarded (RFC 9110 7.6.1)
+HOP_BY_HOP_HEADERS = {
+    "connection",
+    "keep-alive",
+    "proxy-authenticate",
+    "proxy-authorization",
+    "proxy-connection",
+    "te",
+    "trailer",
+    "transfer-encoding",
+    "upgrade",
+}
+
+
+class Upstream:
+    """Keep-alive connection pool to one container"""
+
+    __slots__ = ("base_url", "client", "last_used", "requests", "in_flight")
+
+    def __init__(self, base_url: str, client: httpx.AsyncClient):
+        self.base_url = base_url
+        self.client = client
+        self.last_used = time.monotonic()
+        self.requests = 0
+        # Requests sent and not yet fully answered; the pool stays open
+        self.in_flight: Set[httpx.Request] = set()
+
+
+class Gateway:
+    """Reverse proxy from the orchestrator to managed containers
+
+    Routes come from the container registry, with a daemon lookup for
+    containers it has not seen yet. Only containers the orchestrator created
+    (labelled ``nubrix.managed``) are routed; a container is addressed by ID
+    or name and reached on its container-network address, or on the port it
+    publishes on its node when it has no network address or its node is
+    remote. Each upstream
+    gets its own pooled keep-alive client, so requests to a container reuse
+    connections instead of opening one per request. Request and response
+    bodies are streamed in both directions. A hibernated container is woken
+    before its request is forwarded, and every request counts as activity.
+    """
+
+    def __init__(
+        self,
+        registry: ContainerRegistry,
+        docker_service: AsyncDockerService,
+        idle_manager: IdleManager,
+        host: str = "localhost",
+        domain: Optional[str] = None,
+        pool_size: int = 20,
+        timeout: float = 60.0,
+        idle_timeout: float = 300.0,
+    ):
+        self.registry = registry
+        self.docker_service = docker_service
+        self.idle_manager = idle_manager
+        self.host = host
+        self.domain = domain.lstrip(".").lower() if domain else None
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.idle_timeout = idle_timeout
+        self._upstreams: Dict[str, Upstream] = {}
+        self._lock = asyncio.Lock()
+
+    def upstream_url(self, info: ContainerInfo) -> Optional[str]:
+        """Base URL of the container's API, or None if it is unreachable
+
+        A container network address is only routable from the node itself,
+        so a container on a remote node is reached on the port it publishes
+        there; without one, its network must be an overlay that spans the
+        nodes.
+        """
+        cluster = self.docker_service.service
+        binding = info.ports.get("5000/tcp")
+        if binding and (cluster.is_remote(info.node) or not info.address):
+            host = cluster.node_host(info.node) or self.host
+            return f"http://{host}:{binding.rsplit(':', 1)[-1]}"
+        if info.address:
+            return f"http://{info.address}:5000"
+        return None
+
+    async def resolve(self, container_ref: str) -> Optional[ContainerInfo]:
+        """Container for a reference, from the registry or else the daemon"""
+        if self.registry.fresh:
+            info = self.registry.get(container_ref)
+            if info is not None:
+                return info
+
+        # Created moments ago (or the registry is not live): ask the daemon
+        try:
+            return await self.docker_service.get_container(container_ref)
+        except NotFound:
+            return None
+
+    def container_for_host(self, host: str) -> Optional[str]:
+        """Container reference for a ``<container>.<domain>`` Host header"""
+        if not self.domain or not host:
+            return None
+        hostname = host.rsplit(":", 1)[0].lower()
+        suffix = "." + self.domain
+        if hostname.endswith(suffix) and len(hostname) > len(suffix):
+            return hostname[: -len(suffix)]
+        return None
+
+    async def forward(
+        self, request: Request, container_ref: str, path: str, prefix: str = ""
+    ) -> Response:
+        """Proxy ``request`` to ``path`` on the referenced container
+
+        ``prefix`` is the public path the container is mounted under; it is
+        passed upstream as ``X-Forwarded-Prefix``.
+        """
+        info = await self.resolve(container_ref)
+        # Other containers on the daemon are never exposed through the gateway
+        if info is None or not info.managed:
+            return JSONResponse(
+                {"detail": f"Container {container_ref} not found"}, status_code=404
+            )
+        if self.idle_manager.wakeable(info):
+            try:
+                info = await self.idle_manager.wake(info.id)
+            except Exception as e:
+                logger.warning(f"Gateway failed to wake container {info.id}: {e}")
+                return JSONResponse(
+                    {"detail": f"Container {container_ref} failed to wake"},
+                    status_code=503,
+                )
+        if info.state != "running":
+            return JSONResponse(
+                {"detail": f"Container {container_ref} is {info.state}"},
+                status_code=503,
+            )
+        base_url = self.upstream_url(info)
+        if base_url is None:
+            return JSONResponse(
+                {"detail": f"Container {container_ref} has no reachable address"},
+                status_code=502,
+            )
+
+        self.idle_manager.touch(info.id)
+        upstream = await self._upstream(base_url)
+        upstream.requests += 1
+        # Forwarding headers from the client are dropped: the gateway sets
+        # its own, and the upstream must not see client-controlled values
+        headers = [
+            (name, value)
+            for name, value in request.headers.raw
+            if name.decode("latin-1").lower() not in HOP_BY_HOP_HEADERS
+            and name.lower() not in (b"host", b"forwarded")
+            and not name.lower().startswith(b"x-forwarded-")
+        ]
+        client_host = request.client.host if request.client else ""
+        headers += [
+            (b"x-forwarded-for", client_host.encode("latin-1")),
+            (b"x-forwarded-host", request.headers.get("host", "").encode("latin-1")),
+            (b"x-forwarded-proto", request.url.scheme.encode("latin-1")),
+        ]
+        if prefix:
+            headers.append((b"x-forwarded-prefix", prefix.encode("latin-1")))
+
+        has_body = "content-length" in request.headers or (
+            "transfer-encoding" in request.headers
+        )
+        upstream_request = upstream.client.build_request(
+            request.method,
+            httpx.URL(
+                path="/" + path.lstrip("/"),
+                query=request.url.query.encode() or None,
+            ),
+            headers=headers,
+            content=request.stream() if has_body else None,
+        )
+        upstream.in_flight.add(upstream_request)
+        try:
+            response = await upstream.client.send(upstream_request, stream=True)
+        except BaseException as e:
+            upstream.in_flight.discard(upstream_request)
+            if isinstance(e, httpx.TimeoutException):
+                return JSONResponse(
+                    {"detail": f"Container {container_ref} timed out"},
+                    status_code=504,
+                )
+            if isinstance(e, httpx.HTTPError):
+                logger.warning(f"Gateway request to {info.id} failed: {e}")
+                return JSONResponse(
+                    {"detail": f"Container {container_ref} is unreachable"},
+                    status_code=502,
+                )
+            raise
+
+        response_headers = [
+            (name, value)
+            for name, value in response.headers.raw
+            if name.decode("latin-1").lower() not in HOP_BY_HOP_HEADERS
+        ]
+        proxied = StreamingResponse(
+            self._relay(upstream, upstream_request, response),
+            status_code=response.status_code,
+            background=BackgroundTask(
+                self._finish, upstream, upstream_request, response
+            ),
+        )
+        # Replace the default headers so upstream ones (and repeats) pass through
+        proxied.raw_headers = response_headers
+        return proxied
+
+    def request_count(self, info: ContainerInfo) -> int:
+        """Requests forwarded to a container since its pool was opened
+
+        The count starts over when an idle pool is dropped.
+        """
+        base_url = self.upstream_url(info)
+        upstream = self._upstreams.get(base_url) if base_url else None
+        return upstream.requests if upstream is not None else 0
+
+    async def close(self):
+        """Close every upstream connection pool"""
+        async with self._lock:
+            upstreams, self._upstreams = self._upstreams, {}
+        for upstream in upstreams.values():
+            await upstream.client.aclose()
+
+    async def _relay(
+        self,
+        upstream: Upstream,
+        upstream_request: httpx.Request,
+        response: httpx.Response,
+    ) -> AsyncIterator[bytes]:
+        """Stream a response body, ending its request once it is done"""
+        try:
+            async for chunk in response.aiter_raw():
+                yield chunk
+        finally:
+            await self._finish(upstream, upstream_request, response)
+
+    @staticmethod
+    async def _finish(
+        upstream: Upstream, upstream_request: httpx.Request, response: httpx.Response
+    ):
+        """Close an upstream response; safe to call more than once"""
+        upstream.in_flight.discard(upstream_request)
+        upstream.last_used = time.monotonic()
+        await response.aclose()
+
+    async def _upstream(self, base_url: str) -> Upstream:
+        upstream = self._upstreams.get(base_url)
+        if upstream is None:
+            async with self._lock:
+                upstream = self._upstreams.get(base_url)
+                if upstream is None:
+                    await self._close_idle()
+                    upstream = Upstream(
+                        base_url,
+                        httpx.AsyncClient(
+                            base_url=base_url,
+                            limits=httpx.Limits(
+                                max_connections=None,
+                                max_keepalive_connections=self.pool_size,
+                                keepalive_expiry=self.idle_timeout,
+                            ),
+                            timeout=httpx.Timeout(self.timeout),
+                            # Upstreams are plain HTTP; skipping the CA bundle
+                            # load makes a new pool ~100x cheaper to create
+                            verify=False,
+                        ),
+                    )
+                    self._upstreams[base_url] = upstream
+        upstream.last_used = time.monotonic()
+        return upstream
+
+    async def _close_idle(self):
+        """Drop pools to upstreams unused for ``idle_timeout`` seconds
+
+        Called with the lock held whenever a new upstream is added, so the
+        pool count follows the number of containers in active use. A pool
+        with a request still in flight, such as a long-lived stream, is
+        kept however long ago that request started.
+        """
+        cutoff = time.monotonic() - self.idle_timeout
+        for base_url, upstream in list(self._upstreams.items()):
+            if upstream.last_used < cutoff and not upstream.in_flight:
+                del self._upstreams[base_url]
+                await upstream.client.aclose()
+
+
+class GatewayHostMiddleware:
+    """ASGI middleware routing ``<container>.<gateway_domain>`` to the gateway"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and settings.gateway_domain:
+            gateway = get_gateway()
+            host = dict(scope["headers"]).get(b"host", b"").decode("latin-1")
+            container_ref = gateway.container_for_host(host)
+            if container_ref is not None:
+                request = Request(scope, receive)
+                response = await gateway.forward(request, container_ref, scope["path"])
+                await response(scope, receive, send)
+                return
+        await self.app(scope, receive, send)
+
+
+_gateway: Optional[Gateway] = None
+
+
+def get_gateway() -> Gateway:
+    """Return the process-wide Gateway, creating it on first use"""
+    global _gateway
+    if _gateway is None:
+        _gateway = Gateway(
+            get_container_registry(),
+            get_async_docker_service(),
+            get_idle_manager(),
+            host=settings.readiness_host,
+            domain=settings.gateway_domain,
+            pool_size=settings.gateway_pool_size,
+            timeout=settings.gateway_timeout,
+            idle_timeout=settings.gateway_idle_timeout,
+        )
+    return _gateway
+
+
+async def close_gateway():
+    """Close the process-wide Gateway's upstream pools"""
+    global _gateway
+    gateway, _gateway = _gateway, None
+    if gateway is not None:
+        await gateway.close()
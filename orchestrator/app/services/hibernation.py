@@ -0,0 +1,296 @@
+import asyncio
+import logging
+import threading
+import time
+from collections import deque
+from typing import Deque, Dict, List, Optional, Tuple
+
+from app.core.config import settings
+from app.models.container import ContainerInfo, HibernationStats
+from app.services.async_docker_service import (
+    AsyncDockerService,
+    get_async_docker_service,
+)
+from app.services.events import DockerEventStream, get_event_stream
+from app.services.metrics import CONTAINER_HIBERNATIONS, CONTAINER_WAKE_LATENCY
+from app.services.registry import ContainerRegistry, get_container_registry
+from app.services.stats_collector import StatsCollector, get_stats_collector
+from app.services.warm_pool import WARM_NAME_PREFIX
+
+logger = logging.getLogger(__name__)
+
+HIBERNATE_MODES = ("pause", "stop")
+# Containers carrying this label are never hibernated
+OPT_OUT_LABEL = "nubrix.hibernate=false"
+# Events after which a container is awake, whoever woke it
+WAKE_ACTIONS = {"start", "unpause", "destroy"}
+
+
+def _short_id(container_id: str) -> str:
+    return container_id[:12]
+
+
+class IdleManager:
+    """Hibernates idle containers and wakes them on demand
+
+    A container counts as active when its network byte counters, summed over
+    its interfaces, move (read from the stats collector) or when the gateway
+    forwards a request to it. Once
+    a running container has been inactive for ``idle_seconds`` it is
+    hibernated: paused, which frees its CPU while keeping memory and port,
+    or stopped, which frees both and releases its port like any stop.
+
+    ``wake`` resumes a hibernated container and waits until it serves
+    requests; concurrent wakes of one container share a single resume. The
+    gateway wakes containers on their next request, and the regular start
+    endpoint resumes paused ones, so start/stop keep their meaning.
+
+    Stopped containers are only remembered as hibernated by this process;
+    after a restart they look like any other stopped container.
+    """
+
+    def __init__(
+        self,
+        docker_service: AsyncDockerService,
+        registry: ContainerRegistry,
+        collector: StatsCollector,
+        events: DockerEventStream,
+        enabled: bool = False,
+        mode: str = "pause",
+        idle_seconds: float = 600.0,
+        check_interval: float = 30.0,
+        latency_window: int = 1000,
+    ):
+        if mode not in HIBERNATE_MODES:
+            raise ValueError(f"hibernate mode must be one of {HIBERNATE_MODES}")
+        self.docker_service = docker_service
+        self.registry = registry
+        self.collector = collector
+        self.enabled = enabled
+        self.mode = mode
+        self.idle_seconds = idle_seconds
+        self.check_interval = check_interval
+        self.hibernations = 0
+        self.wakes = 0
+        self.wake_failures = 0
+        self._last_active: Dict[str, float] = {}
+        self._counters: Dict[str, Tuple[float, float]] = {}
+        self._hibernated: Dict[str, str] = {}
+        self._wake_latencies: Deque[float] = deque(maxlen=latency_window)
+        self._waking: Dict[str, asyncio.Task] = {}
+        self._lock = threading.Lock()
+        self._task: Optional[asyncio.Task] = None
+        events.subscribe(self.handle_event)
+
+    async def start(self):
+        if self.enabled and self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def touch(self, container_id: str):
+        """Record traffic to a container"""
+        self._last_active[_short_id(container_id)] = time.monotonic()
+
+    def is_hibernated(self, container_id: str) -> bool:
+        with self._lock:
+            return _short_id(container_id) in self._hibernated
+
+    def wakeable(self, info: ContainerInfo) -> bool:
+        """Whether a request to this container should wake it first"""
+        # The hibernated set also covers a registry that has not yet seen
+        # the pause or stop
+        return info.state == "paused" or self.is_hibernated(info.id)
+
+    def forget(self, container_ref: str):
+        """Stop treating a container as hibernated, e.g. after an explicit stop"""
+        key = _short_id(self.registry.resolve_id(container_ref) or container_ref)
+        with self._lock:
+            self._hibernated.pop(key, None)
+
+    def handle_event(self, event: dict):
+        """Events stream subscriber"""
+        if event.get("Type") != "container" or event.get("Action") not in WAKE_ACTIONS:
+            return
+        full_id = event.get("id") or (event.get("Actor") or {}).get("ID")
+        if full_id:
+            self.forget(full_id)
+            if event["Action"] == "destroy":
+                self._last_active.pop(_short_id(full_id), None)
+                self._counters.pop(_short_id(full_id), None)
+
+    async def hibernate(self, container_id: str) -> ContainerInfo:
+        """Pause or stop a running container now"""
+        info = await self.docker_service.get_container(container_id)
+        if info.state != "running":
+            raise ValueError(f"Container {info.id} is {info.state}, not running")
+
+        with self._lock:
+            self._hibernated[info.id] = self.mode
+        try:
+            if self.mode == "pause":
+                succeeded = await self.docker_service.pause_container(info.id)
+            else:
+                succeeded = await self.docker_service.stop_container(info.id)
+            if not succeeded:
+                raise RuntimeError(f"Failed to hibernate container {info.id}")
+        except Exception:
+            self.forget(info.id)
+            raise
+        self.hibernations += 1
+        CONTAINER_HIBERNATIONS.labels(self.mode).inc()
+        logger.info(f"Hibernated container {info.id} ({self.mode})")
+        return await self.docker_service.get_container(info.id)
+
+    async def wake(self, container_id: str) -> ContainerInfo:
+        """Resume a hibernated container and wait until it is ready"""
+        key = _short_id(self.registry.resolve_id(container_id) or container_id)
+        task = self._waking.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._wake(container_id))
+            self._waking[key] = task
+            task.add_done_callback(lambda _: self._waking.pop(key, None))
+        return await asyncio.shield(task)
+
+    def stats(self) -> HibernationStats:
+        """Hibernation counters and wake latency"""
+        latencies = sorted(self._wake_latencies)
+        with self._lock:
+            hibernated = len(self._hibernated)
+        return HibernationStats(
+            enabled=self.enabled,
+            mode=self.mode,
+            idle_seconds=self.idle_seconds,
+            tracked=len(self._last_active),
+            hibernated=hibernated,
+            hibernations=self.hibernations,
+            wakes=self.wakes,
+            wake_failures=self.wake_failures,
+            last_wake_seconds=(
+                round(self._wake_latencies[-1], 3) if self._wake_latencies else None
+            ),
+            wake_p50_seconds=self._percentile(latencies, 0.50),
+            wake_p99_seconds=self._percentile(latencies, 0.99),
+        )
+
+    @staticmethod
+    def _percentile(ordered: List[float], fraction: float) -> Optional[float]:
+        if not ordered:
+            return None
+        return round(ordered[min(len(ordered) - 1, int(fraction * len(ordered)))], 3)
+
+    async def _wake(self, container_id: str) -> ContainerInfo:
+        started = time.perf_counter()
+        since = time.time()
+        try:
+            info = await self.docker_service.get_container(container_id)
+            if info.state == "paused":
+                mode = "pause"
+                await self.docker_service.unpause_container(info.id)
+            elif info.state in ("exited", "created"):
+                mode = "stop"
+                if not await self.docker_service.start_container(info.id):
+                    raise RuntimeError(f"Failed to start container {info.id}")
+            else:
+                return info
+
+            info = await self.docker_service.get_container(info.id)
+            readiness = self.docker_service.readiness
+            if mode == "stop" and readiness is not None:
+                await readiness.wait(self.docker_service.service, info, since)
+        except Exception:
+            self.wake_failures += 1
+            raise
+
+        elapsed = time.perf_counter() - started
+        self.forget(info.id)
+        self.touch(info.id)
+        self.wakes += 1
+        self._wake_latencies.append(elapsed)
+        CONTAINER_WAKE_LATENCY.labels(mode).observe(elapsed)
+        info.startup_seconds = round(elapsed, 3)
+        logger.info(f"Woke container {info.id} ({mode}) in {elapsed:.3f}s")
+        return info
+
+    async def _run(self):
+        while True:
+            try:
+                await self._check()
+            except Exception as e:
+                logger.error(f"Idle check failed: {e}")
+            await asyncio.sleep(self.check_interval)
+
+    async def _check(self):
+        """Hibernate every running container idle for ``idle_seconds``"""
+        now = time.monotonic()
+        running = self.registry.list(status="running")
+        opted_out = {info.id for info in self.registry.list(labels=[OPT_OUT_LABEL])}
+        running_ids = {info.id for info in running}
+
+        idle = []
+        for info in running:
+            if info.name.startswith(WARM_NAME_PREFIX) or info.id in opted_out:
+                continue
+            # Raw byte counters over every interface; any traffic is activity
+            samples = self.collector.window_v2(info.id, 1)
+            if samples:
+                counters = (samples[-1].network_rx_bytes, samples[-1].network_tx_bytes)
+                if self._counters.get(info.id) != counters:
+                    self._counters[info.id] = counters
+                    self._last_active[info.id] = now
+            last_active = self._last_active.setdefault(info.id, now)
+            if now - last_active >= self.idle_seconds:
+                idle.append(info.id)
+
+        # Forget containers that stopped or went away
+        for container_id in list(self._last_active):
+            if container_id not in running_ids:
+                self._last_active.pop(container_id, None)
+                self._counters.pop(container_id, None)
+
+        results = await asyncio.gather(
+            *(self.hibernate(container_id) for container_id in idle),
+            return_exceptions=True,
+        )
+        for container_id, result in zip(idle, results):
+            if isinstance(result, Exception):
+                logger.error(f"Failed to hibernate container {container_id}: {result}")
+
+
+_idle_manager: Optional[IdleManager] = None
+_idle_manager_lock = threading.Lock()
+
+
+def get_idle_manager() -> IdleManager:
+    """Return the process-wide IdleManager, creating it on first use"""
+    global _idle_manager
+    if _idle_manager is None:
+        with _idle_manager_lock:
+            if _idle_manager is None:
+                _idle_manager = IdleManager(
+                    get_async_docker_service(),
+                    get_container_registry(),
+                    get_stats_collector(),
+                    get_event_stream(),
+                    enabled=settings.hibernate_enabled,
+                    mode=settings.hibernate_mode,
+                    idle_seconds=settings.hibernate_idle_seconds,
+                    check_interval=settings.hibernate_check_interval,
+                )
+    return _idle_manager
+
+
+async def close_idle_manager():
+    """Stop the process-wide IdleManager's background task"""
+    global _idle_manager
+    with _idle_manager_lock:
+        manager, _idle_manager = _idle_manager, None
+    if manager is not None:
+        await manager.stop()
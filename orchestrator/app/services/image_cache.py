@@ -0,0 +1,70 @@
+import logging
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+
+class ImageCache:
+    """In-memory map from image ID to its first repository tag
+
+    The whole map is loaded with a single image listing and dropped again
+    whenever the daemon reports an image event, so resolving the image of
+    hundreds of containers costs at most one daemon call. ``ttl`` bounds
+    staleness if the events stream is down. Every tag present is kept too,
+    so the scheduler can tell which nodes already have an image.
+    """
+
+    def __init__(self, loader: Callable[[], List[dict]], ttl: float = 300.0):
+        self._loader = loader
+        self.ttl = ttl
+        self._tags: Dict[str, str] = {}
+        self._present: Set[str] = set()
+        self._loaded_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def resolve(self, image_id: str) -> str:
+        """Return the image's first tag, or its ID when it has none"""
+        if self._is_stale():
+            with self._lock:
+                if self._is_stale():
+                    self._load()
+        return self._tags.get(image_id, image_id)
+
+    def has(self, image: str) -> bool:
+        """Whether the image was present at the last load
+
+        Never calls the daemon, so it is cheap enough for placement
+        decisions; an image pulled since the last load reads as absent.
+        """
+        if ":" not in image.rsplit("/", 1)[-1]:
+            image += ":latest"
+        return image in self._present or image in self._tags
+
+    def invalidate(self):
+        """Drop the cached map; the next lookup reloads it"""
+        self._loaded_at = None
+
+    def handle_event(self, event: dict):
+        """Events stream subscriber: any image change invalidates the map"""
+        if event.get("Type") == "image":
+            self.invalidate()
+
+    def _is_stale(self) -> bool:
+        return self._loaded_at is None or time.monotonic() - self._loaded_at > self.ttl
+
+    def _load(self):
+        tags = {}
+        present = set()
+        for image in self._loader():
+            repo_tags = [
+                tag for tag in image.get("RepoTags") or [] if tag != "<none>:<none>"
+            ]
+            if repo_tags:
+                tags[image["Id"]] = repo_tags[0]
+            present.update(repo_tags)
+        self._tags = tags
+        self._present = present
+        self._loaded_at = time.monotonic()
+        logger.debug(f"Loaded {len(tags)} image tags")
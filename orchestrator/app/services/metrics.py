@@ -0,0 +1,154 @@
+import asyncio
+import logging
+import time
+from typing import Any, Callable, Optional
+
+from app.utils.metrics import Counter, Histogram, MetricsRegistry
+
+logger = logging.getLogger(__name__)
+
+registry = MetricsRegistry()
+
+REQUEST_LATENCY = registry.register(
+    Histogram(
+        "nubrix_http_request_duration_seconds",
+        "HTTP request latency by route",
+        labelnames=("method", "route", "status"),
+    )
+)
+DOCKER_CALL_LATENCY = registry.register(
+    Histogram(
+        "nubrix_docker_call_duration_seconds",
+        "Latency of Docker Engine API calls by operation",
+        labelnames=("operation",),
+    )
+)
+DOCKER_CALL_ERRORS = registry.register(
+    Counter(
+        "nubrix_docker_call_errors",
+        "Failed Docker Engine API calls by operation and error type",
+        labelnames=("operation", "error"),
+    )
+)
+EVENT_LOOP_LAG = registry.register(
+    Histogram(
+        "nubrix_event_loop_lag_seconds",
+        "Delay between a scheduled event loop wake-up and when it ran",
+        buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0),
+    )
+)
+CONTAINER_WAKE_LATENCY = registry.register(
+    Histogram(
+        "nubrix_container_wake_seconds",
+        "Time to wake a hibernated container until it serves requests",
+        labelnames=("mode",),
+    )
+)
+CONTAINER_HIBERNATIONS = registry.register(
+    Counter(
+        "nubrix_container_hibernations",
+        "Containers hibernated after going idle",
+        labelnames=("mode",),
+    )
+)
+
+DEPLOYMENT_SCALE_EVENTS = registry.register(
+    Counter(
+        "nubrix_deployment_scale_events",
+        "Autoscaler replica count changes by deployment and direction",
+        labelnames=("deployment", "direction"),
+    )
+)
+
+
+def docker_call(operation: str, func: Callable[..., Any], *args, **kwargs) -> Any:
+    """Call ``func`` and record its latency and any error under ``operation``"""
+    started = time.perf_counter()
+    try:
+        return func(*args, **kwargs)
+    except Exception as e:
+        DOCKER_CALL_ERRORS.labels(operation, type(e).__name__).inc()
+        raise
+    finally:
+        DOCKER_CALL_LATENCY.labels(operation).observe(time.perf_counter() - started)
+
+
+class LoopLagMonitor:
+    """Measures how late the event loop runs a periodic wake-up"""
+
+    def __init__(self, interval: float = 0.5):
+        self.interval = interval
+        self.last_lag = 0.0
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        observe = EVENT_LOOP_LAG.labels().observe
+        while True:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            self.last_lag = max(loop.time() - expected, 0.0)
+            observe(self.last_lag)
+
+
+class MetricsMiddleware:
+    """ASGI middleware timing every HTTP request by its route template"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = scope.get("route")
+            REQUEST_LATENCY.labels(
+                scope["method"],
+                getattr(route, "path", "unmatched"),
+                str(status),
+            ).observe(time.perf_counter() - started)
+
+
+_monitor: Optional[LoopLagMonitor] = None
+
+
+def get_loop_lag_monitor() -> LoopLagMonitor:
+    """Return the process-wide LoopLagMonitor, creating it on first use"""
+    global _monitor
+    if _monitor is None:
+        _monitor = LoopLagMonitor()
+    return _monitor
+
+
+async def close_loop_lag_monitor():
+    """Stop the process-wide LoopLagMonitor"""
+    global _monitor
+    monitor, _monitor = _monitor, None
+    if monitor is not None:
+        await monitor.stop()
@@ -0,0 +1,137 @@
+import asyncio
+import logging
+import time
+from typing import Optional
+
+import httpx
+
+from app.models.container import ContainerInfo
+from app.services.cluster import DockerCluster
+from app.services.executor import DockerExecutor
+
+logger = logging.getLogger(__name__)
+
+
+class ContainerNotReadyError(RuntimeError):
+    """Raised when a container does not become healthy before the deadline"""
+
+    def __init__(self, container_id: str, timeout: float):
+        super().__init__(
+            f"Container {container_id} did not become ready within {timeout:.1f}s"
+        )
+        self.container_id = container_id
+        self.timeout = timeout
+
+
+class ReadinessProbe:
+    """Waits for a freshly started container to answer its health endpoint
+
+    Unless the container is already running, the probe first waits for the
+    daemon's ``start`` event. It then polls the container's health endpoint
+    with exponential backoff through a shared keep-alive HTTP client until
+    it answers or the deadline passes.
+    """
+
+    def __init__(
+        self,
+        executor: DockerExecutor,
+        host: str = "localhost",
+        path: str = "/health",
+        timeout: float = 30.0,
+        initial_backoff: float = 0.05,
+        max_backoff: float = 1.0,
+        pool_size: int = 20,
+    ):
+        self.executor = executor
+        self.host = host
+        self.path = path
+        self.timeout = timeout
+        self.initial_backoff = initial_backoff
+        self.max_backoff = max_backoff
+        self.pool_size = pool_size
+        self._http: Optional[httpx.AsyncClient] = None
+
+    @property
+    def http(self) -> httpx.AsyncClient:
+        """Pooled HTTP client shared by every probe"""
+        if self._http is None:
+            self._http = httpx.AsyncClient(
+                limits=httpx.Limits(
+                    max_connections=self.pool_size,
+                    max_keepalive_connections=self.pool_size,
+                ),
+                timeout=httpx.Timeout(self.max_backoff),
+            )
+        return self._http
+
+    def health_url(
+        self, info: ContainerInfo, host: Optional[str] = None
+    ) -> Optional[str]:
+        """Build the health URL from the container's published port
+
+        ``host`` is where the container's node publishes ports, by default
+        the probe's own host. Containers without a published port are
+        probed on their address on the container network instead.
+        """
+        binding = info.ports.get("5000/tcp")
+        if binding:
+            host_port = binding.rsplit(":", 1)[-1]
+            return f"http://{host or self.host}:{host_port}{self.path}"
+        if info.address:
+            return f"http://{info.address}:5000{self.path}"
+        return None
+
+    async def wait(
+        self, service: DockerCluster, info: ContainerInfo, since: float
+    ) -> float:
+        """Wait until the container is ready and return the startup time
+
+        ``since`` is the wall-clock time at which creation was requested.
+        """
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        deadline = started + self.timeout
+
+        if info.state != "running":
+            started_event = await self.executor.run(
+                "events",
+                service.wait_for_event,
+                info.id,
+                "start",
+                since,
+                since + self.timeout,
+            )
+            if not started_event:
+                raise ContainerNotReadyError(info.id, self.timeout)
+
+        url = self.health_url(info, service.node_host(info.node))
+        if url is not None:
+            await self._poll_health(url, deadline, info.id)
+
+        startup = time.time() - since
+        logger.info(f"Container {info.id} ready after {startup:.3f}s")
+        return startup
+
+    async def _poll_health(self, url: str, deadline: float, container_id: str):
+        """Poll ``url`` with exponential backoff until it returns 2xx"""
+        loop = asyncio.get_running_loop()
+        backoff = self.initial_backoff
+        while True:
+            try:
+                response = await self.http.get(url)
+                if response.is_success:
+                    return
+            except httpx.HTTPError:
+                pass
+
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                raise ContainerNotReadyError(container_id, self.timeout)
+            await asyncio.sleep(min(backoff, remaining))
+            backoff = min(backoff * 2, self.max_backoff)
+
+    async def close(self):
+        """Close the pooled HTTP client"""
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
@@ -0,0 +1,317 @@
+import logging
+import threading
+import time
+from typing import Dict, List, Optional, Set, Tuple
+
+from app.models.container import ContainerInfo, RegistryStats
+from app.services.cluster import DockerCluster, get_docker_cluster
+from app.services.events import DockerEventStream, get_event_stream
+
+logger = logging.getLogger(__name__)
+
+# Container event actions that can change what ContainerInfo reports
+REFRESH_ACTIONS = {
+    "create",
+    "start",
+    "restart",
+    "die",
+    "stop",
+    "kill",
+    "oom",
+    "pause",
+    "unpause",
+    "rename",
+    "update",
+}
+
+
+class RegistryEntry:
+    __slots__ = ("full_id", "created", "labels", "summary", "info")
+
+    def __init__(self, full_id: str, summary: dict, info: ContainerInfo):
+        self.full_id = full_id
+        self.created = summary.get("Created", 0)
+        self.labels = summary.get("Labels") or {}
+        self.summary = summary
+        self.info = info
+
+
+class ContainerRegistry:
+    """Event-driven in-memory view of every container on every node
+
+    The registry is loaded with one ``/containers/json`` call per node on
+    start and after every events-stream reconnect, and is then kept current by the
+    container events. Entries are indexed by full ID, short ID, name and
+    label so that reads never touch the daemon.
+    """
+
+    def __init__(self, service: DockerCluster, events: DockerEventStream):
+        self.service = service
+        self.events = events
+        self.synced = False
+        self.last_sync: Optional[float] = None
+        self.last_event_lag: Optional[float] = None
+        self.events_processed = 0
+        self.resyncs = 0
+        self._entries: Dict[str, RegistryEntry] = {}
+        self._by_short_id: Dict[str, str] = {}
+        self._by_name: Dict[str, str] = {}
+        self._by_label: Dict[Tuple[str, Optional[str]], Set[str]] = {}
+        self._lock = threading.RLock()
+        self._resyncing = False
+        self._dirty: Set[str] = set()
+        events.subscribe(self.handle_event)
+        events.on_reconnect(self.resync)
+
+    @property
+    def fresh(self) -> bool:
+        """Whether reads can be answered from memory"""
+        return self.synced and self.events.connected
+
+    def resync(self):
+        """Reload every container with a single list call"""
+        with self._lock:
+            self._resyncing = True
+            self._dirty.clear()
+        try:
+            summaries = self.service.list_container_summaries(all_containers=True)
+            entries = [self._make_entry(summary) for summary in summaries]
+        except Exception as e:
+            with self._lock:
+                self._resyncing = False
+                self.synced = False
+            logger.error(f"Container registry resync failed: {e}")
+            return
+
+        with self._lock:
+            self._entries = {}
+            self._by_short_id = {}
+            self._by_name = {}
+            self._by_label = {}
+            for entry in entries:
+                if entry is not None:
+                    self._index(entry)
+            self._resyncing = False
+            dirty, self._dirty = self._dirty, set()
+            self.synced = True
+            self.last_sync = time.time()
+            self.resyncs += 1
+
+        # Re-apply anything that changed while the snapshot was in flight
+        for full_id in dirty:
+            self.refresh(full_id)
+        logger.info(f"Container registry synced {len(entries)} containers")
+
+    def refresh(self, full_id: str):
+        """Re-read a single container from the daemon"""
+        try:
+            summaries = self.service.list_container_summaries(
+                all_containers=True, filters={"id": full_id}
+            )
+        except Exception as e:
+            logger.error(f"Failed to refresh container {full_id[:12]}: {e}")
+            return
+        with self._lock:
+            self._unindex(full_id)
+            for summary in summaries:
+                entry = self._make_entry(summary)
+                if entry is not None:
+                    self._index(entry)
+
+    def handle_event(self, event: dict):
+        """Events stream subscriber"""
+        event_type = event.get("Type")
+        if event_type == "image":
+            self._reresolve_images()
+            return
+        if event_type != "container":
+            return
+
+        action = event.get("Action") or ""
+        full_id = event.get("id") or (event.get("Actor") or {}).get("ID")
+        if not full_id:
+            return
+
+        time_nano = event.get("timeNano")
+        if time_nano:
+            self.last_event_lag = max(time.time() - time_nano / 1e9, 0.0)
+        self.events_processed += 1
+
+        with self._lock:
+            if self._resyncing:
+                self._dirty.add(full_id)
+        if action == "destroy":
+            with self._lock:
+                self._unindex(full_id)
+        elif action in REFRESH_ACTIONS:
+            self.refresh(full_id)
+
+    def get(self, container_ref: str) -> Optional[ContainerInfo]:
+        """Look a container up by full ID, short ID, ID prefix or name"""
+        with self._lock:
+            full_id = self._resolve(container_ref)
+            entry = self._entries.get(full_id) if full_id else None
+            return entry.info if entry else None
+
+    def resolve_id(self, container_ref: str) -> Optional[str]:
+        """Full container ID for a reference, if known"""
+        with self._lock:
+            return self._resolve(container_ref)
+
+    def list(
+        self,
+        all_containers: bool = True,
+        status: Optional[str] = None,
+        labels: Optional[List[str]] = None,
+        name_prefix: Optional[str] = None,
+        limit: Optional[int] = None,
+        offset: int = 0,
+    ) -> List[ContainerInfo]:
+        """List containers from memory, newest first"""
+        if not all_containers and not status:
+            status = "running"
+        with self._lock:
+            candidates = None
+            for label in labels or []:
+                key, sep, value = label.partition("=")
+                ids = self._by_label.get((key, value if sep else None), set())
+                candidates = ids if candidates is None else candidates & ids
+            if candidates is None:
+                entries = list(self._entries.values())
+            else:
+                entries = [self._entries[full_id] for full_id in candidates]
+
+        if status:
+            entries = [entry for entry in entries if entry.info.state == status]
+        if name_prefix:
+            entries = [
+                entry for entry in entries if entry.info.name.startswith(name_prefix)
+            ]
+        entries.sort(key=lambda entry: (entry.created, entry.full_id), reverse=True)
+        end = offset + limit if limit is not None else None
+        return [entry.info for entry in entries[offset:end]]
+
+    def label_values(
+        self,
+        key: str,
+        states: Optional[Set[str]] = None,
+        node: Optional[str] = None,
+    ) -> List[str]:
+        """Values of label ``key`` on the containers carrying it"""
+        with self._lock:
+            entries = [
+                self._entries[full_id]
+                for full_id in self._by_label.get((key, None), ())
+            ]
+        return [
+            entry.labels[key]
+            for entry in entries
+            if (states is None or entry.info.state in states)
+            and (node is None or entry.info.node == node)
+        ]
+
+    def count_by_status(self) -> Dict[str, int]:
+        """Number of known containers in each state"""
+        with self._lock:
+            counts: Dict[str, int] = {}
+            for entry in self._entries.values():
+                status = entry.info.status
+                counts[status] = counts.get(status, 0) + 1
+            return counts
+
+    def count_by_node(self, state: Optional[str] = None) -> Dict[Optional[str], int]:
+        """Number of known containers (in ``state``) on each node"""
+        with self._lock:
+            counts: Dict[Optional[str], int] = {}
+            for entry in self._entries.values():
+                if state is None or entry.info.state == state:
+                    counts[entry.info.node] = counts.get(entry.info.node, 0) + 1
+            return counts
+
+    def stats(self) -> RegistryStats:
+        """Registry size, freshness and lag"""
+        return RegistryStats(
+            synced=self.synced,
+            fresh=self.fresh,
+            containers=len(self._entries),
+            last_sync=self.last_sync,
+            last_event_time=self.events.last_event_time,
+            last_event_lag_seconds=(
+                round(self.last_event_lag, 6)
+                if self.last_event_lag is not None
+                else None
+            ),
+            events_processed=self.events_processed,
+            resyncs=self.resyncs,
+        )
+
+    def _make_entry(self, summary: dict) -> Optional[RegistryEntry]:
+        info = self.service.get_container_info_from_summary(summary)
+        if info is None:
+            return None
+        return RegistryEntry(summary["Id"], summary, info)
+
+    def _resolve(self, container_ref: str) -> Optional[str]:
+        if container_ref in self._entries:
+            return container_ref
+        full_id = self._by_short_id.get(container_ref) or self._by_name.get(
+            container_ref.lstrip("/")
+        )
+        if full_id:
+            return full_id
+        if len(container_ref) >= 4:
+            matches = [
+                full_id
+                for full_id in self._entries
+                if full_id.startswith(container_ref)
+            ]
+            if len(matches) == 1:
+                return matches[0]
+        return None
+
+    def _index(self, entry: RegistryEntry):
+        self._entries[entry.full_id] = entry
+        self._by_short_id[entry.info.id] = entry.full_id
+        self._by_name[entry.info.name] = entry.full_id
+        for key, value in entry.labels.items():
+            self._by_label.setdefault((key, value), set()).add(entry.full_id)
+            self._by_label.setdefault((key, None), set()).add(entry.full_id)
+
+    def _unindex(self, full_id: str):
+        entry = self._entries.pop(full_id, None)
+        if entry is None:
+            return
+        if self._by_short_id.get(entry.info.id) == full_id:
+            del self._by_short_id[entry.info.id]
+        if self._by_name.get(entry.info.name) == full_id:
+            del self._by_name[entry.info.name]
+        for key, value in entry.labels.items():
+            for label in ((key, value), (key, None)):
+                ids = self._by_label.get(label)
+                if ids is not None:
+                    ids.discard(full_id)
+                    if not ids:
+                        del self._by_label[label]
+
+    def _reresolve_images(self):
+        with self._lock:
+            entries = list(self._entries.values())
+        for entry in entries:
+            # Resolved by the image cache of the entry's node
+            info = self.service.get_container_info_from_summary(entry.summary)
+            if info is not None:
+                entry.info = info
+
+
+_registry: Optional[ContainerRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_container_registry() -> ContainerRegistry:
+    """Return the process-wide ContainerRegistry, creating it on first use"""
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = ContainerRegistry(get_docker_cluster(), get_event_stream())
+    return _registry
@@ -0,0 +1,300 @@
+import logging
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from app.core.config import settings
+from app.models.container import NodeStats
+from app.services.cluster import DockerCluster, get_docker_cluster
+from app.services.docker_service import CPUS_LABEL, MEMORY_LABEL
+from app.services.registry import ContainerRegistry, get_container_registry
+from app.services.stats_collector import StatsCollector, get_stats_collector
+from app.services.system_sampler import SystemSampler, get_system_sampler
+
+logger = logging.getLogger(__name__)
+
+MB = 1024 * 1024
+SCHEDULER_STRATEGIES = ("least_loaded", "binpack")
+# States in which a container holds on to what it reserved
+COMMITTED_STATES = {"created", "running", "paused", "restarting"}
+
+
+class Demand:
+    """What one or more creates ask of a node"""
+
+    __slots__ = ("cpus", "reserved_memory_mb", "live_memory_mb", "containers")
+
+    def __init__(
+        self,
+        cpus: float = 0.0,
+        reserved_memory_mb: int = 0,
+        live_memory_mb: int = 0,
+        containers: int = 1,
+    ):
+        self.cpus = cpus
+        self.reserved_memory_mb = reserved_memory_mb
+        self.live_memory_mb = live_memory_mb
+        self.containers = containers
+
+    def add(self, other: "Demand", sign: int = 1):
+        self.cpus += sign * other.cpus
+        self.reserved_memory_mb += sign * other.reserved_memory_mb
+        self.live_memory_mb += sign * other.live_memory_mb
+        self.containers += sign * other.containers
+
+
+class Scheduler:
+    """Places new containers on the Docker node that fits them best
+
+    A node's load combines what its containers reserve (their
+    ``nubrix.cpus``/``nubrix.memory_mb`` labels in the registry) with what
+    is actually in use: the host sampler for a node on this host, and for a
+    remote node the sum of its containers' latest samples from the stats
+    collector, against the CPUs and memory its daemon reports in ``/info``.
+
+    A node fits when reservations stay within its capacity times the
+    overcommit ratios, ``min_free_memory_mb`` stays free after the new
+    container and its CPU is below ``max_cpu_percent``. Utilisation is the
+    highest of those four fractions. Among fitting nodes ``least_loaded``
+    picks the least utilised, spreading containers out, and ``binpack``
+    the most utilised, filling nodes in turn so that others stay free for
+    large containers; ties go to the node running fewer (or, when bin
+    packing, more) containers. When the image is known, nodes that already
+    have it are preferred over both, since they start it without a pull.
+    """
+
+    def __init__(
+        self,
+        cluster: DockerCluster,
+        registry: ContainerRegistry,
+        collector: StatsCollector,
+        sampler: SystemSampler,
+        strategy: str = "least_loaded",
+        cpu_overcommit: float = 4.0,
+        memory_overcommit: float = 1.0,
+        min_free_memory_mb: int = 256,
+        max_cpu_percent: float = 95.0,
+        usage_ttl: float = 1.0,
+    ):
+        if strategy not in SCHEDULER_STRATEGIES:
+            raise ValueError(
+                f"scheduler strategy must be one of {SCHEDULER_STRATEGIES}"
+            )
+        self.cluster = cluster
+        self.registry = registry
+        self.collector = collector
+        self.sampler = sampler
+        self.strategy = strategy
+        self.cpu_overcommit = cpu_overcommit
+        self.memory_overcommit = memory_overcommit
+        self.min_free_memory_mb = min_free_memory_mb
+        self.max_cpu_percent = max_cpu_percent
+        self.usage_ttl = usage_ttl
+        self._usage: Dict[str, Tuple[float, float]] = {}
+        self._usage_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def nodes(self, pending: Optional[Dict[str, Demand]] = None) -> List[NodeStats]:
+        """Capacity and load of every node, counting ``pending`` creates"""
+        usage = self._container_usage()
+        running = self.registry.count_by_node("running")
+        sample = self.sampler.latest_v2()
+        loads = []
+        for name, service in self.cluster.nodes.items():
+            extra = (pending or {}).get(name) or Demand(containers=0)
+            if service.local:
+                cpus = self.sampler.cores
+                memory_mb = sample.memory_total // MB if sample else None
+                memory_used_mb = sample.memory_used // MB if sample else None
+                cpu_percent = sample.cpu_percent if sample else None
+            else:
+                cpus = service.cpus
+                memory_mb = service.memory_total // MB if service.memory_total else None
+                memory_used, cpu_used = usage.get(name, (0.0, 0.0))
+                memory_used_mb = int(memory_used // MB)
+                cpu_percent = round(min(cpu_used, 100.0), 2)
+            if memory_used_mb is not None:
+                memory_used_mb += extra.live_memory_mb
+
+            load = NodeStats(
+                name=name,
+                endpoint=service.base_url,
+                connected=service.is_connected(),
+                local=service.local,
+                cpus=cpus,
+                memory_mb=memory_mb,
+                running=running.get(name, 0) + extra.containers,
+                reserved_cpus=round(self._reserved_cpus(name) + extra.cpus, 3),
+                reserved_memory_mb=self._reserved_memory_mb(name)
+                + extra.reserved_memory_mb,
+                memory_used_mb=memory_used_mb,
+                cpu_percent=cpu_percent,
+                utilization=0.0,
+            )
+            load.utilization = round(self.utilization(load), 4)
+            loads.append(load)
+        return loads
+
+    def place(
+        self,
+        demand: Demand,
+        pending: Optional[Dict[str, Demand]] = None,
+        enforce: bool = True,
+        image: Optional[str] = None,
+    ) -> Tuple[Optional[str], Optional[str]]:
+        """The node to create on, or None and why no node fits
+
+        With ``enforce`` off every connected node is a candidate.
+        """
+        # Bin packing prefers the busiest node, so its load sorts descending
+        sign = -1 if self.strategy == "binpack" else 1
+        candidates = []
+        reasons = []
+        for load in self.nodes(pending):
+            reason = "not connected" if not load.connected else None
+            if reason is None and enforce:
+                reason = self.misfit(load, demand)
+            if reason is not None:
+                reasons.append(f"{load.name}: {reason}")
+                continue
+            pulled = image is None or self.cluster.nodes[load.name].image_cache.has(
+                image
+            )
+            candidates.append(
+                (
+                    not pulled,
+                    sign * self.utilization(load, demand),
+                    sign * load.running,
+                    load.name,
+                )
+            )
+        if not candidates:
+            return None, "; ".join(reasons) or "no Docker nodes"
+        return min(candidates)[-1], None
+
+    def could_fit(self, demand: Demand) -> bool:
+        """Whether some node is large enough for ``demand`` when empty"""
+        for load in self.nodes():
+            if load.cpus and demand.cpus > load.cpus * self.cpu_overcommit:
+                continue
+            if load.memory_mb and (
+                demand.reserved_memory_mb > load.memory_mb * self.memory_overcommit
+            ):
+                continue
+            return True
+        return False
+
+    def misfit(self, load: NodeStats, demand: Demand) -> Optional[str]:
+        """Why ``demand`` does not fit on a node now, or None if it does"""
+        if load.cpus and demand.cpus:
+            capacity = load.cpus * self.cpu_overcommit
+            if load.reserved_cpus + demand.cpus > capacity:
+                return (
+                    f"{load.reserved_cpus:g} of {capacity:g} CPU cores reserved, "
+                    f"{demand.cpus:g} requested"
+                )
+        if load.memory_mb and demand.reserved_memory_mb:
+            capacity = int(load.memory_mb * self.memory_overcommit)
+            if load.reserved_memory_mb + demand.reserved_memory_mb > capacity:
+                return (
+                    f"{load.reserved_memory_mb} of {capacity} MB memory reserved, "
+                    f"{demand.reserved_memory_mb} MB requested"
+                )
+        if load.memory_mb and load.memory_used_mb is not None:
+            free_mb = load.memory_mb - load.memory_used_mb
+            if free_mb - demand.live_memory_mb < self.min_free_memory_mb:
+                return (
+                    f"{free_mb} MB memory free, {demand.live_memory_mb} MB "
+                    f"requested and {self.min_free_memory_mb} MB kept free"
+                )
+        if load.cpu_percent is not None and load.cpu_percent > self.max_cpu_percent:
+            return f"CPU at {load.cpu_percent:.0f}%"
+        return None
+
+    def utilization(self, load: NodeStats, demand: Optional[Demand] = None) -> float:
+        """Highest fraction of a node's capacity in use once ``demand`` is added"""
+        demand = demand or Demand(containers=0)
+        fractions = []
+        if load.cpus:
+            fractions.append(
+                (load.reserved_cpus + demand.cpus) / (load.cpus * self.cpu_overcommit)
+            )
+        if load.cpu_percent is not None:
+            fractions.append(load.cpu_percent / 100)
+        if load.memory_mb:
+            fractions.append(
+                (load.reserved_memory_mb + demand.reserved_memory_mb)
+                / (load.memory_mb * self.memory_overcommit)
+            )
+            if load.memory_used_mb is not None:
+                fractions.append(
+                    (load.memory_used_mb + demand.live_memory_mb) / load.memory_mb
+                )
+        return max(fractions, default=0.0)
+
+    def _reserved_cpus(self, node: str) -> float:
+        cpus = 0.0
+        for value in self.registry.label_values(CPUS_LABEL, COMMITTED_STATES, node):
+            try:
+                cpus += float(value)
+            except ValueError:
+                pass
+        return cpus
+
+    def _reserved_memory_mb(self, node: str) -> int:
+        memory_mb = 0
+        for value in self.registry.label_values(MEMORY_LABEL, COMMITTED_STATES, node):
+            try:
+                memory_mb += int(value)
+            except ValueError:
+                pass
+        return memory_mb
+
+    def _container_usage(self) -> Dict[str, Tuple[float, float]]:
+        """Memory bytes and CPU percent in use per node, from the collector
+
+        Summing every container's latest sample is not free, so the result
+        is reused for ``usage_ttl`` seconds.
+        """
+        now = time.monotonic()
+        with self._lock:
+            if self._usage_at is not None and now - self._usage_at < self.usage_ttl:
+                return self._usage
+            usage: Dict[str, Tuple[float, float]] = {}
+            for stats in self.collector.latest_v2():
+                info = self.registry.get(stats.container_id)
+                if info is None or info.node is None:
+                    continue
+                memory, cpu = usage.get(info.node, (0.0, 0.0))
+                usage[info.node] = (
+                    memory + stats.memory_usage,
+                    cpu + stats.cpu_percent,
+                )
+            self._usage = usage
+            self._usage_at = now
+            return usage
+
+
+_scheduler: Optional[Scheduler] = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler() -> Scheduler:
+    """Return the process-wide Scheduler, creating it on first use"""
+    global _scheduler
+    if _scheduler is None:
+        with _scheduler_lock:
+            if _scheduler is None:
+                _scheduler = Scheduler(
+                    get_docker_cluster(),
+                    get_container_registry(),
+                    get_stats_collector(),
+                    get_system_sampler(),
+                    strategy=settings.scheduler_strategy,
+                    cpu_overcommit=settings.admission_cpu_overcommit,
+                    memory_overcommit=settings.admission_memory_overcommit,
+                    min_free_memory_mb=settings.admission_min_free_memory_mb,
+                    max_cpu_percent=settings.admission_max_cpu_percent,
+                    usage_ttl=settings.system_sample_interval,
+                )
+    return _scheduler
@@ -0,0 +1,268 @@
+import logging
+import threading
+import time
+from typing import Dict, List, Optional
+
+from app.core.config import settings
+from app.models.container import ContainerStats, ContainerStatsV2
+from app.services.cluster import DockerCluster, get_docker_cluster
+from app.services.events import DockerEventStream, get_event_stream
+from app.services.registry import ContainerRegistry, get_container_registry
+from app.utils.container_stats import (
+    STATS_FIELDS,
+    sample_from_raw,
+    to_container_stats,
+    to_container_stats_v2,
+)
+from app.utils.ring_buffer import RingBuffer
+
+logger = logging.getLogger(__name__)
+
+START_ACTIONS = {"start", "restart", "unpause"}
+STOP_ACTIONS = {"die", "stop", "destroy"}
+
+
+class ContainerStatsStream:
+    """One streaming stats subscription feeding a ring buffer"""
+
+    def __init__(self, service: DockerCluster, full_id: str, buffer: RingBuffer):
+        self.service = service
+        self.full_id = full_id
+        self.buffer = buffer
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run, name=f"stats-{full_id[:12]}", daemon=True
+        )
+
+    @property
+    def alive(self) -> bool:
+        return self._thread.is_alive()
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        """Ask the reader to exit after the sample it is waiting for"""
+        self._stop.set()
+
+    def _run(self):
+        try:
+            client = self.service.locate(self.full_id).client
+            if client is None:
+                return
+            for raw in client.api.stats(self.full_id, stream=True, decode=True):
+                if self._stop.is_set():
+                    break
+                if not (raw.get("precpu_stats") or {}).get("system_cpu_usage"):
+                    # The first streamed sample has no previous CPU reading
+                    continue
+                self.buffer.append(sample_from_raw(raw, time.time()))
+                self.samples += 1
+        except Exception as e:
+            if not self._stop.is_set():
+                logger.debug(f"Stats stream for {self.full_id[:12]} ended: {e}")
+
+
+class StatsCollector:
+    """Keeps one streaming stats subscription per running container
+
+    Each running container gets a reader thread that follows the daemon's
+    streaming stats endpoint (one sample per second) and writes into a
+    fixed-size RingBuffer, so memory per container is bounded and reads
+    never wait for the daemon. Subscriptions follow container events and
+    are reconciled with the registry after every resync.
+    """
+
+    def __init__(
+        self,
+        service: DockerCluster,
+        registry: ContainerRegistry,
+        events: DockerEventStream,
+        history_size: int = 300,
+    ):
+        self.service = service
+        self.registry = registry
+        self.events = events
+        self.history_size = history_size
+        self._buffers: Dict[str, RingBuffer] = {}
+        self._streams: Dict[str, ContainerStatsStream] = {}
+        self._lock = threading.Lock()
+        self._started = False
+        events.subscribe(self.handle_event)
+        events.on_reconnect(self.reconcile)
+
+    def start(self):
+        """Subscribe to every container the registry reports as running"""
+        self._started = True
+        self.reconcile()
+
+    def stop(self):
+        """Stop every subscription"""
+        self._started = False
+        with self._lock:
+            for stream in self._streams.values():
+                stream.stop()
+            self._streams.clear()
+
+    def reconcile(self):
+        """Match subscriptions to the registry's running containers
+
+        History of containers the registry no longer knows is dropped, in
+        case their destroy event was missed.
+        """
+        if not self._started:
+            return
+        running = set()
+        for info in self.registry.list(all_containers=False):
+            full_id = self.registry.resolve_id(info.id)
+            if full_id:
+                running.add(full_id)
+        with self._lock:
+            for full_id in list(self._streams):
+                if full_id not in running:
+                    self._streams.pop(full_id).stop()
+            if self.registry.synced:
+                for full_id in list(self._buffers):
+                    if self.registry.resolve_id(full_id) is None:
+                        del self._buffers[full_id]
+        for full_id in running:
+            self.watch(full_id)
+
+    def handle_event(self, event: dict):
+        """Events stream subscriber"""
+        if not self._started or event.get("Type") != "container":
+            return
+        full_id = event.get("id") or (event.get("Actor") or {}).get("ID")
+        action = event.get("Action") or ""
+        if not full_id:
+            return
+        if action in START_ACTIONS:
+            self.watch(full_id)
+        elif action in STOP_ACTIONS:
+            self.unwatch(full_id, forget=action == "destroy")
+
+    def watch(self, full_id: str):
+        """Start a subscription unless one is already running"""
+        with self._lock:
+            stream = self._streams.get(full_id)
+            if stream is not None and stream.alive:
+                return
+            buffer = self._buffers.get(full_id)
+            if buffer is None:
+                buffer = RingBuffer(self.history_size, STATS_FIELDS)
+                self._buffers[full_id] = buffer
+            stream = ContainerStatsStream(self.service, full_id, buffer)
+            self._streams[full_id] = stream
+        stream.start()
+
+    def unwatch(self, full_id: str, forget: bool = False):
+        """Stop a subscription, keeping its history unless ``forget``"""
+        with self._lock:
+            stream = self._streams.pop(full_id, None)
+            if forget:
+                self._buffers.pop(full_id, None)
+        if stream is not None:
+            stream.stop()
+
+    def latest(self, container_ref: str) -> Optional[ContainerStats]:
+        """Most recent sample for a container, if it is being collected"""
+        samples = self.window(container_ref, 1)
+        return samples[-1] if samples else None
+
+    def window(self, container_ref: str, size: int) -> List[ContainerStats]:
+        """Up to ``size`` most recent samples, oldest first"""
+        full_id = self.registry.resolve_id(container_ref)
+        buffer = self._buffers.get(full_id) if full_id else None
+        info = self.registry.get(full_id) if full_id else None
+        if buffer is None or info is None:
+            return []
+        return [
+            to_container_stats(info.id, info.name, sample)
+            for sample in buffer.window(size)
+        ]
+
+    def window_v2(self, container_ref: str, size: int) -> List[ContainerStatsV2]:
+        """Up to ``size`` most recent v2 samples, oldest first"""
+        full_id = self.registry.resolve_id(container_ref)
+        buffer = self._buffers.get(full_id) if full_id else None
+        info = self.registry.get(full_id) if full_id else None
+        if buffer is None or info is None:
+            return []
+        return self._to_v2(info.id, info.name, buffer.window(size + 1), size)
+
+    def latest_v2(
+        self, container_refs: Optional[List[str]] = None
+    ) -> List[ContainerStatsV2]:
+        """Latest v2 sample of each given container, or of every watched one"""
+        if container_refs is not None:
+            full_ids = [self.registry.resolve_id(ref) for ref in container_refs]
+        with self._lock:
+            if container_refs is None:
+                full_ids = list(self._streams)
+            buffers = [self._buffers.get(full_id) for full_id in full_ids]
+        latest = []
+        for full_id, buffer in zip(full_ids, buffers):
+            info = self.registry.get(full_id) if buffer is not None else None
+            if info is None or not len(buffer):
+                continue
+            latest.extend(self._to_v2(info.id, info.name, buffer.window(2), 1))
+        return latest
+
+    @staticmethod
+    def _to_v2(
+        container_id: str, name: str, samples: List[Dict[str, float]], size: int
+    ) -> List[ContainerStatsV2]:
+        """Convert samples, using each one's predecessor for rates"""
+        start = max(len(samples) - size, 0)
+        return [
+            to_container_stats_v2(
+                container_id,
+                name,
+                samples[index],
+                samples[index - 1] if index > 0 else None,
+            )
+            for index in range(start, len(samples))
+        ]
+
+    def buffers(self) -> Dict[str, RingBuffer]:
+        """Sample buffers of every container with history, by full ID"""
+        with self._lock:
+            return dict(self._buffers)
+
+    def memory_bytes(self) -> int:
+        """Memory held by all sample buffers"""
+        with self._lock:
+            return sum(buffer.nbytes for buffer in self._buffers.values())
+
+    @property
+    def watched(self) -> int:
+        return len(self._streams)
+
+
+_collector: Optional[StatsCollector] = None
+_collector_lock = threading.Lock()
+
+
+def get_stats_collector() -> StatsCollector:
+    """Return the process-wide StatsCollector, creating it on first use"""
+    global _collector
+    if _collector is None:
+        with _collector_lock:
+            if _collector is None:
+                _collector = StatsCollector(
+                    get_docker_cluster(),
+                    get_container_registry(),
+                    get_event_stream(),
+                    history_size=settings.stats_history_size,
+                )
+    return _collector
+
+
+def close_stats_collector():
+    """Stop the process-wide StatsCollector"""
+    global _collector
+    with _collector_lock:
+        collector, _collector = _collector, None
+    if collector is not None:
+        collector.stop()
@@ -0,0 +1,242 @@
+import asyncio
+import logging
+import threading
+import time
+from typing import Dict, List, Optional
+
+from app.core.config import settings
+from app.services.registry import ContainerRegistry, get_container_registry
+from app.services.stats_collector import StatsCollector, get_stats_collector
+from app.services.system_sampler import SystemSampler, get_system_sampler
+
+logger = logging.getLogger(__name__)
+
+
+class StatsHub:
+    """Publishes one shared stats snapshot per tick to every stream
+
+    The snapshot is built from the StatsCollector and SystemSampler
+    buffers, so any number of subscribers costs no extra daemon calls.
+    Subscribers always read the newest snapshot, which means a consumer
+    that falls behind skips snapshots instead of queueing them.
+    """
+
+    def __init__(
+        self,
+        collector: StatsCollector,
+        sampler: SystemSampler,
+        registry: ContainerRegistry,
+        tick_interval: float = 1.0,
+    ):
+        self.collector = collector
+        self.sampler = sampler
+        self.registry = registry
+        self.tick_interval = tick_interval
+        self.seq = 0
+        self.timestamp = 0.0
+        self.containers: Dict[str, Dict] = {}
+        self.system: Dict = {}
+        self.subscribers = 0
+        self.dropped = 0
+        self._published: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self):
+        """Publish the first snapshot and start the tick task"""
+        if self._task is not None:
+            return
+        self._published = asyncio.Event()
+        self._publish()
+        self._task = asyncio.create_task(self._tick_loop())
+
+    async def stop(self):
+        """Stop publishing"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def wait(self, seq: int) -> int:
+        """Wait until a snapshot newer than ``seq`` is published"""
+        while self.seq <= seq:
+            if self._published is None:
+                raise RuntimeError("Stats hub is not running")
+            await self._published.wait()
+        return self.seq
+
+    def subscribe(
+        self,
+        containers: Optional[List[str]] = None,
+        system: bool = True,
+        interval: float = 1.0,
+    ) -> "StatsSubscription":
+        """Open a subscription to some or all containers"""
+        return StatsSubscription(self, containers, system, interval)
+
+    async def _tick_loop(self):
+        while True:
+            await asyncio.sleep(self.tick_interval)
+            try:
+                self._publish()
+            except Exception as e:
+                logger.error(f"Error publishing stats snapshot: {e}")
+
+    def _publish(self):
+        containers = {
+            stats.container_id: stats.model_dump(exclude={"container_id"})
+            for stats in self.collector.latest_v2()
+        }
+        system = self.sampler.latest_v2()
+
+        self.containers = containers
+        self.system = system.model_dump() if system is not None else {}
+        self.timestamp = time.time()
+        self.seq += 1
+        # Wake every waiter, then arm a fresh event for the next tick
+        published, self._published = self._published, asyncio.Event()
+        published.set()
+
+
+class StatsSubscription:
+    """One client's view of the hub: filtered, rate-limited, delta-encoded
+
+    The first frame is a full ``snapshot``; later frames are ``delta``
+    frames that carry only the fields that changed, new containers in
+    full, and the IDs of containers that went away. Frames the client was
+    too slow to take are counted in ``dropped`` rather than buffered.
+    """
+
+    def __init__(
+        self,
+        hub: StatsHub,
+        containers: Optional[List[str]],
+        system: bool,
+        interval: float,
+    ):
+        self.hub = hub
+        self.refs = list(containers) if containers else None
+        self.include_system = system
+        self.interval = max(interval, hub.tick_interval)
+        self.dropped = 0
+        self._seq = 0
+        self._due: Optional[float] = None
+        self._containers: Dict[str, Dict] = {}
+        self._system: Dict = {}
+        self._sent_snapshot = False
+
+    async def next_frame(self) -> Optional[Dict]:
+        """Wait for the next frame; None when nothing changed"""
+        loop = asyncio.get_running_loop()
+        now = loop.time()
+        if self._due is None:
+            self._due = now
+        elif self._due < now:
+            # The consumer took longer than its interval; skip what it missed
+            missed = int((now - self._due) // self.interval)
+            if missed:
+                self.dropped += missed
+                self.hub.dropped += missed
+                self._due += missed * self.interval
+        delay = self._due - now
+        if delay > 0:
+            await asyncio.sleep(delay)
+        self._seq = await self.hub.wait(self._seq)
+        self._due += self.interval
+        return self._encode()
+
+    def _selected(self) -> Dict[str, Dict]:
+        containers = self.hub.containers
+        if self.refs is None:
+            return containers
+        selected = {}
+        for ref in self.refs:
+            info = self.hub.registry.get(ref)
+            if info is not None and info.id in containers:
+                selected[info.id] = containers[info.id]
+        return selected
+
+    def _encode(self) -> Optional[Dict]:
+        containers = self._selected()
+        system = self.hub.system if self.include_system else {}
+        frame = {
+            "seq": self._seq,
+            "timestamp": self.hub.timestamp,
+            "dropped": self.dropped,
+        }
+
+        if not self._sent_snapshot:
+            self._sent_snapshot = True
+            self._containers = containers
+            self._system = system
+            frame["type"] = "snapshot"
+            frame["containers"] = containers
+            if self.include_system:
+                frame["system"] = system
+            return frame
+
+        changed = {}
+        for container_id, values in containers.items():
+            previous = self._containers.get(container_id)
+            if previous is None:
+                changed[container_id] = values
+                continue
+            diff = {
+                field: value
+                for field, value in values.items()
+                if previous.get(field) != value
+            }
+            if diff:
+                changed[container_id] = diff
+        removed = [
+            container_id
+            for container_id in self._containers
+            if container_id not in containers
+        ]
+        system_diff = {
+            field: value
+            for field, value in system.items()
+            if self._system.get(field) != value
+        }
+        self._containers = containers
+        self._system = system
+        if not changed and not removed and not system_diff:
+            return None
+
+        frame["type"] = "delta"
+        frame["containers"] = changed
+        if removed:
+            frame["removed"] = removed
+        if system_diff:
+            frame["system"] = system_diff
+        return frame
+
+
+_hub: Optional[StatsHub] = None
+_hub_lock = threading.Lock()
+
+
+def get_stats_hub() -> StatsHub:
+    """Return the process-wide StatsHub, creating it on first use"""
+    global _hub
+    if _hub is None:
+        with _hub_lock:
+            if _hub is None:
+                _hub = StatsHub(
+                    get_stats_collector(),
+                    get_system_sampler(),
+                    get_container_registry(),
+                    tick_interval=settings.stream_tick_interval,
+                )
+    return _hub
+
+
+async def close_stats_hub():
+    """Stop the process-wide StatsHub's tick task"""
+    global _hub
+    with _hub_lock:
+        hub, _hub = _hub, None
+    if hub is not None:
+        await hub.stop()
@@ -0,0 +1,319 @@
+import logging
+import os
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+import psutil
+
+from app.core.config import settings
+from app.models.container import SystemStats, SystemStatsV2
+from app.utils.ring_buffer import RingBuffer
+
+logger = logging.getLogger(__name__)
+
+BASE_FIELDS = (
+    "timestamp",
+    "cpu_percent",
+    "memory_percent",
+    "memory_used",
+    "memory_total",
+    "disk_usage_percent",
+    "disk_read_rate",
+    "disk_write_rate",
+    "net_rx_rate",
+    "net_tx_rate",
+)
+
+
+class SystemSampler:
+    """Background sampler of host CPU, memory, disk and network
+
+    A daemon thread samples psutil every ``interval`` seconds using
+    non-blocking calls (CPU percentages and I/O rates are computed from the
+    previous sample) and stores the results in a RingBuffer. When
+    ``proc_path`` is set, CPU, memory, disk and network counters are read
+    from that procfs mount instead of the container's own ``/proc``, so the
+    host is measured; psutil's process-wide settings are left alone. Disk
+    usage is that of the filesystem at ``disk_path``.
+    """
+
+    def __init__(
+        self,
+        interval: float = 1.0,
+        history_size: int = 3600,
+        proc_path: Optional[str] = None,
+        disk_path: str = "/",
+    ):
+        self.interval = interval
+        self.proc_path = proc_path
+        self.disk_path = disk_path
+        self._cpu_previous: Optional[List[Tuple[int, int]]] = None
+        if proc_path:
+            self.cores = max(len(self._read_cpu_times()) - 1, 1)
+        else:
+            self.cores = psutil.cpu_count() or 1
+        self.core_fields = tuple(f"cpu_core_{index}" for index in range(self.cores))
+        self.buffer = RingBuffer(history_size, BASE_FIELDS + self.core_fields)
+        self._previous: Optional[Tuple[float, int, int, int, int]] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        """Prime the counters and start sampling"""
+        if self._thread is not None:
+            return
+        self._cpu_percents()
+        self._previous = self._io_counters()
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="system-sampler", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        """Stop sampling"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def latest(self) -> Optional[SystemStats]:
+        """Most recent snapshot, or None before the first sample"""
+        sample = self.buffer.latest()
+        return self._to_system_stats(sample) if sample else None
+
+    def latest_v2(self) -> Optional[SystemStatsV2]:
+        """Most recent numeric snapshot, or None before the first sample"""
+        sample = self.buffer.latest()
+        return self._to_system_stats_v2(sample) if sample else None
+
+    def history(self, seconds: float, points: int) -> List[SystemStats]:
+        """Samples from the last ``seconds``, averaged down to ``points``"""
+        return [
+            self._to_system_stats(sample)
+            for sample in self._downsample(seconds, points)
+        ]
+
+    def history_v2(self, seconds: float, points: int) -> List[SystemStatsV2]:
+        """Numeric samples from the last ``seconds``, averaged down to ``points``"""
+        return [
+            self._to_system_stats_v2(sample)
+            for sample in self._downsample(seconds, points)
+        ]
+
+    def _downsample(self, seconds: float, points: int) -> List[dict]:
+        size = max(int(seconds / self.interval), 1)
+        samples = self.buffer.window(size)
+        if not samples:
+            return []
+        step = max(-(-len(samples) // points), 1)
+        downsampled = []
+        for start in range(0, len(samples), step):
+            bucket = samples[start : start + step]
+            averaged = {
+                field: sum(sample[field] for sample in bucket) / len(bucket)
+                for field in self.buffer.fields
+            }
+            # Report the bucket at the time of its newest sample
+            averaged["timestamp"] = bucket[-1]["timestamp"]
+            downsampled.append(averaged)
+        return downsampled
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.buffer.append(self._sample())
+            except Exception as e:
+                logger.error(f"Error sampling system stats: {e}")
+
+    def _sample(self) -> Tuple[float, ...]:
+        cpu_percent, per_core = self._cpu_percents()
+        memory_percent, memory_used, memory_total = self._memory()
+        disk = psutil.disk_usage(self.disk_path)
+
+        current = self._io_counters()
+        previous, self._previous = self._previous, current
+        elapsed = current[0] - previous[0]
+        rates = [
+            max(now - before, 0) / elapsed if elapsed > 0 else 0.0
+            for now, before in zip(current[1:], previous[1:])
+        ]
+
+        per_core = (list(per_core) + [0.0] * self.cores)[: self.cores]
+        return (
+            time.time(),
+            cpu_percent,
+            memory_percent,
+            memory_used,
+            memory_total,
+            disk.percent,
+            *rates,
+            *per_core,
+        )
+
+    def _cpu_percents(self) -> Tuple[float, List[float]]:
+        """Overall and per-core CPU percentages since the previous call"""
+        if not self.proc_path:
+            per_core = psutil.cpu_percent(interval=None, percpu=True)
+            return psutil.cpu_percent(interval=None), per_core
+        current = self._read_cpu_times()
+        previous, self._cpu_previous = self._cpu_previous or current, current
+        percents = []
+        for (busy, total), (busy_before, total_before) in zip(current, previous):
+            elapsed = total - total_before
+            percents.append(
+                (busy - busy_before) / elapsed * 100 if elapsed > 0 else 0.0
+            )
+        return percents[0], percents[1:]
+
+    def _read_cpu_times(self) -> List[Tuple[int, int]]:
+        """Busy and total jiffies of all CPUs, then of each core, from ``stat``"""
+        times = []
+        with open(os.path.join(self.proc_path, "stat")) as stat:
+            for line in stat:
+                if not line.startswith("cpu"):
+                    break
+                # user nice system idle iowait irq softirq steal
+                fields = [int(value) for value in line.split()[1:9]]
+                total = sum(fields)
+                times.append((total - fields[3] - fields[4], total))
+        return times
+
+    def _memory(self) -> Tuple[float, int, int]:
+        """Percent of memory in use, bytes in use and total bytes"""
+        if not self.proc_path:
+            memory = psutil.virtual_memory()
+            return memory.percent, memory.used, memory.total
+        meminfo: Dict[str, int] = {}
+        with open(os.path.join(self.proc_path, "meminfo")) as lines:
+            for line in lines:
+                name, _, value = line.partition(":")
+                meminfo[name] = int(value.split()[0]) * 1024
+        total = meminfo["MemTotal"]
+        used = total - meminfo.get("MemAvailable", meminfo["MemFree"])
+        return (used / total * 100 if total else 0.0), used, total
+
+    def _io_counters(self) -> Tuple[float, int, int, int, int]:
+        """Monotonic time plus cumulative disk and network byte counters"""
+        read_bytes, write_bytes = self._disk_counters()
+        rx_bytes, tx_bytes = self._net_counters()
+        return time.monotonic(), read_bytes, write_bytes, rx_bytes, tx_bytes
+
+    def _disk_counters(self) -> Tuple[int, int]:
+        """Bytes read from and written to every block device"""
+        if not self.proc_path:
+            disk = psutil.disk_io_counters()
+            return (disk.read_bytes, disk.write_bytes) if disk else (0, 0)
+        read_bytes = write_bytes = 0
+        with open(os.path.join(self.proc_path, "diskstats")) as diskstats:
+            for line in diskstats:
+                fields = line.split()
+                # Whole devices only; a partition's I/O is also its disk's
+                if len(fields) < 10 or not os.path.exists(f"/sys/block/{fields[2]}"):
+                    continue
+                read_bytes += int(fields[5]) * 512
+                write_bytes += int(fields[9]) * 512
+        return read_bytes, write_bytes
+
+    def _net_counters(self) -> Tuple[int, int]:
+        """Received and sent bytes over every non-loopback interface
+
+        ``<proc>/net/dev`` describes the network namespace of the reading
+        process, so with a host procfs mount the host's namespace is read
+        through PID 1 instead.
+        """
+        if self.proc_path:
+            try:
+                return self._parse_net_dev(os.path.join(self.proc_path, "1/net/dev"))
+            except OSError:
+                pass
+        counters = psutil.net_io_counters(pernic=True)
+        rx_bytes = sum(nic.bytes_recv for name, nic in counters.items() if name != "lo")
+        tx_bytes = sum(nic.bytes_sent for name, nic in counters.items() if name != "lo")
+        return rx_bytes, tx_bytes
+
+    @staticmethod
+    def _parse_net_dev(path: str) -> Tuple[int, int]:
+        rx_bytes = tx_bytes = 0
+        with open(path) as net_dev:
+            for line in net_dev.readlines()[2:]:
+                name, _, data = line.partition(":")
+                if name.strip() == "lo":
+                    continue
+                fields = data.split()
+                rx_bytes += int(fields[0])
+                tx_bytes += int(fields[8])
+        return rx_bytes, tx_bytes
+
+    def _to_system_stats(self, sample: dict) -> SystemStats:
+        return SystemStats(
+            cpu_percent=round(sample["cpu_percent"], 2),
+            memory_percent=round(sample["memory_percent"], 2),
+            memory_used=f"{sample['memory_used'] / (1024**3):.2f} GB",
+            memory_total=f"{sample['memory_total'] / (1024**3):.2f} GB",
+            disk_usage_percent=round(sample["disk_usage_percent"], 2),
+            timestamp=sample["timestamp"],
+            cpu_per_core=[round(sample[field], 2) for field in self.core_fields],
+            disk_read_rate=round(sample["disk_read_rate"], 2),
+            disk_write_rate=round(sample["disk_write_rate"], 2),
+            net_rx_rate=round(sample["net_rx_rate"], 2),
+            net_tx_rate=round(sample["net_tx_rate"], 2),
+        )
+
+    def _to_system_stats_v2(self, sample: dict) -> SystemStatsV2:
+        return SystemStatsV2(
+            timestamp=sample["timestamp"],
+            cpu_percent=round(sample["cpu_percent"], 2),
+            cpu_per_core=[round(sample[field], 2) for field in self.core_fields],
+            memory_percent=round(sample["memory_percent"], 2),
+            memory_used=int(sample["memory_used"]),
+            memory_total=int(sample["memory_total"]),
+            disk_usage_percent=round(sample["disk_usage_percent"], 2),
+            disk_read_rate=round(sample["disk_read_rate"], 2),
+            disk_write_rate=round(sample["disk_write_rate"], 2),
+            net_rx_rate=round(sample["net_rx_rate"], 2),
+            net_tx_rate=round(sample["net_tx_rate"], 2),
+        )
+
+
+def detect_host_disk_path() -> str:
+    """Host filesystem whose usage is reported, from settings or else our own"""
+    return settings.host_disk_path or "/"
+
+
+def detect_host_proc_path() -> Optional[str]:
+    """Host procfs mount to sample, from settings or the compose mount"""
+    if settings.host_proc_path:
+        return settings.host_proc_path
+    if os.path.isdir("/host/proc"):
+        return "/host/proc"
+    return None
+
+
+_sampler: Optional[SystemSampler] = None
+_sampler_lock = threading.Lock()
+
+
+def get_system_sampler() -> SystemSampler:
+    """Return the process-wide SystemSampler, creating it on first use"""
+    global _sampler
+    if _sampler is None:
+        with _sampler_lock:
+            if _sampler is None:
+                _sampler = SystemSampler(
+                    interval=settings.system_sample_interval,
+                    history_size=settings.system_history_size,
+                    proc_path=detect_host_proc_path(),
+                    disk_path=detect_host_disk_path(),
+                )
+    return _sampler
+
+
+def close_system_sampler():
+    """Stop the process-wide SystemSampler"""
+    global _sampler
+    with _sampler_lock:
+        sampler, _sampler = _sampler, None
+    if sampler is not None:
+        sampler.stop()
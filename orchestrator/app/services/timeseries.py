@@ -0,0 +1,445 @@
+import json
+import logging
+import math
+import os
+import sys
+import threading
+import time
+from array import array
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from app.core.config import settings
+from app.models.container import StatsHistory
+from app.services.stats_collector import StatsCollector, get_stats_collector
+from app.services.system_sampler import SystemSampler, get_system_sampler
+from app.utils.container_stats import RATE_FIELDS
+from app.utils.ring_buffer import RingBuffer
+
+logger = logging.getLogger(__name__)
+
+AGGREGATES = ("min", "max", "avg", "p95")
+
+# Gauges taken as-is from container samples; RATE_FIELDS are derived
+CONTAINER_GAUGES = ("cpu_percent", "memory_usage", "pids")
+CONTAINER_METRICS = CONTAINER_GAUGES + tuple(RATE_FIELDS.values())
+HOST_METRICS = (
+    "cpu_percent",
+    "memory_used",
+    "disk_read_rate",
+    "disk_write_rate",
+    "net_rx_rate",
+    "net_tx_rate",
+)
+HOST_SERIES = "host"
+
+FILE_MAGIC = b"NUBRIXTS1\n"
+
+
+def rollup_fields(metrics: Sequence[str]) -> Tuple[str, ...]:
+    """Column layout of a rollup series"""
+    return ("timestamp", "count") + tuple(
+        f"{metric}_{aggregate}" for metric in metrics for aggregate in AGGREGATES
+    )
+
+
+def aggregate(values: List[float]) -> Tuple[float, float, float, float]:
+    """min, max, mean and nearest-rank 95th percentile"""
+    if not values:
+        return (math.nan,) * 4
+    ordered = sorted(values)
+    rank = max(math.ceil(0.95 * len(ordered)) - 1, 0)
+    return ordered[0], ordered[-1], sum(ordered) / len(ordered), ordered[rank]
+
+
+def container_points(samples: List[Dict[str, float]], start: float) -> Dict:
+    """Metric values of the samples at or after ``start``
+
+    Rates are computed from each sample's predecessor, so one sample
+    before ``start`` may be passed to seed them.
+    """
+    points = {metric: [] for metric in CONTAINER_METRICS}
+    previous = None
+    for sample in samples:
+        if sample["timestamp"] >= start:
+            for gauge in CONTAINER_GAUGES:
+                points[gauge].append(sample[gauge])
+            elapsed = sample["timestamp"] - previous["timestamp"] if previous else 0
+            if elapsed > 0:
+                for counter, rate in RATE_FIELDS.items():
+                    delta = max(sample[counter] - previous[counter], 0)
+                    points[rate].append(delta / elapsed)
+        previous = sample
+    return points
+
+
+class TimeSeriesStore:
+    """10-second and 1-minute rollups of container and host statistics
+
+    Full-resolution samples stay in the StatsCollector and SystemSampler
+    ring buffers. Every 10 seconds a background thread reduces the samples
+    of the bucket that just closed to min/max/avg/p95 per metric, and every
+    minute does the same for the minute. Rollups are kept in columnar
+    RingBuffers (one per series and resolution), so a range query is a
+    binary search plus array slices. They are written to ``path`` every
+    ``persist_interval`` seconds and on stop, and loaded on start.
+    """
+
+    def __init__(
+        self,
+        collector: StatsCollector,
+        sampler: SystemSampler,
+        retention: Dict[int, int],
+        path: Optional[str] = None,
+        persist_interval: int = 60,
+        grace: float = 2.0,
+    ):
+        self.collector = collector
+        self.sampler = sampler
+        self.retention = dict(sorted(retention.items()))
+        self.path = path
+        self.persist_interval = persist_interval
+        self.grace = grace
+        self._series: Dict[Tuple[str, int], RingBuffer] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def resolutions(self) -> Tuple[int, ...]:
+        return tuple(self.retention)
+
+    def start(self):
+        """Load persisted rollups and start rolling up"""
+        if self._thread is not None:
+            return
+        if self.path:
+            self.load()
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="timeseries-rollup", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        """Stop rolling up and persist what has been collected"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+        if self.path:
+            self.save()
+
+    def rollup(self, end: int):
+        """Aggregate the buckets of every resolution that close at ``end``"""
+        sources = [(HOST_SERIES, self.sampler.buffer)]
+        sources.extend(self.collector.buffers().items())
+        for resolution in self.resolutions:
+            if end % resolution:
+                continue
+            start = end - resolution
+            for series_id, buffer in sources:
+                if series_id == HOST_SERIES:
+                    samples = buffer.between(start, end)
+                    points = {
+                        metric: [sample[metric] for sample in samples]
+                        for metric in HOST_METRICS
+                    }
+                else:
+                    # Include the samples just before the bucket to seed rates
+                    samples = buffer.between(start - resolution, end)
+                    points = container_points(samples, start)
+                    samples = [s for s in samples if s["timestamp"] >= start]
+                if not samples:
+                    continue
+                row = [start, len(samples)]
+                for values in points.values():
+                    row.extend(aggregate(values))
+                self._series_for(series_id, resolution).append(row)
+
+    def query(
+        self, series_id: str, start: float, end: float, step: int
+    ) -> Optional[StatsHistory]:
+        """Rollups of a series in [start, end) at roughly ``step`` seconds
+
+        The coarsest resolution no larger than ``step`` is used, falling
+        back to a coarser one when ``start`` is older than its retention
+        and that one reaches further back.
+        Buckets are merged to ``step`` when it is a larger multiple; merged
+        p95 values are the maximum of the bucket p95s, an upper bound.
+        """
+        resolution = self._pick_resolution(series_id, start, step)
+        if resolution is None:
+            return None
+        with self._lock:
+            buffer = self._series.get((series_id, resolution))
+        columns = buffer.columns(start, end)
+        metrics = HOST_METRICS if series_id == HOST_SERIES else CONTAINER_METRICS
+        step = max(step // resolution, 1) * resolution
+
+        timestamps = columns["timestamp"].tolist()
+        counts = columns["count"].tolist()
+        values = {
+            metric: {name: columns[f"{metric}_{name}"].tolist() for name in AGGREGATES}
+            for metric in metrics
+        }
+        if step > resolution:
+            timestamps, counts, values = self._merge(timestamps, counts, values, step)
+
+        return StatsHistory(
+            series=series_id,
+            resolution=resolution,
+            step=step,
+            timestamps=timestamps,
+            counts=[int(count) for count in counts],
+            metrics={
+                metric: {
+                    name: [None if math.isnan(v) else round(v, 2) for v in series]
+                    for name, series in aggregates.items()
+                }
+                for metric, aggregates in values.items()
+            },
+        )
+
+    def resolve_id(self, container_ref: str) -> Optional[str]:
+        """Series ID of a container by full ID or unique prefix of one
+
+        Rollups outlive their container, so this finds the history of
+        containers the registry no longer knows.
+        """
+        with self._lock:
+            series_ids = {key[0] for key in self._series if key[0] != HOST_SERIES}
+        if container_ref in series_ids:
+            return container_ref
+        if len(container_ref) >= 4:
+            matches = [
+                series_id
+                for series_id in series_ids
+                if series_id.startswith(container_ref)
+            ]
+            if len(matches) == 1:
+                return matches[0]
+        return None
+
+    def memory_bytes(self) -> int:
+        """Memory held by all rollup series"""
+        with self._lock:
+            return sum(buffer.nbytes for buffer in self._series.values())
+
+    def save(self):
+        """Write every series to ``path`` atomically"""
+        with self._lock:
+            series = list(self._series.items())
+        header = {"byteorder": sys.byteorder, "series": []}
+        payload = []
+        for (series_id, resolution), buffer in series:
+            columns = buffer.columns()
+            count = len(columns["timestamp"])
+            if not count:
+                continue
+            header["series"].append(
+                {
+                    "id": series_id,
+                    "resolution": resolution,
+                    "count": count,
+                    "fields": list(buffer.fields),
+                }
+            )
+            payload.extend(columns[field] for field in buffer.fields)
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        encoded = json.dumps(header).encode()
+        try:
+            with open(tmp_path, "wb") as state:
+                state.write(FILE_MAGIC)
+                state.write(len(encoded).to_bytes(8, "little"))
+                state.write(encoded)
+                for column in payload:
+                    column.tofile(state)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.error(f"Failed to persist metric rollups: {e}")
+
+    def load(self):
+        """Restore series written by ``save``"""
+        try:
+            with open(self.path, "rb") as state:
+                if state.read(len(FILE_MAGIC)) != FILE_MAGIC:
+                    raise ValueError("not a rollup file")
+                size = int.from_bytes(state.read(8), "little")
+                header = json.loads(state.read(size))
+                swap = header["byteorder"] != sys.byteorder
+                loaded = {}
+                for entry in header["series"]:
+                    columns = {}
+                    for field in entry["fields"]:
+                        column = array("d")
+                        column.fromfile(state, entry["count"])
+                        if swap:
+                            column.byteswap()
+                        columns[field] = column
+                    loaded[(entry["id"], entry["resolution"])] = columns
+        except FileNotFoundError:
+            return
+        except (OSError, EOFError, KeyError, ValueError) as e:
+            logger.error(f"Ignoring unreadable metric rollups {self.path}: {e}")
+            return
+
+        for (series_id, resolution), columns in loaded.items():
+            if resolution not in self.retention:
+                continue
+            buffer = self._series_for(series_id, resolution)
+            count = len(columns["timestamp"])
+            # Fields added since the file was written start out empty
+            buffer.load(
+                {
+                    field: columns.get(field) or array("d", [math.nan] * count)
+                    for field in buffer.fields
+                }
+            )
+        logger.info(f"Loaded {len(loaded)} metric rollup series from {self.path}")
+
+    def _run(self):
+        step = self.resolutions[0]
+        while True:
+            now = time.time()
+            boundary = (int(now) // step + 1) * step
+            if self._stop.wait(boundary + self.grace - now):
+                break
+            try:
+                self.rollup(boundary)
+                if boundary % self.persist_interval == 0:
+                    self._prune(boundary)
+                    if self.path:
+                        self.save()
+            except Exception as e:
+                logger.error(f"Error rolling up metrics: {e}")
+
+    def _series_for(self, series_id: str, resolution: int) -> RingBuffer:
+        key = (series_id, resolution)
+        with self._lock:
+            buffer = self._series.get(key)
+            if buffer is None:
+                metrics = (
+                    HOST_METRICS if series_id == HOST_SERIES else CONTAINER_METRICS
+                )
+                buffer = RingBuffer(self.retention[resolution], rollup_fields(metrics))
+                self._series[key] = buffer
+            return buffer
+
+    def _pick_resolution(
+        self, series_id: str, start: float, step: int
+    ) -> Optional[int]:
+        with self._lock:
+            available = [
+                (resolution, self._series[(series_id, resolution)])
+                for resolution in self.resolutions
+                if len(self._series.get((series_id, resolution)) or ())
+            ]
+        if not available:
+            return None
+        # Finest first, starting at the coarsest resolution that fits the step
+        fitting = [index for index, (r, _) in enumerate(available) if r <= step]
+        candidates = available[fitting[-1] :] if fitting else available
+        oldest = [
+            (buffer.oldest()["timestamp"], resolution)
+            for resolution, buffer in candidates
+        ]
+        for timestamp, resolution in oldest:
+            if timestamp <= start:
+                return resolution
+        # Nothing reaches back to start: the finest of those reaching furthest
+        return min(oldest)[1]
+
+    def _prune(self, now: float):
+        """Drop series that have received nothing for their whole retention"""
+        with self._lock:
+            for (series_id, resolution), buffer in list(self._series.items()):
+                latest = buffer.latest()
+                horizon = now - resolution * self.retention[resolution]
+                if not latest or latest["timestamp"] < horizon:
+                    del self._series[(series_id, resolution)]
+
+    @staticmethod
+    def _merge(
+        timestamps: List[float],
+        counts: List[float],
+        values: Dict[str, Dict[str, List[float]]],
+        step: int,
+    ):
+        """Combine consecutive buckets into ``step``-aligned groups"""
+        groups: List[List[int]] = []
+        group_start = None
+        for index, timestamp in enumerate(timestamps):
+            aligned = timestamp - timestamp % step
+            if aligned != group_start:
+                groups.append([])
+                group_start = aligned
+            groups[-1].append(index)
+
+        merged = {metric: {name: [] for name in AGGREGATES} for metric in values}
+        for group in groups:
+            for metric, aggregates in values.items():
+                # A bucket without values for a metric has NaN for all four
+                present = [
+                    index for index in group if not math.isnan(aggregates["avg"][index])
+                ]
+                weight = sum(counts[index] for index in present)
+                if not present or not weight:
+                    for name in AGGREGATES:
+                        merged[metric][name].append(math.nan)
+                    continue
+                merged[metric]["min"].append(
+                    min(aggregates["min"][index] for index in present)
+                )
+                merged[metric]["max"].append(
+                    max(aggregates["max"][index] for index in present)
+                )
+                merged[metric]["avg"].append(
+                    sum(aggregates["avg"][index] * counts[index] for index in present)
+                    / weight
+                )
+                merged[metric]["p95"].append(
+                    max(aggregates["p95"][index] for index in present)
+                )
+
+        merged_timestamps = [
+            timestamps[group[0]] - timestamps[group[0]] % step for group in groups
+        ]
+        merged_counts = [sum(counts[index] for index in group) for group in groups]
+        return merged_timestamps, merged_counts, merged
+
+
+_store: Optional[TimeSeriesStore] = None
+_store_lock = threading.Lock()
+
+
+def get_timeseries_store() -> TimeSeriesStore:
+    """Return the process-wide TimeSeriesStore, creating it on first use"""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = TimeSeriesStore(
+                    get_stats_collector(),
+                    get_system_sampler(),
+                    retention={
+                        10: settings.timeseries_retention_10s,
+                        60: settings.timeseries_retention_1m,
+                    },
+                    path=settings.timeseries_file
+                    or os.path.join(settings.data_dir, "timeseries.bin"),
+                    persist_interval=settings.timeseries_persist_interval,
+                )
+    return _store
+
+
+def close_timeseries_store():
+    """Stop the process-wide TimeSeriesStore, persisting its rollups"""
+    global _store
+    with _store_lock:
+        store, _store = _store, None
+    if store is not None:
+        store.stop()
@@ -0,0 +1,329 @@
+import asyncio
+import logging
+import threading
+import time
+import uuid
+from collections import deque
+from typing import Deque, Dict, Optional
+
+from docker.errors import NotFound
+
+from app.core.config import settings
+from app.models.container import (
+    ContainerInfo,
+    ContainerResources,
+    WarmPoolImageStats,
+    WarmPoolStats,
+)
+from app.services.admission import AdmissionController, get_admission_controller
+from app.services.async_docker_service import (
+    AsyncDockerService,
+    get_async_docker_service,
+)
+from app.services.registry import ContainerRegistry, get_container_registry
+
+logger = logging.getLogger(__name__)
+
+WARM_NAME_PREFIX = "nubrix-warm-"
+WARM_LABEL = "nubrix.pool=warm"
+
+
+class WarmContainer:
+    """An idle, health-checked container waiting to be handed out"""
+
+    __slots__ = ("info", "image", "ready_at")
+
+    def __init__(self, info: ContainerInfo, image: str, ready_at: float):
+        self.info = info
+        self.image = image
+        self.ready_at = ready_at
+
+
+class WarmPool:
+    """Keeps pre-started containers per image for near-instant creates
+
+    Warm containers are created with a ``nubrix-warm-`` name, have their
+    port allocated and their health endpoint checked, and wait in a queue.
+    ``acquire`` checks that one is still running, throwing away any that
+    died while idle, and hands it out by renaming it to the requested name; a
+    background task refills the pool and evicts containers that have been
+    idle for longer than ``max_idle_seconds``.
+
+    Docker does not allow labels to be changed after creation, so pool
+    membership is carried by the name: every warm container also carries
+    the ``nubrix.pool=warm`` label, but only those still named
+    ``nubrix-warm-*`` belong to the pool.
+
+    Every create, warm or on demand, goes through the admission controller;
+    the pool stops topping up while the host is short on capacity.
+    """
+
+    def __init__(
+        self,
+        docker_service: AsyncDockerService,
+        admission: AdmissionController,
+        registry: ContainerRegistry,
+        targets: Dict[str, int],
+        max_idle_seconds: float = 900.0,
+        refill_interval: float = 5.0,
+        refill_concurrency: int = 2,
+    ):
+        self.docker_service = docker_service
+        self.admission = admission
+        self.registry = registry
+        self.targets = dict(targets)
+        self.max_idle_seconds = max_idle_seconds
+        self.refill_interval = refill_interval
+        self.refill_concurrency = refill_concurrency
+        self.hits = 0
+        self.misses = 0
+        self.created = 0
+        self.evicted = 0
+        self.failed = 0
+        self._idle: Dict[str, Deque[WarmContainer]] = {
+            image: deque() for image in self.targets
+        }
+        self._in_flight: Dict[str, int] = {image: 0 for image in self.targets}
+        self._refill_needed: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def enabled(self) -> bool:
+        """Whether any image has a non-zero target"""
+        return any(size > 0 for size in self.targets.values())
+
+    async def start(self):
+        """Adopt leftover warm containers and start the refill task"""
+        if not self.enabled or self._task is not None:
+            return
+        self._refill_needed = asyncio.Event()
+        try:
+            await self._adopt_existing()
+        except Exception as e:
+            logger.error(f"Failed to adopt existing warm containers: {e}")
+        self._task = asyncio.create_task(self._refill_loop())
+
+    async def stop(self):
+        """Stop refilling; idle containers are kept for the next process"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def acquire(
+        self, image: str, name: Optional[str] = None
+    ) -> Optional[ContainerInfo]:
+        """Hand out a warm container, or return None on a pool miss"""
+        queue = self._idle.get(image)
+        if queue is None:
+            return None
+
+        started = time.perf_counter()
+        while queue:
+            warm = queue.popleft()
+            if self._expired(warm):
+                self.evicted += 1
+                await self._discard(warm)
+                continue
+            if not await self._is_running(warm):
+                logger.warning(f"Warm container {warm.info.id} died while idle")
+                self.evicted += 1
+                await self._discard(warm)
+                continue
+            container_name = name or f"api-server-{int(time.time())}"
+            try:
+                info = await self.docker_service.rename_container(
+                    warm.info.id, container_name
+                )
+            except Exception:
+                # The name may already be taken; keep the container warm
+                queue.appendleft(warm)
+                self._signal_refill()
+                raise
+            info.startup_seconds = round(time.perf_counter() - started, 3)
+            self.hits += 1
+            self._signal_refill()
+            logger.info(f"Handed out warm container {info.id} as {info.name}")
+            return info
+
+        self.misses += 1
+        self._signal_refill()
+        return None
+
+    async def provision(
+        self,
+        image: str,
+        name: Optional[str] = None,
+        resources: Optional[ContainerResources] = None,
+    ) -> ContainerInfo:
+        """Hand out a warm container, or create one on a pool miss
+
+        Warm containers run with the default limits, so a request for
+        specific resources always gets a fresh container.
+        """
+        if resources is None:
+            info = await self.acquire(image, name)
+            if info is not None:
+                return info
+        async with self.admission.admit(resources, image) as node:
+            return await self.docker_service.create_container(
+                image, name, resources=resources, node=node
+            )
+
+    def stats(self) -> WarmPoolStats:
+        """Snapshot of pool occupancy and hit/miss counters"""
+        lookups = self.hits + self.misses
+        return WarmPoolStats(
+            enabled=self.enabled,
+            hits=self.hits,
+            misses=self.misses,
+            hit_ratio=round(self.hits / lookups, 4) if lookups else 0.0,
+            created=self.created,
+            evicted=self.evicted,
+            failed=self.failed,
+            images={
+                image: WarmPoolImageStats(
+                    target=target,
+                    idle=len(self._idle[image]),
+                    starting=self._in_flight[image],
+                )
+                for image, target in self.targets.items()
+            },
+        )
+
+    def _signal_refill(self):
+        if self._refill_needed is not None:
+            self._refill_needed.set()
+
+    def _expired(self, warm: WarmContainer) -> bool:
+        return time.monotonic() - warm.ready_at > self.max_idle_seconds
+
+    async def _is_running(self, warm: WarmContainer) -> bool:
+        """Whether a warm container still runs, per the registry or the daemon"""
+        info = self.registry.get(warm.info.id) if self.registry.fresh else None
+        if info is None:
+            try:
+                info = await self.docker_service.get_container(warm.info.id)
+            except NotFound:
+                return False
+        return info is not None and info.state == "running"
+
+    async def _adopt_existing(self):
+        """Take over running warm containers left by a previous process"""
+        leftovers = await self.docker_service.find_containers(
+            WARM_NAME_PREFIX, WARM_LABEL
+        )
+        for info in leftovers:
+            if info is None:
+                continue
+            queue = self._idle.get(info.image)
+            if (
+                queue is not None
+                and info.state == "running"
+                and len(queue) < self.targets[info.image]
+            ):
+                queue.append(WarmContainer(info, info.image, time.monotonic()))
+                logger.info(f"Adopted warm container {info.id} for {info.image}")
+            else:
+                await self._discard(WarmContainer(info, info.image, 0.0))
+
+    async def _refill_loop(self):
+        while True:
+            try:
+                await self._refill_once()
+            except Exception as e:
+                logger.error(f"Warm pool refill failed: {e}")
+            try:
+                await asyncio.wait_for(
+                    self._refill_needed.wait(), timeout=self.refill_interval
+                )
+            except asyncio.TimeoutError:
+                pass
+            self._refill_needed.clear()
+
+    async def _refill_once(self):
+        """Evict stale containers and top every image up to its target"""
+        for image, queue in self._idle.items():
+            fresh = deque()
+            while queue:
+                warm = queue.popleft()
+                if self._expired(warm):
+                    self.evicted += 1
+                    await self._discard(warm)
+                else:
+                    fresh.append(warm)
+            queue.extend(fresh)
+
+        if not self.admission.has_capacity():
+            return
+
+        semaphore = asyncio.Semaphore(self.refill_concurrency)
+        jobs = []
+        for image, target in self.targets.items():
+            missing = target - len(self._idle[image]) - self._in_flight[image]
+            for _ in range(max(missing, 0)):
+                self._in_flight[image] += 1
+                jobs.append(self._warm_one(image, semaphore))
+        if jobs:
+            await asyncio.gather(*jobs)
+
+    async def _warm_one(self, image: str, semaphore: asyncio.Semaphore):
+        try:
+            async with semaphore, self.admission.admit(image=image) as node:
+                info = await self.docker_service.create_container(
+                    image,
+                    f"{WARM_NAME_PREFIX}{uuid.uuid4().hex[:12]}",
+                    labels={"nubrix.pool": "warm"},
+                    node=node,
+                )
+            self._idle[image].append(WarmContainer(info, image, time.monotonic()))
+            self.created += 1
+        except Exception as e:
+            self.failed += 1
+            logger.error(f"Failed to start warm container for {image}: {e}")
+        finally:
+            self._in_flight[image] -= 1
+
+    async def _discard(self, warm: WarmContainer):
+        try:
+            await self.docker_service.stop_container(warm.info.id)
+            await self.docker_service.remove_container(warm.info.id)
+        except Exception as e:
+            logger.error(f"Failed to remove warm container {warm.info.id}: {e}")
+
+
+_warm_pool: Optional[WarmPool] = None
+_warm_pool_lock = threading.Lock()
+
+
+def get_warm_pool() -> WarmPool:
+    """Return the process-wide WarmPool, creating it on first use"""
+    global _warm_pool
+    if _warm_pool is None:
+        with _warm_pool_lock:
+            if _warm_pool is None:
+                targets = dict(settings.warm_pool_targets)
+                if not targets and settings.warm_pool_size > 0:
+                    targets = {settings.warm_pool_image: settings.warm_pool_size}
+                _warm_pool = WarmPool(
+                    get_async_docker_service(),
+                    get_admission_controller(),
+                    get_container_registry(),
+                    targets if settings.warm_pool_enabled else {},
+                    max_idle_seconds=settings.warm_pool_max_idle_seconds,
+                    refill_interval=settings.warm_pool_refill_interval,
+                    refill_concurrency=settings.warm_pool_refill_concurrency,
+                )
+    return _warm_pool
+
+
+async def close_warm_pool():
+    """Stop the process-wide WarmPool's background task"""
+    global _warm_pool
+    with _warm_pool_lock:
+        pool, _warm_pool = _warm_pool, None
+    if pool is not None:
+        await pool.stop()
@@ -0,0 +1,139 @@
+from typing import Dict, Optional, Tuple
+
+from app.models.container import ContainerStats, ContainerStatsV2
+
+# Order of the values produced by sample_from_raw. network_rx/network_tx
+# cover eth0 only (the v1 API); net_rx_bytes/net_tx_bytes sum every
+# interface.
+STATS_FIELDS = (
+    "timestamp",
+    "cpu_percent",
+    "memory_usage",
+    "memory_limit",
+    "network_rx",
+    "network_tx",
+    "net_rx_bytes",
+    "net_tx_bytes",
+    "block_read_bytes",
+    "block_write_bytes",
+    "pids",
+)
+
+# Cumulative counters reported per second by the v2 schema
+RATE_FIELDS = {
+    "net_rx_bytes": "network_rx_rate",
+    "net_tx_bytes": "network_tx_rate",
+    "block_read_bytes": "block_read_rate",
+    "block_write_bytes": "block_write_rate",
+}
+
+
+def sample_from_raw(stats: dict, timestamp: float) -> Tuple[float, ...]:
+    """Reduce a raw Docker stats document to a STATS_FIELDS tuple"""
+    cpu_stats = stats.get("cpu_stats") or {}
+    precpu_stats = stats.get("precpu_stats") or {}
+
+    # Calculate CPU percentage
+    cpu_delta = cpu_stats.get("cpu_usage", {}).get("total_usage", 0) - (
+        precpu_stats.get("cpu_usage", {}).get("total_usage", 0)
+    )
+    system_delta = cpu_stats.get("system_cpu_usage", 0) - precpu_stats.get(
+        "system_cpu_usage", 0
+    )
+    cpu_percent = (cpu_delta / system_delta) * 100 if system_delta > 0 else 0
+
+    # Memory calculations
+    memory_stats = stats.get("memory_stats") or {}
+    memory_usage = memory_stats.get("usage", 0)
+    memory_limit = memory_stats.get("limit", 0)
+
+    # Network calculations
+    networks = stats.get("networks") or {}
+    eth0 = networks.get("eth0") or {}
+    network_rx = eth0.get("rx_bytes", 0)
+    network_tx = eth0.get("tx_bytes", 0)
+    net_rx_bytes = sum(nic.get("rx_bytes", 0) for nic in networks.values())
+    net_tx_bytes = sum(nic.get("tx_bytes", 0) for nic in networks.values())
+
+    # Block I/O; cgroup v1 reports "Read"/"Write", cgroup v2 "read"/"write"
+    block_read_bytes = block_write_bytes = 0
+    blkio = (stats.get("blkio_stats") or {}).get("io_service_bytes_recursive") or []
+    for entry in blkio:
+        op = (entry.get("op") or "").lower()
+        if op == "read":
+            block_read_bytes += entry.get("value", 0)
+        elif op == "write":
+            block_write_bytes += entry.get("value", 0)
+
+    pids = (stats.get("pids_stats") or {}).get("current", 0)
+
+    return (
+        timestamp,
+        cpu_percent,
+        memory_usage,
+        memory_limit,
+        network_rx,
+        network_tx,
+        net_rx_bytes,
+        net_tx_bytes,
+        block_read_bytes,
+        block_write_bytes,
+        pids,
+    )
+
+
+def to_container_stats(
+    container_id: str, name: str, sample: Dict[str, float]
+) -> ContainerStats:
+    """Format a sample as the ContainerStats API model"""
+    memory_usage = sample["memory_usage"]
+    memory_limit = sample["memory_limit"]
+    memory_percent = (memory_usage / memory_limit) * 100 if memory_limit > 0 else 0
+
+    return ContainerStats(
+        container_id=container_id,
+        name=name,
+        cpu_percent=round(sample["cpu_percent"], 2),
+        memory_usage=f"{memory_usage / (1024*1024):.2f} MB",
+        memory_limit=f"{memory_limit / (1024*1024):.2f} MB",
+        memory_percent=round(memory_percent, 2),
+        network_rx=f"{sample['network_rx'] / (1024*1024):.2f} MB",
+        network_tx=f"{sample['network_tx'] / (1024*1024):.2f} MB",
+        timestamp=sample["timestamp"],
+    )
+
+
+def to_container_stats_v2(
+    container_id: str,
+    name: str,
+    sample: Dict[str, float],
+    previous: Optional[Dict[str, float]] = None,
+) -> ContainerStatsV2:
+    """Numeric stats; rates need the ``previous`` sample and are None without it"""
+    memory_usage = int(sample["memory_usage"])
+    memory_limit = int(sample["memory_limit"])
+    memory_percent = (memory_usage / memory_limit) * 100 if memory_limit > 0 else 0
+
+    rates: Dict[str, Optional[float]] = dict.fromkeys(RATE_FIELDS.values())
+    elapsed = sample["timestamp"] - previous["timestamp"] if previous else 0
+    if elapsed > 0:
+        for counter, rate in RATE_FIELDS.items():
+            # Counters restart from zero when the container restarts
+            delta = max(sample[counter] - previous[counter], 0)
+            rates[rate] = round(delta / elapsed, 2)
+
+    return ContainerStatsV2(
+        container_id=container_id,
+        name=name,
+        timestamp=sample["timestamp"],
+        cpu_percent=round(sample["cpu_percent"], 2),
+        memory_usage=memory_usage,
+        memory_limit=memory_limit,
+        memory_percent=round(memory_percent, 2),
+        network_rx_bytes=int(sample["net_rx_bytes"]),
+        network_tx_bytes=int(sample["net_tx_bytes"]),
+        block_read_bytes=int(sample["block_read_bytes"]),
+        block_write_bytes=int(sample["block_write_bytes"]),
+        pids=int(sample["pids"]),
+        **rates,
+    )
@@ -1,20 +1,126 @@
+import json
+import logging
+import os
 import socket
-from typing import List
+import threading
+from collections import deque
+from typing import Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
 
 
 class PortManager:
-    def __init__(self, start_port: int = 8000, end_port: int = 9000):
+    """Thread-safe host port allocator for the range [start_port, end_port)
+
+    Free ports are kept in a FIFO free-list and allocation state in a
+    bitmap, so allocating and releasing are O(1). Recently released ports go
+    to the back of the list, which keeps them out of use while they may
+    still be in TIME_WAIT. Ports that were reserved directly are left in
+    the free-list and skipped lazily when they reach the front.
+
+    When ``state_file`` is set, the allocated ports are loaded from it on
+    construction and written back by a background thread at most once per
+    ``flush_interval`` seconds, so allocating and releasing never touch the
+    disk. Changes since the last write can be lost in a crash; the startup
+    reconcile against the daemon's port bindings restores them.
+    """
+
+    def __init__(
+        self,
+        start_port: int = 8000,
+        end_port: int = 9000,
+        state_file: Optional[str] = None,
+        probe: bool = True,
+        flush_interval: float = 1.0,
+    ):
+        if end_port <= start_port:
+            raise ValueError("end_port must be greater than start_port")
         self.start_port = start_port
         self.end_port = end_port
-        self.used_ports = set()
+        self.state_file = state_file
+        self.probe = probe
+        self.flush_interval = flush_interval
+        self._used = bytearray(end_port - start_port)
+        self._used_count = 0
+        self._free = deque(range(start_port, end_port))
+        self._lock = threading.Lock()
+        self._persist_lock = threading.Lock()
+        self._generation = 0
+        self._persisted_generation = 0
+        self._dirty = threading.Event()
+        self._closing = threading.Event()
+        self._flusher: Optional[threading.Thread] = None
+        if state_file:
+            self._load()
 
-    def find_available_port(self) -> int:
-        """Find an available port in the configured range"""
-        for port in range(self.start_port, self.end_port):
-            if port not in self.used_ports and self._is_port_available(port):
-                self.used_ports.add(port)
-                return port
-        raise RuntimeError("No available ports in the configured range")
+    def find_available_port(self, probe: bool = True) -> int:
+        """Allocate a free port in the configured range
+
+        ``probe=False`` skips the bind test, for a port published on another
+        host.
+        """
+        with self._lock:
+            for _ in range(len(self._free)):
+                port = self._free.popleft()
+                if self._used[port - self.start_port]:
+                    # Stale entry for a port that was reserved directly
+                    continue
+                if self.probe and probe and not self._is_port_available(port):
+                    # Held by something outside our control; retry it later
+                    self._free.append(port)
+                    continue
+                self._mark_used(port)
+                break
+            else:
+                raise RuntimeError("No available ports in the configured range")
+        self._persist()
+        return port
+
+    def reserve_port(self, port: int) -> bool:
+        """Mark a specific port as allocated; False if it already was"""
+        if not self._in_range(port):
+            return False
+        with self._lock:
+            if self._used[port - self.start_port]:
+                return False
+            self._mark_used(port)
+        self._persist()
+        return True
+
+    def release_port(self, port: int):
+        """Release a port back to the pool"""
+        if not self._in_range(port):
+            return
+        with self._lock:
+            released = self._release(port)
+        if released:
+            self._persist()
+
+    def release_ports(self, ports: Iterable[int]):
+        """Release several ports under one lock"""
+        with self._lock:
+            released = False
+            for port in ports:
+                if self._in_range(port) and self._release(port):
+                    released = True
+        if released:
+            self._persist()
+
+    def reconcile(self, bound_ports: Iterable[int]):
+        """Replace the allocation state with the ports actually bound"""
+        with self._lock:
+            self._used = bytearray(self.end_port - self.start_port)
+            self._used_count = 0
+            for port in bound_ports:
+                if self._in_range(port) and not self._used[port - self.start_port]:
+                    self._mark_used(port)
+            self._free = deque(
+                port
+                for port in range(self.start_port, self.end_port)
+                if not self._used[port - self.start_port]
+            )
+        self._persist()
+        logger.info(f"Port allocator reconciled: {self._used_count} ports in use")
 
     def _is_port_available(self, port: int) -> bool:
         """Check if a port is available on the system"""
@@ -25,10 +131,110 @@ class PortManager:
         except OSError:
             return False
 
-    def release_port(self, port: int):
-        """Release a port back to the pool"""
-        self.used_ports.discard(port)
-
     def get_used_ports(self) -> List[int]:
         """Get list of currently used ports"""
-        return list(self.used_ports)
+        with self._lock:
+            used = self._used
+            return [
+                self.start_port + offset for offset in range(len(used)) if used[offset]
+            ]
+
+    def utilization(self) -> float:
+        """Fraction of the range that is allocated"""
+        return self._used_count / (self.end_port - self.start_port)
+
+    def flush(self):
+        """Write the allocated ports atomically, skipping superseded writes"""
+        if not self.state_file:
+            return
+        with self._persist_lock:
+            with self._lock:
+                generation = self._generation
+                if generation <= self._persisted_generation:
+                    return
+                used = bytes(self._used)
+            ports = [
+                self.start_port + offset for offset, flag in enumerate(used) if flag
+            ]
+            directory = os.path.dirname(self.state_file)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            tmp_path = f"{self.state_file}.tmp"
+            try:
+                with open(tmp_path, "w") as state:
+                    json.dump(
+                        {
+                            "start_port": self.start_port,
+                            "end_port": self.end_port,
+                            "used_ports": ports,
+                        },
+                        state,
+                    )
+                os.replace(tmp_path, self.state_file)
+                self._persisted_generation = generation
+            except OSError as e:
+                logger.error(f"Failed to persist port state: {e}")
+
+    def close(self):
+        """Stop the background writer after a final write"""
+        self._closing.set()
+        self._dirty.set()
+        flusher = self._flusher
+        if flusher is not None:
+            flusher.join()
+        self.flush()
+
+    def _in_range(self, port: int) -> bool:
+        return self.start_port <= port < self.end_port
+
+    def _mark_used(self, port: int):
+        self._used[port - self.start_port] = 1
+        self._used_count += 1
+        self._generation += 1
+
+    def _release(self, port: int) -> bool:
+        offset = port - self.start_port
+        if not self._used[offset]:
+            return False
+        self._used[offset] = 0
+        self._used_count -= 1
+        self._free.append(port)
+        self._generation += 1
+        return True
+
+    def _load(self):
+        try:
+            with open(self.state_file) as state:
+                ports = json.load(state).get("used_ports", [])
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            logger.error(f"Ignoring unreadable port state {self.state_file}: {e}")
+            return
+        with self._lock:
+            for port in ports:
+                if self._in_range(port) and not self._used[port - self.start_port]:
+                    self._mark_used(port)
+        self._persisted_generation = self._generation
+        logger.info(f"Loaded {self._used_count} allocated ports from {self.state_file}")
+
+    def _persist(self):
+        """Have the background writer save the state soon"""
+        if not self.state_file or self._closing.is_set():
+            return
+        if self._flusher is None:
+            with self._persist_lock:
+                if self._flusher is None:
+                    self._flusher = threading.Thread(
+                        target=self._flush_loop, name="port-state", daemon=True
+                    )
+                    self._flusher.start()
+        self._dirty.set()
+
+    def _flush_loop(self):
+        while not self._closing.is_set():
+            self._dirty.wait()
+            # Gather the changes of the next interval into a single write
+            self._closing.wait(self.flush_interval)
+            self._dirty.clear()
+            self.flush()
@@ -0,0 +1,140 @@
+import threading
+from array import array
+from typing import Dict, List, Mapping, Sequence
+
+
+class RingBuffer:
+    """Fixed-capacity columnar buffer of numeric samples
+
+    Each field is stored in its own ``array('d')`` that grows with the
+    first ``capacity`` samples and is then overwritten oldest-first, so
+    memory use never exceeds ``capacity * len(fields) * 8`` bytes.
+
+    The first field is the sample's time key. When samples are appended in
+    time order, ``columns`` and ``between`` answer range queries by binary
+    search.
+    """
+
+    def __init__(self, capacity: int, fields: Sequence[str]):
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        self.capacity = capacity
+        self.fields = tuple(fields)
+        self._columns = [array("d") for _ in self.fields]
+        self._head = 0
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return self._count
+
+    @property
+    def nbytes(self) -> int:
+        """Memory held by the sample columns"""
+        return sum(column.itemsize * len(column) for column in self._columns)
+
+    def append(self, values: Sequence[float]):
+        """Append one sample given in ``fields`` order"""
+        with self._lock:
+            index = self._head
+            if self._count < self.capacity:
+                for column, value in zip(self._columns, values):
+                    column.append(value)
+                self._count += 1
+            else:
+                for column, value in zip(self._columns, values):
+                    column[index] = value
+            self._head = (index + 1) % self.capacity
+
+    def latest(self) -> Dict[str, float]:
+        """Most recent sample, or an empty dict if there is none"""
+        with self._lock:
+            if not self._count:
+                return {}
+            index = (self._head - 1) % self.capacity
+            return {
+                field: column[index]
+                for field, column in zip(self.fields, self._columns)
+            }
+
+    def oldest(self) -> Dict[str, float]:
+        """Oldest retained sample, or an empty dict if there is none"""
+        with self._lock:
+            if not self._count:
+                return {}
+            index = (self._head - self._count) % self.capacity
+            return {
+                field: column[index]
+                for field, column in zip(self.fields, self._columns)
+            }
+
+    def window(self, size: int) -> List[Dict[str, float]]:
+        """Up to ``size`` most recent samples, oldest first"""
+        with self._lock:
+            size = min(size, self._count)
+            columns = self._slice(self._count - size, self._count)
+        return self._rows(columns)
+
+    def columns(
+        self, start: float = float("-inf"), end: float = float("inf")
+    ) -> Dict[str, array]:
+        """Per-field arrays of the samples with time key in [start, end)"""
+        with self._lock:
+            columns = self._slice(self._bisect(start), self._bisect(end))
+        return dict(zip(self.fields, columns))
+
+    def between(self, start: float, end: float) -> List[Dict[str, float]]:
+        """Samples with time key in [start, end), oldest first"""
+        with self._lock:
+            columns = self._slice(self._bisect(start), self._bisect(end))
+        return self._rows(columns)
+
+    def load(self, columns: Mapping[str, Sequence[float]]):
+        """Replace the contents with per-field values, oldest first"""
+        with self._lock:
+            size = min(len(columns[field]) for field in self.fields)
+            keep = min(size, self.capacity)
+            self._columns = [
+                array("d", columns[field][size - keep : size]) for field in self.fields
+            ]
+            self._count = keep
+            self._head = keep % self.capacity
+
+    def clear(self):
+        """Forget every sample"""
+        with self._lock:
+            self._columns = [array("d") for _ in self.fields]
+            self._head = 0
+            self._count = 0
+
+    def _bisect(self, value: float) -> int:
+        """Logical index of the first sample whose time key is >= value"""
+        keys = self._columns[0]
+        base = (self._head - self._count) % self.capacity
+        low, high = 0, self._count
+        while low < high:
+            middle = (low + high) // 2
+            if keys[(base + middle) % self.capacity] < value:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def _slice(self, first: int, last: int) -> List[array]:
+        """Columns for logical indices [first, last), oldest first"""
+        if first >= last:
+            return [array("d") for _ in self._columns]
+        base = (self._head - self._count) % self.capacity
+        start = (base + first) % self.capacity
+        stop = start + (last - first)
+        if stop <= self.capacity:
+            return [column[start:stop] for column in self._columns]
+        wrapped = stop - self.capacity
+        return [column[start:] + column[:wrapped] for column in self._columns]
+
+    def _rows(self, columns: List[array]) -> List[Dict[str, float]]:
+        size = len(columns[0]) if columns else 0
+        return [
+            {field: column[index] for field, column in zip(self.fields, columns)}
+            for index in range(size)
+        ]
@@ -0,0 +1,297 @@
+#!/usr/bin/env python3
+"""
+End-to-end load benchmark of the API against a fake Docker Engine.
+
+Starts FakeEngine (benchmarks/fake_engine.py) on a local port, or one per
+node with --nodes, points the application at it and runs the real
+lifespan, so docker-py, the executor, registry, event stream, stats
+collector, scheduler and readiness probing are all exercised. Each
+scenario reports throughput, p50/p99 latency and the process RSS
+afterwards:
+
+    create_burst    concurrent POST /containers/create
+    list_polling    concurrent GET /containers and /containers/running
+    stats_fanout    per-container GET /containers/{id}/stats and the v2
+                    bulk /v2/containers/stats
+    gateway_proxy   GET /proxy/{name}/health through the reverse proxy
+    cold_wake       POST /containers/{name}/hibernate, then the first proxied
+                    request, which wakes the container
+    batch_stop      POST /containers/batch/stop of every container
+    batch_remove    POST /containers/batch/remove of every container
+
+The run fails if any request errors or any host port is still allocated
+after teardown. Results are printed as a table, or as JSON with --json so
+runs can be compared across commits.
+
+    python -m benchmarks.api_load --containers 50 --create-latency 0.05
+    python -m benchmarks.api_load --nodes 3 --strategy binpack
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Awaitable, Callable, Dict, List
+
+import httpx
+import psutil
+
+from app.core.config import settings
+from benchmarks.fake_engine import FakeEngine, Latencies
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def _failed_items(response: httpx.Response) -> int:
+    """Failed entries in a batch response body"""
+    if not response.request.url.path.startswith("/containers/batch/"):
+        return 0
+    return response.json()["failed"]
+
+
+async def timed(
+    requests: List[Callable[[], Awaitable[httpx.Response]]],
+    concurrency: int,
+) -> Dict[str, float]:
+    """Run request factories with bounded concurrency and summarise them"""
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+    failures: List[str] = []
+
+    async def run(request):
+        async with semaphore:
+            started = time.perf_counter()
+            response = await request()
+            latencies.append(time.perf_counter() - started)
+            if response.status_code >= 400 or _failed_items(response):
+                failures.append(f"{response.status_code} {response.text[:200]}")
+
+    started = time.perf_counter()
+    await asyncio.gather(*(run(request) for request in requests))
+    elapsed = time.perf_counter() - started
+    for failure in failures[:5]:
+        print(f"  failed: {failure}", file=sys.stderr)
+    return {
+        "requests": len(requests),
+        "failures": len(failures),
+        "seconds": elapsed,
+        "throughput": len(requests) / elapsed if elapsed else 0.0,
+        "p50_ms": percentile(latencies, 0.50) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+        "rss_mb": psutil.Process().memory_info().rss / (1024 * 1024),
+    }
+
+
+async def main(args) -> int:
+    latencies = Latencies(
+        create=args.create_latency,
+        start=args.start_latency,
+        inspect=args.inspect_latency,
+        list=args.list_latency,
+        stats=args.stats_latency,
+        stop=args.stop_latency,
+        remove=args.remove_latency,
+        boot=args.boot_latency,
+    )
+    engines = [FakeEngine(latencies) for _ in range(args.nodes)]
+    for engine in engines:
+        engine.start()
+
+    if not args.verbose:
+        # Per-request INFO logs and urllib3 pool-size warnings swamp the report
+        logging.disable(logging.WARNING)
+
+    data_dir = tempfile.mkdtemp(prefix="nubrix-bench-")
+    if args.nodes == 1:
+        settings.docker_host = engines[0].base_url
+    else:
+        settings.docker_nodes = {
+            f"node{index}": engine.base_url for index, engine in enumerate(engines)
+        }
+        settings.scheduler_strategy = args.strategy
+    settings.data_dir = data_dir
+    settings.port_start = args.port_start
+    settings.port_end = args.port_start + args.containers * 2 + 100
+    settings.readiness_host = "127.0.0.1"
+    settings.warm_pool_enabled = False
+    if args.no_publish:
+        settings.publish_ports = False
+        settings.container_network = "bench"
+
+    # Import after configuring so module-level singletons see the settings
+    from app.main import app
+    from app.services.cluster import get_docker_cluster
+
+    if args.tracemalloc:
+        tracemalloc.start()
+
+    results: Dict[str, Dict[str, float]] = {}
+    transport = httpx.ASGITransport(app=app)
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://test", timeout=120
+        ) as client:
+            results["create_burst"] = await timed(
+                [
+                    lambda i=i: client.post(
+                        "/containers/create", json={"name": f"bench-{i:04d}"}
+                    )
+                    for i in range(args.containers)
+                ],
+                args.concurrency,
+            )
+
+            placement = [len(engine.containers) for engine in engines]
+
+            results["list_polling"] = await timed(
+                [
+                    lambda path=path: client.get(path)
+                    for _ in range(args.polls)
+                    for path in ("/containers/", "/containers/running")
+                ],
+                args.concurrency,
+            )
+
+            names = [f"bench-{i:04d}" for i in range(args.containers)]
+            results["stats_fanout"] = await timed(
+                [
+                    lambda name=name: client.get(f"/containers/{name}/stats")
+                    for name in names
+                ]
+                + [
+                    lambda: client.get("/v2/containers/stats")
+                    for _ in range(args.polls)
+                ],
+                args.concurrency,
+            )
+
+            results["gateway_proxy"] = await timed(
+                [
+                    lambda name=name: client.get(f"/proxy/{name}/health")
+                    for _ in range(max(args.polls // 10, 1))
+                    for name in names
+                ],
+                args.concurrency,
+            )
+
+            results["hibernate"] = await timed(
+                [
+                    lambda name=name: client.post(f"/containers/{name}/hibernate")
+                    for name in names
+                ],
+                args.concurrency,
+            )
+            results["cold_wake"] = await timed(
+                [
+                    lambda name=name: client.get(f"/proxy/{name}/health")
+                    for name in names
+                ],
+                args.concurrency,
+            )
+
+            for operation in ("stop", "remove"):
+                results[f"batch_{operation}"] = await timed(
+                    [
+                        lambda operation=operation: client.post(
+                            f"/containers/batch/{operation}", json={"ids": names}
+                        )
+                    ],
+                    1,
+                )
+
+        leaked_ports = get_docker_cluster().port_manager.get_used_ports()
+
+    if args.tracemalloc:
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        results["tracemalloc"] = {"peak_mb": peak / (1024 * 1024)}
+
+    engine_calls: Dict[str, int] = {}
+    for engine in engines:
+        engine.stop()
+        for operation, count in engine.calls.items():
+            engine_calls[operation] = engine_calls.get(operation, 0) + count
+    leftover = sum(len(engine.containers) for engine in engines)
+
+    if args.json:
+        print(
+            json.dumps(
+                {
+                    "engine_calls": engine_calls,
+                    "placement": placement,
+                    "results": results,
+                    "leaked_ports": leaked_ports,
+                    "leftover_containers": leftover,
+                },
+                indent=2,
+            )
+        )
+    else:
+        print(
+            f"{'scenario':<16}{'requests':>9}{'failed':>8}{'seconds':>9}"
+            f"{'req/s':>9}{'p50 ms':>9}{'p99 ms':>9}{'rss MB':>9}"
+        )
+        for name, result in results.items():
+            if name == "tracemalloc":
+                continue
+            print(
+                f"{name:<16}{result['requests']:>9}{result['failures']:>8}"
+                f"{result['seconds']:>9.2f}{result['throughput']:>9.1f}"
+                f"{result['p50_ms']:>9.1f}{result['p99_ms']:>9.1f}"
+                f"{result['rss_mb']:>9.1f}"
+            )
+        if "tracemalloc" in results:
+            print(f"peak traced:     {results['tracemalloc']['peak_mb']:.1f} MB")
+        print(f"engine calls:    {engine_calls}")
+        if len(engines) > 1:
+            print(f"placement:       {placement} containers per node")
+        print(f"leaked ports:    {leaked_ports or 'none'}")
+        print(f"leftover:        {leftover} containers")
+
+    ok = (
+        not any(result.get("failures") for result in results.values())
+        and not leaked_ports
+        and not leftover
+    )
+    print("PASS" if ok else "FAIL")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--containers", type=int, default=50)
+    parser.add_argument(
+        "--nodes", type=int, default=1, help="fake engines to schedule across"
+    )
+    parser.add_argument(
+        "--strategy", choices=("least_loaded", "binpack"), default="least_loaded"
+    )
+    parser.add_argument("--polls", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--port-start", type=int, default=31000)
+    parser.add_argument("--create-latency", type=float, default=0.05)
+    parser.add_argument("--start-latency", type=float, default=0.1)
+    parser.add_argument("--inspect-latency", type=float, default=0.005)
+    parser.add_argument("--list-latency", type=float, default=0.01)
+    parser.add_argument("--stats-latency", type=float, default=0.02)
+    parser.add_argument("--stop-latency", type=float, default=0.05)
+    parser.add_argument("--remove-latency", type=float, default=0.02)
+    parser.add_argument("--boot-latency", type=float, default=0.1)
+    parser.add_argument(
+        "--no-publish",
+        action="store_true",
+        help="bind no host ports; reach containers through the gateway only",
+    )
+    parser.add_argument("--tracemalloc", action="store_true")
+    parser.add_argument("--json", action="store_true")
+    parser.add_argument("--verbose", action="store_true")
+    sys.exit(asyncio.run(main(parser.parse_args())))
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Concurrency check for the async Docker execution layer.
+
+Fires 50 concurrent slow operations at the API against a fake daemon whose
+calls block for a configurable time, and verifies that /health keeps
+answering quickly while they run.
+
+    python -m benchmarks.concurrent_ops
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+
+import httpx
+
+from app.core.config import settings
+from app.main import app
+from app.services.async_docker_service import (
+    AsyncDockerService,
+    get_async_docker_service,
+)
+from app.services.cluster import DockerCluster
+from app.services.docker_service import DockerService
+from app.services.executor import DockerExecutor
+
+
+class FakeContainer:
+    """Container object whose daemon calls block like a real slow daemon"""
+
+    def __init__(self, container_id: str, latency: float):
+        self.id = container_id * 8
+        self.short_id = container_id
+        self.name = f"fake-{container_id}"
+        self.status = "running"
+        self.latency = latency
+        self.attrs = {
+            "Created": "2024-01-01T00:00:00.000000000Z",
+            "State": {"Status": "running"},
+            "NetworkSettings": {"Ports": {}},
+        }
+
+    def stats(self, stream: bool = False):
+        time.sleep(self.latency)
+        return {
+            "cpu_stats": {"cpu_usage": {"total_usage": 200}, "system_cpu_usage": 2000},
+            "precpu_stats": {
+                "cpu_usage": {"total_usage": 100},
+                "system_cpu_usage": 1000,
+            },
+            "memory_stats": {"usage": 64 * 1024 * 1024, "limit": 512 * 1024 * 1024},
+            "networks": {"eth0": {"rx_bytes": 1024, "tx_bytes": 2048}},
+        }
+
+    def stop(self):
+        time.sleep(self.latency)
+        self.status = "exited"
+
+    def reload(self):
+        pass
+
+
+class FakeContainers:
+    def __init__(self, latency: float):
+        self.latency = latency
+
+    def get(self, container_id: str) -> FakeContainer:
+        return FakeContainer(container_id, self.latency)
+
+
+class FakeClient:
+    def __init__(self, latency: float):
+        self.containers = FakeContainers(latency)
+
+    def ping(self) -> bool:
+        return True
+
+    def close(self):
+        pass
+
+
+class FakeDockerService(DockerService):
+    """DockerService wired to an in-process fake daemon"""
+
+    def __init__(self, latency: float):
+        self.latency = latency
+        super().__init__()
+
+    def _initialize_client(self):
+        self._client = FakeClient(self.latency)
+
+
+async def main(args) -> int:
+    node = FakeDockerService(args.latency)
+    service = AsyncDockerService(
+        DockerCluster({node.node: node}, node.port_manager),
+        DockerExecutor(
+            max_workers=settings.docker_executor_workers,
+            limits=settings.docker_operation_limits,
+        ),
+    )
+    app.dependency_overrides[get_async_docker_service] = lambda: service
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        probe_latencies = []
+
+        async def probe():
+            while True:
+                start = time.perf_counter()
+                response = await client.get("/health")
+                probe_latencies.append(time.perf_counter() - start)
+                assert response.status_code == 200
+                await asyncio.sleep(0.05)
+
+        prober = asyncio.create_task(probe())
+        start = time.perf_counter()
+        responses = await asyncio.gather(
+            *(client.get(f"/containers/c{i:04d}/stats") for i in range(args.operations))
+        )
+        elapsed = time.perf_counter() - start
+        prober.cancel()
+
+    app.dependency_overrides.clear()
+    service.executor.shutdown()
+
+    failures = [r for r in responses if r.status_code != 200]
+    worst_probe = max(probe_latencies) if probe_latencies else 0.0
+    serial_time = args.operations * args.latency
+    print(f"operations:       {args.operations} x {args.latency:.2f}s")
+    print(f"wall time:        {elapsed:.2f}s (serial would be {serial_time:.2f}s)")
+    print(f"failed requests:  {len(failures)}")
+    print(
+        f"/health probes:   {len(probe_latencies)}, worst {worst_probe * 1000:.1f} ms"
+    )
+
+    ok = (
+        not failures
+        and elapsed < serial_time / 2
+        and worst_probe < args.max_probe_latency
+    )
+    print("PASS" if ok else "FAIL")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--operations", type=int, default=50)
+    parser.add_argument("--latency", type=float, default=1.0)
+    parser.add_argument("--max-probe-latency", type=float, default=0.25)
+    sys.exit(asyncio.run(main(parser.parse_args())))
@@ -0,0 +1,653 @@
+"""
+In-process fake of the Docker Engine API for benchmarks.
+
+FakeEngine serves the subset of the Engine HTTP API that DockerService and
+docker-py use (ping, version, info, container create/start/inspect/list/
+stats/stop/rename/remove, images and the events stream) over a local TCP socket,
+so the real docker-py client, connection pool and DockerService code paths
+are exercised. Each endpoint can be given a latency. Started containers
+answer HTTP requests on their published host port and on port 5000 of a
+per-container loopback address standing in for their network IP, so
+readiness probing and the gateway work as they do against real containers.
+
+    engine = FakeEngine(Latencies(create=0.05, start=0.1))
+    engine.start()
+    settings.docker_host = engine.base_url
+"""
+
+import itertools
+import json
+import queue
+import re
+import selectors
+import socket
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Set, Tuple
+from urllib.parse import parse_qs, urlparse
+
+API_VERSION = "1.43"
+IMAGE_ID = "sha256:" + "b" * 64
+# Capacity reported by /info
+NCPU = 16
+MEM_TOTAL = 64 * 1024**3
+# Container addresses are unique across engines, so several fakes can act
+# as the nodes of one cluster
+_addresses = itertools.count(1)
+
+HEALTH_RESPONSE = (
+    b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n"
+    b"Content-Length: 20\r\n\r\n"
+    b'{"status":"healthy"}'
+)
+
+
+@dataclass
+class FakeEngineContainer:
+    id: str
+    name: str
+    image: str
+    labels: Dict[str, str]
+    port_bindings: Dict[str, List[dict]]
+    created: float
+    address: str
+    network: str
+    status: str = "created"
+    samples: int = 0
+
+
+@dataclass
+class Latencies:
+    """Seconds each Engine API operation takes"""
+
+    create: float = 0.0
+    start: float = 0.0
+    inspect: float = 0.0
+    list: float = 0.0
+    stats: float = 0.0
+    stop: float = 0.0
+    remove: float = 0.0
+    pause: float = 0.0
+    unpause: float = 0.0
+    boot: float = 0.0  # from start until the health endpoint answers
+    stats_interval: float = 1.0  # between streamed stats samples
+    extra: Dict[str, float] = field(default_factory=dict)
+
+
+class HealthResponder:
+    """Answers HTTP requests on many ports from a single selector thread"""
+
+    def __init__(self):
+        self._selector = selectors.DefaultSelector()
+        self._listeners: Dict[Tuple[str, int], socket.socket] = {}
+        self._connections: Dict[Tuple[str, int], Set[socket.socket]] = {}
+        self._lock = threading.Lock()
+        self._wakeup_r, self._wakeup_w = socket.socketpair()
+        self._selector.register(self._wakeup_r, selectors.EVENT_READ, "wakeup")
+        self._running = False
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        self._running = True
+        self._thread = threading.Thread(
+            target=self._run, name="fake-health", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        self._running = False
+        self._wakeup_w.send(b"x")
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+        for host, port in list(self._listeners):
+            self.close(host, port)
+
+    def open(self, host: str, port: int):
+        listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        try:
+            listener.bind((host, port))
+        except OSError:
+            listener.close()
+            return
+        listener.listen(64)
+        listener.setblocking(False)
+        with self._lock:
+            self._listeners[(host, port)] = listener
+            self._connections[(host, port)] = set()
+            self._selector.register(
+                listener, selectors.EVENT_READ, ("listener", (host, port))
+            )
+        self._wakeup_w.send(b"x")
+
+    def close(self, host: str, port: int):
+        """Stop listening and drop open connections, like a stopped process"""
+        with self._lock:
+            listener = self._listeners.pop((host, port), None)
+            if listener is not None:
+                self._selector.unregister(listener)
+                listener.close()
+            for connection in self._connections.pop((host, port), set()):
+                self._selector.unregister(connection)
+                connection.close()
+
+    def _run(self):
+        while self._running:
+            for key, _ in self._selector.select(timeout=0.5):
+                sock = key.fileobj
+                if key.data == "wakeup":
+                    sock.recv(4096)
+                    continue
+                kind, address = key.data
+                if kind == "listener":
+                    try:
+                        connection, _ = sock.accept()
+                    except OSError:
+                        continue
+                    connection.setblocking(False)
+                    with self._lock:
+                        if address not in self._connections:
+                            connection.close()
+                            continue
+                        self._connections[address].add(connection)
+                        self._selector.register(
+                            connection, selectors.EVENT_READ, ("connection", address)
+                        )
+                    continue
+                try:
+                    data = sock.recv(65536)
+                    if data:
+                        # One response per request; clients do not pipeline
+                        sock.sendall(HEALTH_RESPONSE * data.count(b"\r\n\r\n"))
+                        continue
+                except OSError:
+                    pass
+                with self._lock:
+                    if sock in self._connections.get(address, ()):
+                        self._connections[address].discard(sock)
+                        self._selector.unregister(sock)
+                        sock.close()
+
+
+class EngineServer(ThreadingHTTPServer):
+    # The default backlog of 5 drops SYNs under bursts, costing 1s retransmits
+    request_queue_size = 1024
+
+
+class FakeEngine:
+    """A fake Docker Engine listening on 127.0.0.1"""
+
+    def __init__(self, latencies: Optional[Latencies] = None):
+        self.latencies = latencies or Latencies()
+        self.containers: Dict[str, FakeEngineContainer] = {}
+        self.calls: Dict[str, int] = {}
+        self._events: List[dict] = []
+        self._subscribers: List[queue.Queue] = []
+        self._lock = threading.Lock()
+        self.health = HealthResponder()
+        self._server: Optional[ThreadingHTTPServer] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address
+        return f"tcp://{host}:{port}"
+
+    def start(self):
+        engine = self
+
+        class Handler(EngineRequestHandler):
+            pass
+
+        Handler.engine = engine
+        self._server = EngineServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(
+            target=self._server.serve_forever, name="fake-engine", daemon=True
+        ).start()
+        self.health.start()
+
+    def stop(self):
+        with self._lock:
+            for subscriber in self._subscribers:
+                subscriber.put(None)
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+        self.health.stop()
+
+    def sleep(self, operation: str):
+        self.calls[operation] = self.calls.get(operation, 0) + 1
+        delay = getattr(self.latencies, operation, None)
+        if delay is None:
+            delay = self.latencies.extra.get(operation, 0.0)
+        if delay:
+            time.sleep(delay)
+
+    def find(self, ref: str) -> Optional[FakeEngineContainer]:
+        with self._lock:
+            container = self.containers.get(ref)
+            if container is not None:
+                return container
+            for container in self.containers.values():
+                if container.name == ref or container.id.startswith(ref):
+                    return container
+        return None
+
+    def allocate_address(self) -> str:
+        """A distinct loopback address standing in for a container network IP"""
+        n = next(_addresses)
+        return f"127.1.{n // 250 % 250}.{n % 250 + 2}"
+
+    def emit(self, container: FakeEngineContainer, action: str):
+        now = time.time_ns()
+        event = {
+            "Type": "container",
+            "Action": action,
+            "status": action,
+            "id": container.id,
+            "from": container.image,
+            "Actor": {
+                "ID": container.id,
+                "Attributes": {"name": container.name, "image": container.image},
+            },
+            "scope": "local",
+            "time": now // 1_000_000_000,
+            "timeNano": now,
+        }
+        with self._lock:
+            self._events.append(event)
+            subscribers = list(self._subscribers)
+        for subscriber in subscribers:
+            subscriber.put(event)
+
+    def subscribe(self, since: Optional[float]) -> queue.Queue:
+        subscriber: queue.Queue = queue.Queue()
+        with self._lock:
+            if since is not None:
+                for event in self._events:
+                    if event["time"] >= since:
+                        subscriber.put(event)
+            self._subscribers.append(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber: queue.Queue):
+        with self._lock:
+            if subscriber in self._subscribers:
+                self._subscribers.remove(subscriber)
+
+    def summary(self, container: FakeEngineContainer) -> dict:
+        ports = []
+        if container.status in ("running", "paused"):
+            for private, bindings in container.port_bindings.items():
+                number, _, kind = private.partition("/")
+                for binding in bindings:
+                    ports.append(
+                        {
+                            "IP": "0.0.0.0",
+                            "PrivatePort": int(number),
+                            "PublicPort": int(binding["HostPort"]),
+                            "Type": kind or "tcp",
+                        }
+                    )
+        return {
+            "Id": container.id,
+            "Names": [f"/{container.name}"],
+            "Image": container.image,
+            "ImageID": IMAGE_ID,
+            "Created": int(container.created),
+            "State": container.status,
+            "Status": container.status,
+            "Ports": ports,
+            "Labels": container.labels,
+            "NetworkSettings": {"Networks": self.networks(container)},
+        }
+
+    def inspect(self, container: FakeEngineContainer) -> dict:
+        running = container.status in ("running", "paused")
+        ports = {
+            private: (
+                [{"HostIp": "0.0.0.0", "HostPort": b["HostPort"]} for b in bindings]
+                if running
+                else None
+            )
+            for private, bindings in container.port_bindings.items()
+        }
+        created = time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(container.created))
+        return {
+            "Id": container.id,
+            "Name": f"/{container.name}",
+            "Created": f"{created}.000000000Z",
+            "Image": IMAGE_ID,
+            "State": {"Status": container.status, "Running": running},
+            "Config": {"Image": container.image, "Labels": container.labels},
+            "HostConfig": {"PortBindings": container.port_bindings},
+            "NetworkSettings": {
+                "Ports": ports,
+                "Networks": self.networks(container),
+            },
+        }
+
+    def networks(self, container: FakeEngineContainer) -> dict:
+        running = container.status in ("running", "paused")
+        return {container.network: {"IPAddress": container.address if running else ""}}
+
+    def stats(self, container: FakeEngineContainer) -> dict:
+        container.samples += 1
+        n = container.samples
+        return {
+            "read": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "cpu_stats": {
+                "cpu_usage": {"total_usage": 10_000_000 * (n + 1)},
+                "system_cpu_usage": 1_000_000_000 * (n + 1),
+                "online_cpus": 1,
+            },
+            "precpu_stats": {
+                "cpu_usage": {"total_usage": 10_000_000 * n},
+                "system_cpu_usage": 1_000_000_000 * n,
+            },
+            "memory_stats": {"usage": 64 * 1024 * 1024, "limit": 512 * 1024 * 1024},
+            "networks": {"eth0": {"rx_bytes": 1024 * n, "tx_bytes": 2048 * n}},
+            "blkio_stats": {
+                "io_service_bytes_recursive": [
+                    {"op": "read", "value": 4096 * n},
+                    {"op": "write", "value": 8192 * n},
+                ]
+            },
+            "pids_stats": {"current": 4},
+        }
+
+
+def _matches(container: FakeEngineContainer, filters: Dict[str, List[str]]) -> bool:
+    for key, values in filters.items():
+        if key == "id":
+            if not any(container.id.startswith(value) for value in values):
+                return False
+        elif key == "status":
+            if container.status not in values:
+                return False
+        elif key == "name":
+            if not any(re.search(value, f"/{container.name}") for value in values):
+                return False
+        elif key == "label":
+            for value in values:
+                name, sep, expected = value.partition("=")
+                if name not in container.labels:
+                    return False
+                if sep and container.labels[name] != expected:
+                    return False
+    return True
+
+
+class EngineRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Headers and body are written separately; without this, Nagle plus
+    # delayed ACKs add ~40ms to every keep-alive round-trip
+    disable_nagle_algorithm = True
+    engine: FakeEngine = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        self._dispatch("GET")
+
+    def do_POST(self):
+        self._dispatch("POST")
+
+    def do_DELETE(self):
+        self._dispatch("DELETE")
+
+    def do_HEAD(self):
+        self._dispatch("HEAD")
+
+    def _dispatch(self, method: str):
+        url = urlparse(self.path)
+        path = re.sub(r"^/v[0-9.]+", "", url.path)
+        query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        length = int(self.headers.get("Content-Length") or 0)
+        body = json.loads(self.rfile.read(length)) if length else {}
+        engine = self.engine
+
+        if path == "/_ping":
+            return self._send(200, "OK", content_type="text/plain")
+        if path == "/version":
+            return self._send(200, {"ApiVersion": API_VERSION, "Version": "fake"})
+        if path == "/info":
+            return self._send(
+                200, {"Name": "fake", "NCPU": NCPU, "MemTotal": MEM_TOTAL}
+            )
+        if path == "/images/json":
+            engine.sleep("images")
+            return self._send(
+                200, [{"Id": IMAGE_ID, "RepoTags": ["base-api-server:latest"]}]
+            )
+        if path == "/events":
+            return self._events(query)
+        if path == "/containers/json":
+            return self._list(query)
+        if path == "/containers/create" and method == "POST":
+            return self._create(query, body)
+
+        match = re.match(r"^/containers/([^/]+)(/[a-z]+)?$", path)
+        if not match:
+            return self._send(404, {"message": f"page not found: {path}"})
+        container = engine.find(match.group(1))
+        if container is None:
+            return self._send(404, {"message": f"No such container: {match.group(1)}"})
+        action = match.group(2) or ""
+        if action == "/json":
+            engine.sleep("inspect")
+            return self._send(200, engine.inspect(container))
+        if action == "/start":
+            engine.sleep("start")
+            if container.status == "paused":
+                return self._send(409, {"message": "cannot start a paused container"})
+            if container.status != "running":
+                container.status = "running"
+                engine.emit(container, "start")
+                self._open_health(container)
+            return self._send(204)
+        if action == "/pause":
+            engine.sleep("pause")
+            if container.status != "running":
+                return self._send(409, {"message": "container is not running"})
+            container.status = "paused"
+            self._close_health(container)
+            engine.emit(container, "pause")
+            return self._send(204)
+        if action == "/unpause":
+            engine.sleep("unpause")
+            if container.status != "paused":
+                return self._send(409, {"message": "container is not paused"})
+            container.status = "running"
+            for host, port in self._health_addresses(container):
+                engine.health.open(host, port)
+            engine.emit(container, "unpause")
+            return self._send(204)
+        if action == "/stop":
+            engine.sleep("stop")
+            if container.status in ("running", "paused"):
+                container.status = "exited"
+                self._close_health(container)
+                engine.emit(container, "die")
+                engine.emit(container, "stop")
+            return self._send(204)
+        if action == "/rename":
+            engine.sleep("rename")
+            container.name = query["name"]
+            engine.emit(container, "rename")
+            return self._send(204)
+        if action == "/stats":
+            return self._stats(container, query)
+        if action == "" and method == "DELETE":
+            engine.sleep("remove")
+            if container.status in ("running", "paused") and query.get("force") not in (
+                "1",
+                "true",
+                "True",
+            ):
+                return self._send(409, {"message": "container is running"})
+            self._close_health(container)
+            with engine._lock:
+                engine.containers.pop(container.id, None)
+            engine.emit(container, "destroy")
+            return self._send(204)
+        return self._send(404, {"message": f"page not found: {path}"})
+
+    def _create(self, query: dict, body: dict):
+        engine = self.engine
+        engine.sleep("create")
+        name = query.get("name") or f"fake-{uuid.uuid4().hex[:8]}"
+        if engine.find(name) is not None:
+            return self._send(409, {"message": f'Conflict. "/{name}" is in use'})
+        container = FakeEngineContainer(
+            id=uuid.uuid4().hex + uuid.uuid4().hex,
+            name=name,
+            image=body.get("Image", ""),
+            labels=body.get("Labels") or {},
+            port_bindings=(body.get("HostConfig") or {}).get("PortBindings") or {},
+            created=time.time(),
+            address=engine.allocate_address(),
+            network=(body.get("HostConfig") or {}).get("NetworkMode") or "bridge",
+        )
+        with engine._lock:
+            engine.containers[container.id] = container
+        engine.emit(container, "create")
+        return self._send(201, {"Id": container.id, "Warnings": []})
+
+    def _list(self, query: dict):
+        engine = self.engine
+        engine.sleep("list")
+        filters = json.loads(query.get("filters") or "{}")
+        show_all = query.get("all") in ("1", "true", "True")
+        with engine._lock:
+            containers = sorted(
+                engine.containers.values(), key=lambda c: c.created, reverse=True
+            )
+        if not show_all and "status" not in filters:
+            containers = [c for c in containers if c.status == "running"]
+        containers = [c for c in containers if _matches(c, filters)]
+        limit = int(query.get("limit") or -1)
+        if limit > 0:
+            containers = containers[:limit]
+        return self._send(200, [engine.summary(c) for c in containers])
+
+    def _stats(self, container: FakeEngineContainer, query: dict):
+        engine = self.engine
+        if query.get("stream") in ("0", "false", "False"):
+            engine.sleep("stats")
+            return self._send(200, engine.stats(container))
+        self._start_chunked()
+        try:
+            while container.status in ("running", "paused"):
+                self._write_chunk(engine.stats(container))
+                time.sleep(engine.latencies.stats_interval)
+            self._end_chunked()
+        except OSError:
+            pass
+
+    def _events(self, query: dict):
+        engine = self.engine
+        since = float(query["since"]) if query.get("since") else None
+        until = float(query["until"]) if query.get("until") else None
+        filters = json.loads(query.get("filters") or "{}")
+        subscriber = engine.subscribe(since)
+        self._start_chunked()
+        try:
+            while True:
+                timeout = None if until is None else until - time.time()
+                if timeout is not None and timeout <= 0:
+                    break
+                try:
+                    event = subscriber.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                if event is None:
+                    break
+                if until is not None and event["time"] > until:
+                    continue
+                if not self._event_matches(event, filters):
+                    continue
+                self._write_chunk(event)
+            self._end_chunked()
+        except OSError:
+            pass
+        finally:
+            engine.unsubscribe(subscriber)
+
+    @staticmethod
+    def _event_matches(event: dict, filters: Dict[str, List[str]]) -> bool:
+        for key, values in filters.items():
+            if key == "container":
+                actor = event["Actor"]
+                refs = {actor["ID"], actor["Attributes"]["name"]}
+                if not any(
+                    value in refs or actor["ID"].startswith(value) for value in values
+                ):
+                    return False
+            elif key == "event" and event["Action"] not in values:
+                return False
+            elif key == "type" and event["Type"] not in values:
+                return False
+        return True
+
+    def _open_health(self, container: FakeEngineContainer):
+        """Serve health checks on the published ports and the network address"""
+        boot = self.engine.latencies.boot
+
+        def open_ports():
+            if container.status == "running":
+                for host, port in self._health_addresses(container):
+                    self.engine.health.open(host, port)
+
+        if boot:
+            threading.Timer(boot, open_ports).start()
+        else:
+            open_ports()
+
+    def _close_health(self, container: FakeEngineContainer):
+        for host, port in self._health_addresses(container):
+            self.engine.health.close(host, port)
+
+    @staticmethod
+    def _health_addresses(container: FakeEngineContainer) -> List[Tuple[str, int]]:
+        addresses = [(container.address, 5000)]
+        for bindings in container.port_bindings.values():
+            for binding in bindings:
+                addresses.append(("127.0.0.1", int(binding["HostPort"])))
+        return addresses
+
+    def _send(self, status: int, payload=None, content_type="application/json"):
+        if payload is None:
+            data = b""
+        elif isinstance(payload, str):
+            data = payload.encode()
+        else:
+            data = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.send_header("Api-Version", API_VERSION)
+        self.end_headers()
+        if data and self.command != "HEAD":
+            self.wfile.write(data)
+
+    def _start_chunked(self):
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        self.wfile.flush()
+
+    def _write_chunk(self, payload: dict):
+        data = json.dumps(payload).encode() + b"\n"
+        self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+        self.wfile.flush()
+
+    def _end_chunked(self):
+        self.wfile.write(b"0\r\n\r\n")
+        self.wfile.flush()
+        self.close_connection = True
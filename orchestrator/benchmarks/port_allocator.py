@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Benchmark for PortManager under concurrent allocate/release load.
+
+Each worker thread repeatedly allocates a port, holds it briefly and
+releases it. The run fails if two holders ever receive the same port, or
+if the state file does not match the allocator once it is closed.
+
+The allocator persists its state to a file as the API configures it by
+default; --no-persist measures the allocator alone.
+
+    python -m benchmarks.port_allocator --threads 32 --operations 5000
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+
+from app.utils.port_manager import PortManager
+
+
+def run(manager: PortManager, threads: int, operations: int, hold: int):
+    """Run the workload and return (elapsed seconds, duplicate allocations)"""
+    holders = {}
+    holders_lock = threading.Lock()
+    duplicates = []
+    barrier = threading.Barrier(threads + 1)
+
+    def worker(worker_id: int):
+        held = []
+        barrier.wait()
+        for _ in range(operations):
+            port = manager.find_available_port()
+            with holders_lock:
+                if port in holders:
+                    duplicates.append(port)
+                holders[port] = worker_id
+            held.append(port)
+            if len(held) > hold:
+                released = held.pop(0)
+                with holders_lock:
+                    holders.pop(released, None)
+                manager.release_port(released)
+        for port in held:
+            with holders_lock:
+                holders.pop(port, None)
+            manager.release_port(port)
+
+    workers = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    for thread in workers:
+        thread.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for thread in workers:
+        thread.join()
+    return time.perf_counter() - start, duplicates
+
+
+def main(args) -> int:
+    state_file = (
+        None if args.no_persist else os.path.join(tempfile.mkdtemp(), "ports.json")
+    )
+    manager = PortManager(
+        args.start_port,
+        args.end_port,
+        state_file=state_file,
+        probe=args.probe,
+        flush_interval=args.flush_interval,
+    )
+    elapsed, duplicates = run(manager, args.threads, args.operations, args.hold)
+    total = args.threads * args.operations
+    manager.close()
+    persisted = None
+    if state_file:
+        with open(state_file) as state:
+            persisted = json.load(state)["used_ports"]
+
+    print(f"range:            {args.start_port}-{args.end_port}")
+    print(f"threads:          {args.threads}")
+    print(f"allocations:      {total} (+ {total} releases)")
+    print(f"elapsed:          {elapsed:.3f}s")
+    print(f"throughput:       {2 * total / elapsed:,.0f} ops/s")
+    print(f"duplicates:       {len(duplicates)}")
+    print(f"leaked ports:     {len(manager.get_used_ports())}")
+    if state_file:
+        print(f"state file:       {len(persisted)} ports after close")
+
+    ok = (
+        not duplicates
+        and not manager.get_used_ports()
+        and persisted in (None, manager.get_used_ports())
+    )
+    print("PASS" if ok else "FAIL")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--threads", type=int, default=32)
+    parser.add_argument("--operations", type=int, default=5000)
+    parser.add_argument("--hold", type=int, default=8, help="ports held per thread")
+    parser.add_argument("--start-port", type=int, default=20000)
+    parser.add_argument("--end-port", type=int, default=30000)
+    parser.add_argument("--probe", action="store_true", help="bind-test ports")
+    parser.add_argument(
+        "--no-persist", action="store_true", help="do not write a state file"
+    )
+    parser.add_argument("--flush-interval", type=float, default=1.0)
+    sys.exit(main(parser.parse_args()))
@@ -0,0 +1,63 @@
+import asyncio
+import time
+
+import httpx
+
+from app.main import app
+from app.services.async_docker_service import (
+    AsyncDockerService,
+    get_async_docker_service,
+)
+from app.services.cluster import DockerCluster
+from app.services.executor import DockerExecutor
+from benchmarks.concurrent_ops import FakeDockerService
+
+OPERATIONS = 50
+LATENCY = 0.2
+
+
+async def run_concurrent_stats():
+    """Request stats for OPERATIONS containers at once, probing /health"""
+    node = FakeDockerService(LATENCY)
+    service = AsyncDockerService(
+        DockerCluster({node.node: node}, node.port_manager),
+        DockerExecutor(max_workers=OPERATIONS),
+    )
+    app.dependency_overrides[get_async_docker_service] = lambda: service
+    probe_latencies = []
+    try:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://test"
+        ) as client:
+
+            async def probe():
+                while True:
+                    start = time.perf_counter()
+                    response = await client.get("/health")
+                    probe_latencies.append(time.perf_counter() - start)
+                    assert response.status_code == 200
+                    await asyncio.sleep(0.02)
+
+            prober = asyncio.create_task(probe())
+            start = time.perf_counter()
+            responses = await asyncio.gather(
+                *(client.get(f"/containers/c{i:04d}/stats") for i in range(OPERATIONS))
+            )
+            elapsed = time.perf_counter() - start
+            prober.cancel()
+    finally:
+        app.dependency_overrides.clear()
+        service.executor.shutdown()
+    return responses, elapsed, probe_latencies
+
+
+def test_slow_operations_run_in_parallel():
+    responses, elapsed, probe_latencies = asyncio.run(run_concurrent_stats())
+
+    assert [r.status_code for r in responses] == [200] * OPERATIONS
+    serial = OPERATIONS * LATENCY
+    assert elapsed < serial / 5, f"{OPERATIONS} operations took {elapsed:.2f}s"
+    # The event loop keeps answering while every worker is blocked
+    assert probe_latencies
+    assert max(probe_latencies) < LATENCY
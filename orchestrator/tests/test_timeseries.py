@@ -0,0 +1,160 @@
+import asyncio
+import random
+
+import httpx
+
+from app.main import app
+from app.services.registry import get_container_registry
+from app.services.system_sampler import BASE_FIELDS
+from app.services.timeseries import TimeSeriesStore, get_timeseries_store
+from app.utils.container_stats import STATS_FIELDS
+from app.utils.ring_buffer import RingBuffer
+
+CONTAINER_ID = "3f2a" + "0" * 60
+START = 1_000_020  # a multiple of 60, so 10s and 1min buckets line up
+
+
+class FakeCollector:
+    def __init__(self):
+        self.samples = {CONTAINER_ID: RingBuffer(1000, STATS_FIELDS)}
+
+    def buffers(self):
+        return dict(self.samples)
+
+    def add(self, timestamp, cpu_percent, net_rx_bytes=0.0):
+        row = dict.fromkeys(STATS_FIELDS, 0.0)
+        row.update(
+            timestamp=timestamp, cpu_percent=cpu_percent, net_rx_bytes=net_rx_bytes
+        )
+        self.samples[CONTAINER_ID].append([row[field] for field in STATS_FIELDS])
+
+
+class FakeSampler:
+    def __init__(self):
+        self.buffer = RingBuffer(10, BASE_FIELDS)
+
+
+class FakeRegistry:
+    """Knows no containers, as after the container was removed"""
+
+    def resolve_id(self, container_ref):
+        return None
+
+    def get(self, container_ref):
+        return None
+
+
+def make_store(path=None):
+    return TimeSeriesStore(
+        FakeCollector(), FakeSampler(), retention={10: 360, 60: 1440}, path=path
+    )
+
+
+def fill(store, buckets):
+    """One sample per second for ``buckets`` 10s buckets, CPU = bucket index"""
+    for second in range(buckets * 10):
+        store.collector.add(START + second, second // 10)
+    for bucket in range(1, buckets + 1):
+        store.rollup(START + bucket * 10)
+
+
+def test_rollup_aggregates():
+    store = make_store()
+    cpu = list(range(1, 21))
+    random.Random(7).shuffle(cpu)
+    # Two samples a second; 100 more received bytes each time
+    for index, value in enumerate(cpu):
+        store.collector.add(START + index / 2, value, net_rx_bytes=100.0 * index)
+    store.rollup(START + 10)
+
+    history = store.query(CONTAINER_ID, START, START + 10, 10)
+
+    assert history.timestamps == [START]
+    assert history.counts == [20]
+    assert history.metrics["cpu_percent"] == {
+        "min": [1.0],
+        "max": [20.0],
+        "avg": [10.5],
+        "p95": [19.0],  # nearest rank: the 19th of 20
+    }
+    assert history.metrics["network_rx_rate"]["avg"] == [200.0]
+    # No traffic at all: a zero rate, not a missing one
+    assert history.metrics["network_tx_rate"]["max"] == [0.0]
+
+
+def test_query_range_and_step():
+    store = make_store()
+    fill(store, 12)
+
+    # from is inclusive, to exclusive
+    history = store.query(CONTAINER_ID, START + 20, START + 60, 10)
+    assert history.resolution == 10
+    assert history.step == 10
+    assert history.timestamps == [START + 20, START + 30, START + 40, START + 50]
+    assert history.metrics["cpu_percent"]["avg"] == [2.0, 3.0, 4.0, 5.0]
+
+    # Buckets merge into step-aligned groups; a partial group keeps its count
+    history = store.query(CONTAINER_ID, START + 20, START + 60, 30)
+    assert history.step == 30
+    assert history.timestamps == [START, START + 30]
+    assert history.counts == [10, 30]
+    assert history.metrics["cpu_percent"]["min"] == [2.0, 3.0]
+    assert history.metrics["cpu_percent"]["max"] == [2.0, 5.0]
+
+    # A step that is not a multiple of the resolution is rounded down
+    assert store.query(CONTAINER_ID, START, START + 120, 25).step == 20
+    # The minute rollups answer steps of a minute or more
+    history = store.query(CONTAINER_ID, START, START + 120, 60)
+    assert history.resolution == 60
+    assert history.counts == [60, 60]
+    assert history.metrics["cpu_percent"]["avg"] == [2.5, 8.5]
+
+    assert store.query(CONTAINER_ID, START + 500, START + 600, 10).timestamps == []
+    assert store.query("unknown", START, START + 120, 10) is None
+
+
+def test_rollups_survive_save_and_load(tmp_path):
+    path = tmp_path / ".nubrix" / "timeseries.bin"
+    store = make_store(str(path))
+    fill(store, 12)
+    store.save()
+
+    restored = make_store(str(path))
+    restored.load()
+
+    for step in (10, 60):
+        before = store.query(CONTAINER_ID, START, START + 120, step)
+        after = restored.query(CONTAINER_ID, START, START + 120, step)
+        assert after == before
+    assert restored.memory_bytes() == store.memory_bytes()
+
+
+async def get_history(store, container_ref):
+    app.dependency_overrides[get_container_registry] = FakeRegistry
+    app.dependency_overrides[get_timeseries_store] = lambda: store
+    try:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://test"
+        ) as client:
+            return await client.get(
+                f"/containers/{container_ref}/stats/history",
+                params={"from": START, "to": START + 120},
+            )
+    finally:
+        app.dependency_overrides.clear()
+
+
+def test_history_of_removed_container():
+    store = make_store()
+    fill(store, 12)
+
+    for container_ref in (CONTAINER_ID, CONTAINER_ID[:12]):
+        response = asyncio.run(get_history(store, container_ref))
+        assert response.status_code == 200
+        history = response.json()
+        assert history["series"] == CONTAINER_ID[:12]
+        assert history["name"] is None
+        assert len(history["timestamps"]) == 12
+
+    assert asyncio.run(get_history(store, "ffff")).status_code == 404